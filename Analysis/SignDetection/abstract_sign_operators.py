@@ -18,20 +18,42 @@ def greater_than(left: str, right: str, strict: bool = False) -> set:
     else:
         if right == "-":
             result.add("tt")
+        elif right == "0" and strict:
+            result.add("tt")
         else:
             result.add("ff")
-            if not strict:
-                result.add("tt")
     return result
 
 
 def equal(left: str, right: str) -> set:
     """Implementation of abstract ==."""
     if left == "0" and right == "0":
-        return set("tt")
+        return {"tt"}
     if left == right:
         return set(["tt", "ff"])
-    return set("ff")
+    return {"ff"}
+
+
+def not_equal(left: str, right: str) -> set:
+    """Implementation of abstract !=."""
+    return {"tt" if result == "ff" else "ff" for result in equal(left, right)}
+
+
+def relational(operator: str, left: str, right: str) -> set:
+    """Implementation of the abstract relational operator for one sign on each side."""
+    if operator == ">":
+        return greater_than(left, right)
+    if operator == ">=":
+        return greater_than(left, right, True)
+    if operator == "<":
+        return greater_than(right, left)
+    if operator == "<=":
+        return greater_than(right, left, True)
+    if operator == "==":
+        return equal(left, right)
+    if operator == "!=":
+        return not_equal(left, right)
+    raise Exception(f"Unknown relational operator: {operator}")
 
 
 """Bolean operators."""
@@ -49,7 +71,7 @@ def handle_null_undef(left: Set[str], right: Set[str]) -> Set[str]:
     if len(left) == 0 or len(right) == 0:
         return set()
     if "undef" in left or "undef" in right:
-        return set("undef")
+        return {"undef"}
 
 
 def mul_sign(left: Set[str], right: Set[str]) -> Set[str]:
@@ -57,17 +79,17 @@ def mul_sign(left: Set[str], right: Set[str]) -> Set[str]:
     if handle_null_undef(left, right) is not None:
         return handle_null_undef(left, right)
     if "0" in left or "0" in right:
-        return set("0")
+        return {"0"}
     if left == right:
-        return set("+")
-    return set("-")
+        return {"+"}
+    return {"-"}
 
 
 def div_sign(left: Set[str], right: Set[str]) -> Set[str]:
     if handle_null_undef(left, right) is not None:
         return handle_null_undef(left, right)
     if "0" in right:
-        return set("undef")
+        return {"undef"}
     return mul_sign(left, right)
 
 
@@ -95,22 +117,22 @@ def negation_sign(right: Set[str]) -> Set[str]:
     if len(right) == 0:
         return set()
     if "undef" in right:
-        return set("undef")
+        return {"undef"}
     if "+" in right:
-        return set("-")
+        return {"-"}
     elif "-" in right:
-        return set("+")
+        return {"+"}
     else:
-        return set("0")
+        return {"0"}
 
 
 def mod_sign(left: Set[str], right: Set[str]) -> Set[str]:
     if handle_null_undef(left, right) is not None:
         return handle_null_undef(left, right)
     if "0" in right:
-        return set("undef")
+        return {"undef"}
     if "0" in left:
-        return set("0")
+        return {"0"}
     if "+" in left and "+" in right:
         return set(["+", "0"])
     if "+" in left and "-" in right:
@@ -136,11 +158,11 @@ def negation(sign: Set[str]) -> Set[str]:
     """Returns the negation of a sign set."""
     if len(sign) == 0:
         return set()
-    result = set("undef") if "undef" in sign else set()
+    result = {"undef"} if "undef" in sign else set()
     if "0" in sign:
-        result.union({"0"})
+        result.add("0")
     if "-" in sign:
-        result.union({"+"})
+        result.add("+")
     if "+" in sign:
-        result.union({"-"})
+        result.add("-")
     return result
@@ -1,73 +1,112 @@
-from typing import Dict, List, Set, Tuple, Union
+from operator import itemgetter
+from typing import Callable, Dict, List, Tuple, Union
 from Parser import Edge, POSSIBLE_ACTIONS, ProgramGraph
+from Parser.renumbering import Renumbering
 from Parser.struc_elements import VALID_A_OPERATORS, VALID_B_OPERATORS, VALID_R_OPERATORS, AExpr, BooleanOperation, Operation, VariableAccess
 
 from ..reaching_definitions import ReachingDefintionAnalysis
 from ..abstract_analysis import AbstractAnalysis
 
-from .abstract_sign_operators import *
-from .utils import sign
+from .sign_lattice import ALL_SIGNS, ARITHMETIC_TABLES, MINUS, NOT_TABLE, RELATIONAL_TABLES, SIZE, decode, sign_bits
 
 
-class SignDetectionMapping:
-    """Structure to represent a mapping."""
-    variable: Dict[str, Set[str]]
-    array: Dict[str, Set[str]]
-    record: Dict[str, List[Set[str]]]
+class SignSlots:
+    """
+    Fixed slot index of each variable, array summary and record field of a program graph.
+    The two fields of a record are the slots record[name] and record[name] + 1.
+    """
+    __slots__ = ("variable", "array", "record", "size")
+    variable: Dict[str, int]
+    array: Dict[str, int]
+    record: Dict[str, int]
+    size: int
 
-    def __init__(self, programGraph: ProgramGraph = None) -> None:
+    def __init__(self, programGraph: ProgramGraph) -> None:
+        self.variable = {}
         self.array = {}
         self.record = {}
-        self.variable = {}
-        if programGraph is not None:
-            for var_type, variables in programGraph.variables.items():
-                for var in variables.keys():
-                    if var_type == "array":
-                        self.array[var] = set()
-                    elif var_type == "record":
-                        self.record[var] = [
-                            set()] * 2
-                    else:
-                        self.variable[var] = set()
-
-    def get_result(self, variable: VariableAccess):
+        self.size = 0
+        for var_type, variables in programGraph.variables.items():
+            for var in variables.keys():
+                if var_type == "array":
+                    self.array[var] = self.size
+                    self.size += 1
+                elif var_type == "record":
+                    self.record[var] = self.size
+                    self.size += 2
+                else:
+                    self.variable[var] = self.size
+                    self.size += 1
+
+    def slot(self, variable: VariableAccess) -> int:
+        """Returns the slot of a variable access."""
         if variable.variable_type == "variable":
             return self.variable[variable.name]
         if variable.variable_type == "array":
             return self.array[variable.name]
-        if variable.variable_type == "record":
+        if variable.rec_type == "fst":
             return self.record[variable.name]
+        return self.record[variable.name] + 1
 
-    def set_result(self, value: Set[str], variable: VariableAccess):
-        if variable.variable_type == "variable":
-            self.variable[variable.name] = value
-        elif variable.variable_type == "record":
-            if variable.rec_type == "fst":
-                self.record[variable.name][0] = value
-            else:
-                self.record[variable.name][1] = value
-        elif variable.variable_type == "array":
-            self.array[variable.name] = self.array[variable.name].union(value)
+
+class SignDetectionMapping:
+    """
+    Structure to represent a mapping, the bitmask of the signs of each slot stored in one buffer.
+    The buffer is shared by the copies of a mapping until one of them writes to it.
+    """
+    __slots__ = ("slots", "signs", "owned")
+    slots: SignSlots
+    signs: Union[bytes, bytearray]
+    owned: bool
+
+    def __init__(self, programGraph: ProgramGraph = None, slots: SignSlots = None, signs: bytes = None) -> None:
+        self.slots = SignSlots(programGraph) if slots is None else slots
+        self.signs = bytes(self.slots.size) if signs is None else signs
+        self.owned = False
+
+    def get_result(self, variable: VariableAccess) -> int:
+        return self.signs[self.slots.slot(variable)]
+
+    def set_result(self, value: int, variable: VariableAccess):
+        slot = self.slots.slot(variable)
+        if variable.variable_type == "array":
+            value |= self.signs[slot]
+        self.write()[slot] = value
+
+    def write(self) -> bytearray:
+        """Returns the buffer of the mapping to write to it, copying it first if it is shared."""
+        if not self.owned:
+            self.signs = bytearray(self.signs)
+            self.owned = True
+        return self.signs
 
     def copy(self) -> "SignDetectionMapping":
-        """Returns a deep copy of the mapping."""
-        newMapping = SignDetectionMapping()
-        for var_name, signs in self.variable.items():
-            newSet = set([sign for sign in signs])
-            newMapping.variable[var_name] = newSet
-        for var_name, signs in self.record.items():
-            for i in range(len(signs)):
-                if var_name not in newMapping.record:
-                    newMapping.record[var_name] = []
-                newSet = set([sign for sign in signs[i]])
-                newMapping.record[var_name].append(newSet)
-        for var_name, signs in self.array.items():
-            if var_name not in newMapping.array:
-                newMapping.array[var_name] = set([sign for sign in signs])
-        return newMapping
+        """Returns a copy of the mapping, sharing the buffer until one of them writes."""
+        self.owned = False
+        return SignDetectionMapping(slots=self.slots, signs=self.signs)
+
+    def to_dict(self) -> Dict:
+        """Converts to the mapping with sets of signs."""
+        signs = self.signs
+        return {
+            "variable": {var_name: decode(signs[slot]) for var_name, slot in self.slots.variable.items()},
+            "array": {var_name: decode(signs[slot]) for var_name, slot in self.slots.array.items()},
+            "record": {var_name: [decode(signs[slot]), decode(signs[slot + 1])] for var_name, slot in self.slots.record.items()},
+        }
 
     def __str__(self) -> str:
-        return f"Variables: \n {self.variable} \n Arrays: \n {self.array} Records: \n {self.record}"
+        mapping = self.to_dict()
+        return f"Variables: \n {mapping['variable']} \n Arrays: \n {mapping['array']} Records: \n {mapping['record']}"
+
+
+def join_signs(signs1: bytes, signs2: bytes) -> bytes:
+    """Returns the slot by slot union of two buffers."""
+    return (int.from_bytes(signs1, "little") | int.from_bytes(signs2, "little")).to_bytes(len(signs1), "little")
+
+
+def meet_signs(signs1: bytes, signs2: bytes) -> bytes:
+    """Returns the slot by slot intersection of two buffers."""
+    return (int.from_bytes(signs1, "little") & int.from_bytes(signs2, "little")).to_bytes(len(signs1), "little")
 
 
 class SignDetectionAnalysis(ReachingDefintionAnalysis):
@@ -82,40 +121,77 @@ class SignDetectionAnalysis(ReachingDefintionAnalysis):
             return AbstractAnalysis.update_mapping(mapping, edge)
         new_mapping = mapping.copy()
         if edge.action.action_type == "assign" or edge.action.action_type == "read":
-            new_sign = set()
+            new_sign = 0
             if edge.action.action_type == "assign":
                 new_sign = reccursive_sign(
                     edge.action.right_expression, mapping)
             elif edge.action.action_type == "read":
-                new_sign = {"+", "0", "-"}
+                new_sign = ALL_SIGNS
             if edge.action.variable.variable_type == "array":
                 index_sign = reccursive_sign(
-                    edge.action.variable.child_accesses)
-                if "-" in index_sign:
-                    new_sign = set()
+                    edge.action.variable.child_accesses, mapping)
+                if index_sign & MINUS:
+                    new_sign = 0
             new_mapping.set_result(new_sign, edge.action.variable)
         if edge.action.action_type == "boolean":
             return reccursive_boolean_sign(edge.action.right_expression.operation, new_mapping)
         return new_mapping
 
+    @staticmethod
+    def compile_edge(edge: Edge, mapping: SignDetectionMapping) -> Callable[[SignDetectionMapping], SignDetectionMapping]:
+        """
+        Returns the transfer function of the edge, the expressions are compiled to closures
+        reading the slots of the buffer, the same as update_mapping.
+        """
+        slots = mapping.slots
+        action = edge.action
+        if action.action_type == "boolean":
+            return compile_boolean_sign(action.right_expression.operation, slots)
+        if action.action_type != "assign" and action.action_type != "read":
+            return lambda mapping: mapping if mapping == "undef" else mapping.copy()
+        if action.action_type == "assign":
+            value = compile_sign(action.right_expression, slots)
+        else:
+            def value(signs: bytes) -> int:
+                return ALL_SIGNS
+        slot = slots.slot(action.variable)
+        if action.variable.variable_type != "array":
+            def transfer(mapping: SignDetectionMapping) -> SignDetectionMapping:
+                if mapping == "undef":
+                    return mapping
+                new_mapping = mapping.copy()
+                new_mapping.write()[slot] = value(mapping.signs)
+                return new_mapping
+            return transfer
+        index = compile_sign(action.variable.child_accesses, slots)
+
+        def array_transfer(mapping: SignDetectionMapping) -> SignDetectionMapping:
+            if mapping == "undef":
+                return mapping
+            signs = mapping.signs
+            new_sign = 0 if index(signs) & MINUS else value(signs)
+            new_mapping = mapping.copy()
+            new_mapping.write()[slot] = signs[slot] | new_sign
+            return new_mapping
+        return array_transfer
+
+    @staticmethod
+    def renumbering(old_initial: SignDetectionMapping, initial: SignDetectionMapping, renumbering: Renumbering) -> Callable[[SignDetectionMapping], SignDetectionMapping]:
+        """The signs do not depend on the node numbers, the slots are the same as long as the declarations are."""
+        return lambda mapping: mapping
+
     @staticmethod
     def merge(mapping1: SignDetectionMapping, mapping2: SignDetectionMapping) -> SignDetectionMapping:
         """Merge two mappings."""
         merge = AbstractAnalysis.merge(mapping1, mapping2)
         if merge is not None:
             return merge
-        new_mapping = mapping1.copy()
-        for var_name, signs in mapping2.variable.items():
-            new_mapping.variable[var_name] = new_mapping.variable[var_name].union(
-                signs)
-        for var_name, signs in mapping2.record.items():
-            for index, _ in enumerate(new_mapping.record[var_name]):
-                new_mapping.record[var_name][index] = new_mapping.record[var_name][index].union(
-                    mapping2.record[var_name][index])
-        for var_name, signs in mapping2.array.items():
-            new_mapping.array[var_name] = new_mapping.array[var_name].union(
-                mapping2.array[var_name])
-        return new_mapping
+        return SignDetectionMapping(slots=mapping1.slots, signs=join_signs(mapping1.signs, mapping2.signs))
+
+    @staticmethod
+    def state_key(mapping: SignDetectionMapping) -> bytes:
+        """The signs of the slots, the slots of the mappings of a program graph are the same."""
+        return bytes(mapping.signs)
 
     @staticmethod
     def included(mapping1: SignDetectionMapping, mapping2: SignDetectionMapping) -> bool:
@@ -123,62 +199,181 @@ class SignDetectionAnalysis(ReachingDefintionAnalysis):
         undef = AbstractAnalysis.included(mapping1, mapping2)
         if undef is not None:
             return undef
-        for var_name, signs in mapping1.variable.items():
-            for sign in signs:
-                if sign not in mapping2.variable[var_name]:
-                    return False
-        for var_name, signList in mapping1.record.items():
-            for index, signs in enumerate(signList):
-                for sign in signs:
-                    if sign not in mapping2.record[var_name][index]:
-                        return False
-        for var_name, signs in mapping1.array.items():
-            for sign in signs:
-                if sign not in mapping2.array[var_name]:
-                    return False
-        return True
-
-
-def reccursive_sign(operation: Union[Operation, AExpr], mapping: SignDetectionMapping) -> Set[str]:
-    """Given an operation or an arithmetic exprresion extracts the sign."""
+        return not int.from_bytes(mapping1.signs, "little") & ~int.from_bytes(mapping2.signs, "little")
+
+
+def reccursive_sign(operation: Union[Operation, AExpr], mapping: SignDetectionMapping) -> int:
+    """Given an operation or an arithmetic exprresion extracts the bitmask of its signs."""
     if isinstance(operation, AExpr):
         if len(operation.expression) > 1:
             return reccursive_sign(operation.operation, mapping)
         variable = operation.expression[0]
         # This is a direct int.
         if isinstance(variable, str):
-            return sign(int(variable))
+            return sign_bits(int(variable))
         return mapping.get_result(variable)
-    if isinstance(operation.right, Operation):
-        right_sign = reccursive_sign(operation.right, mapping)
-    else:
-        if isinstance(operation.right.expression[0], str):
-            right_sign = sign(int(operation.right.expression[0]))
-        else:
-            right_sign = mapping.get_result(operation.right.expression[0])
-    if isinstance(operation.left, Operation):
-        left_sign = reccursive_sign(operation.left, mapping)
-    else:
-        if isinstance(operation.left.expression[0], str):
-            left_sign = sign(int(operation.left.expression[0]))
+    left_sign = reccursive_sign(operation.left, mapping)
+    right_sign = reccursive_sign(operation.right, mapping)
+    return ARITHMETIC_TABLES[operation.operator][left_sign * SIZE + right_sign]
+
+
+def operation_postorder(operation: Union[Operation, AExpr]) -> List[Union[Operation, AExpr]]:
+    """
+    Returns the nodes of an operation or an arithmetic expression in post-order, the expressions of more than one element
+    replaced by their operation. The tree is walked with an explicit stack, so its depth is not limited.
+    """
+    order = []
+    stack = [operation]
+    while len(stack) > 0:
+        node = stack.pop()
+        if isinstance(node, AExpr) and len(node.expression) > 1:
+            node = node.operation
+        order.append(node)
+        if isinstance(node, Operation):
+            stack.append(node.left)
+            stack.append(node.right)
+    order.reverse()
+    return order
+
+
+def is_boolean_leaf(operation: BooleanOperation) -> bool:
+    """A constant, its negation and a relational operation are compiled on their own."""
+    return operation.is_constant() or operation.is_relational() or (operation.operator == "not" and operation.right.is_constant())
+
+
+def boolean_postorder(operation: BooleanOperation) -> List[BooleanOperation]:
+    """Returns the &, | and not of a boolean operation and the leaves below them in post-order, with an explicit stack."""
+    order = []
+    stack = [operation]
+    while len(stack) > 0:
+        node = stack.pop()
+        order.append(node)
+        if not is_boolean_leaf(node):
+            if node.operator in ["&", "|"]:
+                stack.append(node.left)
+            stack.append(node.right)
+    order.reverse()
+    return order
+
+
+def compile_sign(operation: Union[Operation, AExpr], slots: SignSlots) -> Callable[[bytes], int]:
+    """
+    Compiles an operation or an arithmetic expression to a function from a buffer to the bitmask of its signs.
+    The operators become a flat list of steps (table, left register, right register), the registers being the constants,
+    then the slots read, then the results of the steps before.
+    """
+    if isinstance(operation, AExpr) and len(operation.expression) == 1:
+        variable = operation.expression[0]
+        # This is a direct int.
+        if isinstance(variable, str):
+            constant = sign_bits(int(variable))
+            return lambda signs: constant
+        return itemgetter(slots.slot(variable))
+    order = operation_postorder(operation)
+    if len(order) == 3:
+        # A single operator reads its operands directly.
+        left_sign = compile_sign(order[0], slots)
+        right_sign = compile_sign(order[1], slots)
+        table = ARITHMETIC_TABLES[order[2].operator]
+        return lambda signs: table[left_sign(signs) * SIZE + right_sign(signs)]
+    leaves = [node.expression[0] for node in order if isinstance(node, AExpr)]
+    constants = [sign_bits(int(variable)) for variable in leaves if isinstance(variable, str)]
+    read_slots = [slots.slot(variable) for variable in leaves if not isinstance(variable, str)]
+    steps: List[Tuple[bytes, int, int]] = []
+    registers: List[int] = []
+    constant_count = 0
+    read_count = len(constants)
+    for node in order:
+        if isinstance(node, Operation):
+            right = registers.pop()
+            left = registers.pop()
+            registers.append(len(leaves) + len(steps))
+            steps.append((ARITHMETIC_TABLES[node.operator], left, right))
+        elif isinstance(node.expression[0], str):
+            registers.append(constant_count)
+            constant_count += 1
         else:
-            left_sign = mapping.get_result(operation.left.expression[0])
-    if operation.operator == "*":
-        fct = mul_sign
-    elif operation.operator == "/":
-        fct = div_sign
-    elif operation.operator == "%":
-        fct = mod_sign
-    elif operation.operator == "+":
-        fct = add_sign
-    elif operation.operator == "-":
-        fct = sub_sign
-    return abstract_arithmetic(left_sign, right_sign, fct)
+            registers.append(read_count)
+            read_count += 1
+
+    def sign(signs: bytes) -> int:
+        values = constants + [signs[slot] for slot in read_slots]
+        for table, left, right in steps:
+            values.append(table[values[left] * SIZE + values[right]])
+        return values[-1]
+    return sign
+
+
+def compile_relational_sign(operation: BooleanOperation, slots: SignSlots) -> Callable[[SignDetectionMapping], SignDetectionMapping]:
+    """Compiles a relational operation to a function refining the slots of its sides made of accesses."""
+    if operation.operator not in VALID_R_OPERATORS:
+        raise Exception(
+            f"Trying to get relative sign for a non relative operation: {operation.operator}")
+    left_sign = compile_sign(operation.left, slots)
+    right_sign = compile_sign(operation.right, slots)
+    table = RELATIONAL_TABLES[operation.operator]
+    # The slots refined by each side, and whether they are array summaries.
+    refined = []
+    for side, expression in enumerate([operation.left, operation.right]):
+        if isinstance(expression, AExpr):
+            for expr in expression.expression:
+                if isinstance(expr, VariableAccess):
+                    refined.append(
+                        (side, slots.slot(expr), expr.variable_type == "array"))
+
+    def transfer(mapping: SignDetectionMapping) -> SignDetectionMapping:
+        if mapping == "undef":
+            return mapping
+        new_mapping = mapping.copy()
+        possible = table[left_sign(mapping.signs) * SIZE + right_sign(mapping.signs)]
+        if refined:
+            signs = new_mapping.write()
+            for side, slot, is_array in refined:
+                signs[slot] = signs[slot] | possible[side] if is_array else possible[side]
+        return new_mapping
+    return transfer
+
+
+def compile_boolean_sign(operation: BooleanOperation, slots: SignSlots) -> Callable[[SignDetectionMapping], SignDetectionMapping]:
+    """
+    Compiles a boolean operation to a function refining a mapping, the same as reccursive_boolean_sign.
+    The &, | and not become a flat list of steps run on a stack of mappings, the leaves being compiled on their own.
+    """
+    if operation.is_relational():
+        return compile_relational_sign(operation, slots)
+    if is_boolean_leaf(operation):  # A constant gives no information on the signs.
+        return lambda mapping: mapping if mapping == "undef" else mapping.copy()
+    steps: List[Tuple[str, Callable[[SignDetectionMapping], SignDetectionMapping]]] = []
+    for node in boolean_postorder(operation):
+        if not is_boolean_leaf(node):
+            steps.append((node.operator, None))
+        elif node.is_relational():
+            steps.append(("", compile_relational_sign(node, slots)))
+        else:  # A constant gives no information on the signs.
+            steps.append(("", SignDetectionMapping.copy))
+
+    def transfer(mapping: SignDetectionMapping) -> SignDetectionMapping:
+        if mapping == "undef":
+            return mapping
+        results = []
+        for operator, leaf in steps:
+            if leaf is not None:
+                results.append(leaf(mapping))
+            elif operator == "not":
+                results.append(merge_bool("not", results.pop()))
+            else:
+                right = results.pop()
+                results.append(merge_bool(operator, results.pop(), right))
+        return results[0]
+    return transfer
 
 
 def reccursive_boolean_sign(operation: BooleanOperation, mapping: SignDetectionMapping) -> SignDetectionMapping:
     """Get the sign of a boolean, returns a mapping that has been updated with the new knowledge."""
     new_mapping = mapping.copy()
+    # A constant gives no information on the signs.
+    if operation.is_constant() or (operation.operator == "not" and operation.right.is_constant()):
+        return new_mapping
     # Breaking down the boolean expression.
     if not operation.is_relational():
         if operation.operator in ["&", "|"]:
@@ -188,80 +383,36 @@ def reccursive_boolean_sign(operation: BooleanOperation, mapping: SignDetectionM
     else:
         sign_left, sign_right = sign_relative_operation(
             operation, new_mapping)
-        for expr in operation.left.expression:
-            if isinstance(expr, VariableAccess):
-                new_mapping.set_result(sign_left, expr)
-        for expr in operation.right.expression:
-            if isinstance(expr, VariableAccess):
-                new_mapping.set_result(sign_right, expr)
+        # Only a side made of a single access can be refined.
+        if isinstance(operation.left, AExpr):
+            for expr in operation.left.expression:
+                if isinstance(expr, VariableAccess):
+                    new_mapping.set_result(sign_left, expr)
+        if isinstance(operation.right, AExpr):
+            for expr in operation.right.expression:
+                if isinstance(expr, VariableAccess):
+                    new_mapping.set_result(sign_right, expr)
         return new_mapping
 
 
-def sign_relative_operation(operation: BooleanOperation, mapping: SignDetectionMapping) -> Tuple[Set[str], Set[str]]:
+def sign_relative_operation(operation: BooleanOperation, mapping: SignDetectionMapping) -> Tuple[int, int]:
     """Returns the possible signs for the left and the rigth of the operation."""
     if operation.operator not in VALID_R_OPERATORS:
         raise Exception(
             f"Trying to get relative sign for a non relative operation: {operation.operator}")
     left_signs = reccursive_sign(operation.left, mapping)
     right_signs = reccursive_sign(operation.right, mapping)
-    possible_right_signs = set()
-    possible_left_signs = set()
-    for left_sign in left_signs:
-        for right_sign in right_signs:
-            result = {}
-            if operation.operator == ">":
-                result = greater_than(left_sign, right_sign)
-            elif operation.operator == ">=":
-                result = greater_than(left_sign, right_sign, True)
-            elif operation.operator == "<":
-                result = greater_than(
-                    negation(left_sign), negation(right_sign))
-            elif operation.operator == "<=":
-                result = greater_than(negation(left_sign),
-                                      negation(right_sign), True)
-            elif operation.operator == "==":
-                result = equal(left_sign, right_sign)
-            if "tt" in result:
-                possible_right_signs.add(right_sign)
-                possible_left_signs.add(left_sign)
-    return possible_left_signs, possible_right_signs
+    return RELATIONAL_TABLES[operation.operator][left_signs * SIZE + right_signs]
 
 
 def merge_bool(operator: str, left: SignDetectionMapping, right: SignDetectionMapping = None) -> SignDetectionMapping:
     """Merge two sign mapping using the specified boolean operator."""
     if operator not in VALID_B_OPERATORS:
         raise Exception(f"Unknown boolean operator: {operator}")
-    new_mapping = left.copy()
-    for var_name, sign in new_mapping.variable.items():
-        if operator == "&":
-            new_mapping.variable[var_name] = right.variable[var_name].intersection(
-                sign)
-        elif operator == "|":
-            new_mapping.variable[var_name] = right.variable[var_name].union(
-                sign)
-        else:
-            new_mapping.variable[var_name] = not_sign(
-                (left.variable[var_name]))
-    for var_name, signList in new_mapping.record.items():
-        for index, signs in enumerate(signList):
-            if operator == "&":
-                new_mapping.record[var_name][index] = right.record[var_name][index].intersection(
-                    signs)
-            elif operator == "|":
-                new_mapping.record[var_name][index] = right.record[var_name][index].union(
-                    signs)
-            else:
-                new_mapping.record[var_name][index] = not_sign(
-                    (left.record[var_name][index]))
-    for var_name, signList in new_mapping.array.items():
-        for index, signs in enumerate(signList):
-            if operator == "&":
-                new_mapping.array[var_name][index] = right.array[var_name][index].intersection(
-                    signs)
-            elif operator == "|":
-                new_mapping.array[var_name][index] = right.array[var_name][index].union(
-                    signs)
-            else:
-                new_mapping.array[var_name][index] = not_sign(
-                    (left.array[var_name][index]))
-    return new_mapping
+    if operator == "&":
+        signs = meet_signs(left.signs, right.signs)
+    elif operator == "|":
+        signs = join_signs(left.signs, right.signs)
+    else:
+        signs = left.signs.translate(NOT_TABLE)
+    return SignDetectionMapping(slots=left.slots, signs=signs)
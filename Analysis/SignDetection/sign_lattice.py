@@ -0,0 +1,82 @@
+"""Bitmask encoding of the sign lattice, a set of signs is an int with one bit per sign.
+
+The abstract operators of abstract_sign_operators are evaluated once for every pair of sign sets,
+so the analysis only does table lookups and integer operations.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .abstract_sign_operators import abstract_arithmetic, add_sign, div_sign, mod_sign, mul_sign, not_sign, relational, sub_sign
+
+MINUS = 1
+ZERO = 2
+PLUS = 4
+UNDEF = 8
+# The signs a variable can take, the initial sign of a read variable.
+ALL_SIGNS = MINUS | ZERO | PLUS
+SIGN_BITS = {"-": MINUS, "0": ZERO, "+": PLUS, "undef": UNDEF}
+# Number of sign sets, the size of each dimension of the tables.
+SIZE = 16
+
+ARITHMETIC_FUNCTIONS = {"*": mul_sign, "/": div_sign,
+                        "%": mod_sign, "+": add_sign, "-": sub_sign}
+RELATIONAL_OPERATORS = [">", ">=", "<", "<=", "==", "!="]
+
+
+def encode(signs: Iterable[str]) -> int:
+    """Returns the bitmask of a set of signs."""
+    bits = 0
+    for sign in signs:
+        bits |= SIGN_BITS[sign]
+    return bits
+
+
+def decode(bits: int) -> Set[str]:
+    """Returns the set of signs of a bitmask."""
+    return {sign for sign, bit in SIGN_BITS.items() if bits & bit}
+
+
+def sign_bits(n: int) -> int:
+    """Returns the bitmask of the sign of an integer."""
+    if n > 0:
+        return PLUS
+    elif n < 0:
+        return MINUS
+    return ZERO
+
+
+def arithmetic_table(operator: str) -> List[int]:
+    """Result of the abstract operator for all the pairs of sign sets, at index left * SIZE + right."""
+    fct = ARITHMETIC_FUNCTIONS[operator]
+    return [
+        encode(abstract_arithmetic(decode(left), decode(right), fct))
+        for left in range(SIZE) for right in range(SIZE)
+    ]
+
+
+def relational_table(operator: str) -> List[Tuple[int, int]]:
+    """
+    Signs of the left and the right side for which the relational operator can be true,
+    for all the pairs of sign sets, at index left * SIZE + right.
+    """
+    table = []
+    for left in range(SIZE):
+        for right in range(SIZE):
+            possible_left = 0
+            possible_right = 0
+            for left_sign in decode(left):
+                for right_sign in decode(right):
+                    if "tt" in relational(operator, left_sign, right_sign):
+                        possible_left |= SIGN_BITS[left_sign]
+                        possible_right |= SIGN_BITS[right_sign]
+            table.append((possible_left, possible_right))
+    return table
+
+
+ARITHMETIC_TABLES: Dict[str, List[int]] = {
+    operator: arithmetic_table(operator) for operator in ARITHMETIC_FUNCTIONS
+}
+RELATIONAL_TABLES: Dict[str, List[Tuple[int, int]]] = {
+    operator: relational_table(operator) for operator in RELATIONAL_OPERATORS
+}
+# Translation table of the buffers of the sign analysis, only the first SIZE entries are used.
+NOT_TABLE: bytes = bytes(encode(not_sign(decode(bits))) if bits < SIZE else 0 for bits in range(256))
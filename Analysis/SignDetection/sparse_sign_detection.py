@@ -0,0 +1,298 @@
+"""Sign detection propagating the signs along the def-use chains of the slots instead of the edges of the program graph."""
+import heapq
+from typing import Callable, Dict, List, Set, Tuple, Union
+
+from Parser import CompactProgramGraph, Edge, ProgramGraph
+from Parser.struc_elements import VALID_R_OPERATORS, AExpr, BooleanOperation, Operation, VariableAccess
+
+from ..def_use import DefUseGraph
+from ..reversePostorder import compute_reverse_post_order
+from ..solvers import node_count
+from .sign_detection import (SignDetectionAnalysis, SignDetectionMapping, SignSlots, boolean_postorder, compile_sign,
+                             is_boolean_leaf, operation_postorder)
+from .sign_lattice import ALL_SIGNS, MINUS, NOT_TABLE, RELATIONAL_TABLES, SIZE
+
+# A sparse transfer function, from the signs of the slots read to the signs of the slots written.
+SparseTransfer = Callable[[Dict[int, int]], Dict[int, int]]
+IDENTITY_TABLE = bytes(range(256))
+
+
+def expression_slots(operation: Union[Operation, AExpr], slots: SignSlots) -> Set[int]:
+    """Returns the slots read by compile_sign for an operation or an arithmetic expression."""
+    return {slots.slot(node.expression[0]) for node in operation_postorder(operation)
+            if isinstance(node, AExpr) and isinstance(node.expression[0], VariableAccess)}
+
+
+def relational_refined(operation: BooleanOperation, slots: SignSlots) -> List[Tuple[int, int, bool]]:
+    """Returns the side, the slot and whether it is an array summary of the accesses refined by a relational operation."""
+    return [(side, slots.slot(expr), expr.variable_type == "array")
+            for side, expression in enumerate([operation.left, operation.right]) if isinstance(expression, AExpr)
+            for expr in expression.expression if isinstance(expr, VariableAccess)]
+
+
+def refined_slots(operation: BooleanOperation, slots: SignSlots) -> Set[int]:
+    """Returns the slots refined by the relational operations of a boolean operation."""
+    return {slot for node in boolean_postorder(operation) if node.is_relational()
+            for _, slot, _ in relational_refined(node, slots)}
+
+
+def untouched_table(operation: BooleanOperation) -> bytes:
+    """
+    Returns the translation table of the signs of the slots a boolean operation does not refine,
+    the negation complements them and the conjunctions and disjunctions combine the tables of their sides.
+    """
+    tables = []
+    for node in boolean_postorder(operation):
+        if is_boolean_leaf(node):
+            tables.append(IDENTITY_TABLE)
+        elif node.operator == "&":
+            right = tables.pop()
+            tables.append(bytes(left & right for left, right in zip(tables.pop(), right)))
+        elif node.operator == "|":
+            right = tables.pop()
+            tables.append(bytes(left | right for left, right in zip(tables.pop(), right)))
+        else:
+            tables.append(tables.pop().translate(NOT_TABLE))
+    return tables[0]
+
+
+def compile_sparse_relational(operation: BooleanOperation, slots: SignSlots) -> Tuple[Set[int], SparseTransfer]:
+    """Returns the slots read and the sparse transfer function of a relational operation, giving the slots it refines."""
+    if operation.operator not in VALID_R_OPERATORS:
+        raise Exception(
+            f"Trying to get relative sign for a non relative operation: {operation.operator}")
+    left_sign = compile_sign(operation.left, slots)
+    right_sign = compile_sign(operation.right, slots)
+    table = RELATIONAL_TABLES[operation.operator]
+    reads = expression_slots(operation.left, slots) | expression_slots(operation.right, slots)
+    refined = relational_refined(operation, slots)
+    reads |= {slot for _, slot, is_array in refined if is_array}
+
+    def refine(signs: Dict[int, int]) -> Dict[int, int]:
+        possible = table[left_sign(signs) * SIZE + right_sign(signs)]
+        refined_signs = {}
+        for side, slot, is_array in refined:
+            refined_signs[slot] = refined_signs.get(slot, signs[slot]) | possible[side] if is_array else possible[side]
+        return refined_signs
+    return reads, refine
+
+
+def compile_sparse_boolean(operation: BooleanOperation, slots: SignSlots, touched: Set[int]) -> Tuple[Set[int], SparseTransfer]:
+    """
+    Returns the slots read and the sparse transfer function of a boolean operation for the touched slots, the slots refined
+    by the whole condition, the same as compile_boolean_sign. A slot left out of the result keeps its sign.
+    The &, | and not are run as a flat list of steps on a stack of the signs of the touched slots.
+    """
+    reads = set()
+    steps: List[Tuple[str, SparseTransfer]] = []
+    for node in boolean_postorder(operation):
+        if not is_boolean_leaf(node):
+            reads |= touched
+            steps.append((node.operator, None))
+        elif node.is_relational():
+            leaf_reads, leaf = compile_sparse_relational(node, slots)
+            reads |= leaf_reads
+            steps.append(("", leaf))
+        else:  # A constant gives no information on the signs.
+            steps.append(("", lambda signs: {}))
+    if len(steps) == 1:
+        return reads, steps[0][1]
+
+    def transfer(signs: Dict[int, int]) -> Dict[int, int]:
+        results = []
+        for operator, leaf in steps:
+            if leaf is not None:
+                results.append(leaf(signs))
+            elif operator == "not":
+                right_signs = results.pop()
+                results.append({slot: NOT_TABLE[right_signs.get(slot, signs[slot])] for slot in touched})
+            else:
+                right_signs = results.pop()
+                left_signs = results.pop()
+                if operator == "&":
+                    results.append({slot: left_signs.get(slot, signs[slot]) & right_signs.get(slot, signs[slot]) for slot in touched})
+                else:
+                    results.append({slot: left_signs.get(slot, signs[slot]) | right_signs.get(slot, signs[slot]) for slot in touched})
+        return results[0]
+    return reads, transfer
+
+
+def compile_sparse_edge(edge: Edge, slots: SignSlots) -> List[Tuple[Set[int], Set[int], Union[SparseTransfer, bytes]]]:
+    """
+    Returns the parts of the transfer function of an edge, the same as SignDetectionAnalysis.compile_edge, as the slots read,
+    the slots written and the sparse transfer function or the translation table of a single slot.
+    A condition is a part for the slots it refines, and a part per other slot when it has a negation complementing them.
+    """
+    action = edge.action
+    if action.action_type == "boolean":
+        operation = action.right_expression.operation
+        touched = refined_slots(operation, slots)
+        parts = []
+        if len(touched) > 0:
+            reads, transfer = compile_sparse_boolean(operation, slots, touched)
+            parts.append((reads, touched, transfer))
+        table = untouched_table(operation)
+        if table != IDENTITY_TABLE:
+            parts.extend(({slot}, {slot}, table) for slot in range(slots.size) if slot not in touched)
+        return parts
+    if action.action_type != "assign" and action.action_type != "read":
+        return []
+    if action.action_type == "assign":
+        value = compile_sign(action.right_expression, slots)
+        reads = expression_slots(action.right_expression, slots)
+    else:
+        def value(signs: bytes) -> int:
+            return ALL_SIGNS
+        reads = set()
+    slot = slots.slot(action.variable)
+    if action.variable.variable_type != "array":
+        return [(reads, {slot}, lambda signs: {slot: value(signs)})]
+    index = compile_sign(action.variable.child_accesses, slots)
+    reads = reads | expression_slots(action.variable.child_accesses, slots) | {slot}
+    return [(reads, {slot}, lambda signs: {slot: signs[slot] | (0 if index(signs) & MINUS else value(signs))})]
+
+
+class SparseSignSolution:
+    """
+    The signs of the values of a DefUseGraph, giving the mappings of the nodes on demand.
+    The mapping of a node is built from the values defined on its path in the dominator tree.
+    """
+    graph: DefUseGraph
+    signs: bytearray
+    slots: SignSlots
+    node_count: int
+
+    def __init__(self, graph: DefUseGraph, signs: bytearray, slots: SignSlots, node_count: int) -> None:
+        self.graph = graph
+        self.signs = signs
+        self.slots = slots
+        self.node_count = node_count
+
+    def mapping(self, number: int) -> Union[SignDetectionMapping, str]:
+        """Returns the mapping of a node, walking up the dominator tree, the slots defined nowhere on the way keep their initial signs."""
+        graph = self.graph
+        if number not in graph.idom:
+            return "undef"
+        signs = self.signs[:self.slots.size]
+        found = set()
+        while True:
+            for slot, value in reversed(graph.defined.get(number, ())):
+                if slot not in found:
+                    found.add(slot)
+                    signs[slot] = self.signs[value]
+            if graph.idom[number] == number:
+                return SignDetectionMapping(slots=self.slots, signs=bytes(signs))
+            number = graph.idom[number]
+
+    def assignment(self) -> Dict[int, Union[SignDetectionMapping, str]]:
+        """Returns the mapping of every node as an assignment of worklist, in one walk of the dominator tree."""
+        graph = self.graph
+        aa = {number: "undef" for number in range(self.node_count)}
+        children = {number: [] for number in graph.idom}
+        root = None
+        for number, dominator in graph.idom.items():
+            if number == dominator:
+                root = number
+            else:
+                children[dominator].append(number)
+        walk = [(root, SignDetectionMapping(slots=self.slots, signs=bytes(self.signs[:self.slots.size])))]
+        while len(walk) > 0:
+            number, parent = walk.pop()
+            mapping = parent.copy()
+            if number in graph.defined:
+                signs = mapping.write()
+                for slot, value in graph.defined[number]:
+                    signs[slot] = self.signs[value]
+            aa[number] = mapping
+            walk.extend((child, mapping) for child in children[number])
+        return aa
+
+
+class SparseSignDetection:
+    """
+    The def-use graph of the slots of the sign detection on a program graph with the sparse transfer functions of its edges,
+    built once and solved with solve.
+    """
+    initial: SignDetectionMapping
+    graph: DefUseGraph
+    transfers: List[Union[SparseTransfer, bytes]]
+    priorities: List[int]
+    node_count: int
+
+    def __init__(self, prgmGraph: Union[ProgramGraph, CompactProgramGraph]) -> None:
+        self.initial = SignDetectionAnalysis.init_mapping(prgmGraph)
+        slots = self.initial.slots
+        edges = prgmGraph.get_edges()
+        compiled = [compile_sparse_edge(edge, slots) for edge in edges]
+        # The units are visited in the reverse post order of their nodes, following ReversePostorderSolverAlgorithm.
+        _, rP = compute_reverse_post_order(prgmGraph, last_successor_first=True)
+        self.graph = DefUseGraph(prgmGraph, edges, slots.size,
+                                 [[(reads, writes) for reads, writes, _ in parts] for parts in compiled], rP)
+        self.transfers = [transfer for parts in compiled for _, _, transfer in parts]
+        unit_count = len(self.graph.units)
+        self.priorities = [rP[number] * unit_count + unit for unit, number in enumerate(self.graph.nodes)]
+        self.node_count = node_count(prgmGraph)
+
+    def solve(self) -> Tuple[SparseSignSolution, int]:
+        """
+        Propagates the signs along the def-use chains. A unit is only visited again when a value it reads grows,
+        so an edge is not visited for the slots it does not touch and a slot is not carried through the edges that do not touch it.
+        Returns the solution and the number of units visited.
+        """
+        graph = self.graph
+        size = self.initial.slots.size
+        signs = bytearray(self.initial.signs) + bytearray(len(graph.slots) - size)
+        # A value is written once the node defining it is reached, like the "undef" mappings of worklist.
+        written = bytearray(b"\x01" * size) + bytearray(len(graph.slots) - size)
+        units = graph.units
+        users = graph.users
+        transfers = self.transfers
+        priorities = self.priorities
+        unit_count = len(units)
+        worklist = sorted(priorities)
+        members = bytearray(b"\x01" * unit_count)
+        steps = 0
+        while len(worklist) > 0:
+            unit = heapq.heappop(worklist) % unit_count
+            members[unit] = 0
+            steps += 1
+            part, inputs, outputs = units[unit]
+            if part is None:
+                sign = 0
+                reached = False
+                for _, value in inputs:
+                    if written[value]:
+                        sign |= signs[value]
+                        reached = True
+                if not reached:
+                    continue
+                results = {outputs[0][0]: sign}
+            elif type(transfers[part]) is bytes:
+                value = inputs[0][1]
+                if not written[value]:
+                    continue
+                results = {outputs[0][0]: transfers[part][signs[value]]}
+            else:
+                if not all(written[value] for _, value in inputs):
+                    continue
+                results = transfers[part]({slot: signs[value] for slot, value in inputs})
+            for slot, value in outputs:
+                sign = results[slot]
+                if not written[value] or sign & ~signs[value]:
+                    written[value] = 1
+                    signs[value] |= sign
+                    for user in users.get(value, ()):
+                        if not members[user]:
+                            members[user] = 1
+                            heapq.heappush(worklist, priorities[user])
+        return SparseSignSolution(graph, signs, self.initial.slots, self.node_count), steps
+
+
+def sparse_sign_worklist(prgmGraph: Union[ProgramGraph, CompactProgramGraph]) -> Tuple[SparseSignSolution, int]:
+    """
+    Runs the sign detection on the def-use chains of the slots, see SparseSignDetection.
+    The negation and the assignments to arrays at a negative index are not monotone, so like with the solvers
+    of worklist the signs can depend on the order of the solve, they are the ones of ReversePostorderSolverAlgorithm
+    on most programs.
+    """
+    return SparseSignDetection(prgmGraph).solve()
@@ -1,4 +1,11 @@
-from .solvers import worklist, FIFOSolverAlgorithm, LIFOSolverAlgorithm
-from .reaching_definitions import ReachingDefintionAnalysis
-from .live_variables import LiveVariableAnalysis
+from .solvers import (worklist, FIFOSolverAlgorithm, LIFOSolverAlgorithm, DequeFIFOSolverAlgorithm,
+                      DequeLIFOSolverAlgorithm, ReversePostorderSolverAlgorithm, StronglyConnectedSolverAlgorithm,
+                      LoopNestSolverAlgorithm)
+from .reaching_definitions import ReachingDefintionAnalysis, BitVectorReachingDefintionAnalysis
+from .live_variables import LiveVariableAnalysis, BitVectorLiveVariableAnalysis
 from .SignDetection import SignDetectionAnalysis
+from .product import product_worklist
+from .metrics import Metrics
+from .cache import AnalysisCache
+from .memo import TransferMemo, memoized_analysis
+from .SignDetection.sparse_sign_detection import sparse_sign_worklist
@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Callable, Dict, Hashable, Optional
 from Parser.program_graph import Edge, ProgramGraph
+from Parser.renumbering import Renumbering
 
 
 class AbstractAnalysis:
@@ -16,10 +17,10 @@ class AbstractAnalysis:
     @staticmethod
     def included(mapping1: Dict, mapping2: Dict) -> bool:
         """Checks if the mapping1 is included in the mapping 2."""
-        if mapping2 == "undef":
-            return False
         if mapping1 == "undef":
             return True
+        if mapping2 == "undef":
+            return False
 
     @staticmethod
     def init_mapping(programGraph: ProgramGraph) -> Dict:
@@ -32,6 +33,29 @@ class AbstractAnalysis:
         if mapping == "undef":
             return mapping
 
+    @classmethod
+    def compile_edge(cls, edge: Edge, mapping: Dict) -> Callable[[Dict], Dict]:
+        """
+        Returns the transfer function of the edge, the solvers call it instead of update_mapping.
+        mapping is the initial mapping, analyses override this to do the work that does not depend
+        on the mapping once before solving.
+        """
+        update_mapping = cls.update_mapping
+        return lambda mapping: update_mapping(mapping, edge)
+
+    @staticmethod
+    def renumbering(old_initial: Dict, initial: Dict, renumbering: Renumbering) -> Callable[[Dict], Dict]:
+        """
+        Returns the function converting a mapping of a program graph to the same graph after an edit renumbered it.
+        old_initial and initial are the initial mappings before and after the edit.
+        The mappings do not depend on the node numbers by default.
+        """
+        return lambda mapping: mapping
+
+    # A static method returning a cheap hashable key equal for equal mappings of a program graph, used to memoize
+    # the transfer functions. Analyses opt in to the memoization by defining it, None means they do not.
+    state_key: Optional[Callable[[Dict], Hashable]] = None
+
     @staticmethod
     def copy_mapping(mapping: Dict) -> Dict:
         """Returns a deep copy of a mapping."""
@@ -0,0 +1,134 @@
+"""Caches program graphs and solved assignments on disk, keyed by a hash of the program text.
+
+The entries are pickles written to a temporary file then renamed, so several processes can share a directory:
+a reader sees a whole entry or none. Reading an entry updates its modification time, the entries read
+the least recently are removed when the directory grows over its size bound.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Optional, Tuple
+
+import lark
+
+from Parser import CompactProgramGraph, ProgramGraph
+from Parser.parser import GRAMMAR
+
+from .abstract_analysis import AbstractAnalysis
+from .solvers import AbstractSolverAlgorithm, worklist
+
+# Changed when the format of the entries or the results of the analyses change.
+CACHE_VERSION = "1"
+GRAMMAR_VERSION = hashlib.sha256((GRAMMAR + lark.__version__).encode()).hexdigest()[:16]
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "microc-analysis")
+SUFFIX = ".pickle"
+
+
+def qualified_name(value: type) -> str:
+    return f"{value.__module__}.{value.__qualname__}"
+
+
+class AnalysisCache:
+    """
+    A directory of cached program graphs and assignments, bounded by max_bytes.
+    The graphs are stored as CompactProgramGraph, the assignments with the number of steps of the solve.
+    """
+    directory: str
+    max_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(program: str, *names: str) -> str:
+        """Returns the key of an entry for the program text, the grammar and names."""
+        content = "\0".join([CACHE_VERSION, GRAMMAR_VERSION, *names, program])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key: str) -> Optional[Any]:
+        """Returns the value of an entry, None if there is none or it cannot be read."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as entry:
+                value = pickle.load(entry)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process since it was read.
+            pass
+        self.hits += 1
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        """Writes an entry, replacing any entry with the same key, then evicts the least recently used ones."""
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as entry:
+                pickle.dump(value, entry, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the entries read the least recently until the directory fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def program_graph(self, program: str) -> ProgramGraph:
+        """Returns the program graph of the program, built and stored if it is not cached."""
+        key = self.key(program, "graph")
+        compact = self.load(key)
+        if compact is not None:
+            return compact.to_program_graph()
+        program_graph = ProgramGraph(program)
+        self.store(key, CompactProgramGraph(program_graph))
+        return program_graph
+
+    def worklist(self, program: str, analysis: AbstractAnalysis, algorithmClass: AbstractSolverAlgorithm) -> Tuple[dict, int]:
+        """Returns the assignment and the number of steps of worklist on the program, solved and stored if they are not cached."""
+        key = self.key(program, qualified_name(analysis), qualified_name(algorithmClass))
+        result = self.load(key)
+        if result is not None:
+            return result
+        result = worklist(self.program_graph(program), analysis, algorithmClass)
+        self.store(key, result)
+        return result
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,164 @@
+"""Def-use chains of the slots of the state of an analysis in SSA form, for solvers propagating along them instead of the edges."""
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from Parser import ProgramGraph, CompactProgramGraph
+
+from .loops import compute_dominators
+
+# The slots read and the slots written by a part of the transfer function of an edge.
+Accesses = Tuple[Sequence[int], Sequence[int]]
+# The part number, None for a phi, the (slot, value) read and the (slot, value) written by a unit.
+Unit = Tuple[Optional[int], List[Tuple[int, int]], List[Tuple[int, int]]]
+
+
+class DefUseGraph:
+    """
+    The values of the slots of a program graph in SSA form.
+    A value is the content of a slot at the initial node, written by an edge, or merged by a phi at a node
+    with several incoming edges. The value number i < slot_count is slot i at the initial node.
+    The transfer function of an edge is split in parts reading and writing different slots, the parts
+    writing slots and the phis are the units, each reads the values reaching it and writes new ones,
+    the phis are placed at the iterated dominance frontiers of the writes of their slot so every read
+    has a single value reaching it. Nothing is built for the slots an edge does not touch.
+    Only the nodes reachable from the initial node are covered, the others stay "undef".
+    slots: List[int] the slot of each value.
+    units: List[Unit] the units, the phis first.
+    nodes: List[int] the node of each unit, the node of a phi or the start of an edge.
+    users: Dict[int, List[int]] the units reading each value read.
+    idom: Dict[int, int] the immediate dominator of each node reachable from the initial node.
+    defined: Dict[int, List[Tuple[int, int]]] the (slot, value) defined at the reachable nodes defining some, the state of a node
+    is the value of each slot defined last on the path of the dominator tree from the initial node to it.
+    """
+    slot_count: int
+    slots: List[int]
+    units: List[Unit]
+    nodes: List[int]
+    users: Dict[int, List[int]]
+    idom: Dict[int, int]
+    defined: Dict[int, List[Tuple[int, int]]]
+
+    def __init__(self, prgmGraph: Union[ProgramGraph, CompactProgramGraph], edges: list, slot_count: int, accesses: List[List[Accesses]], rP: Dict[int, int] = None) -> None:
+        """
+        accesses gives the slots read and written by each part of each edge of edges, the parts are numbered
+        in the order of the edges then of their accesses. rP is passed to compute_dominators.
+        """
+        self.slot_count = slot_count
+        self.slots = list(range(slot_count))
+        self.units = []
+        self.nodes = []
+        self.users = {}
+        self.idom = idom = compute_dominators(prgmGraph, rP=rP)
+        root = next(number for number, dominator in idom.items() if number == dominator)
+        starts = [edge.start.number for edge in edges]
+        ends = [edge.end.number for edge in edges]
+        outgoing = {number: [] for number in idom}
+        incoming = {number: [] for number in idom}
+        for index, start in enumerate(starts):
+            if start in idom:
+                outgoing[start].append(index)
+                incoming[ends[index]].append(index)
+        # The initial state reaches the initial node like an extra incoming edge.
+        joins = {number for number, edges_in in incoming.items() if len(edges_in) + (number == root) >= 2}
+        frontiers = self.dominance_frontiers(joins, incoming, starts)
+
+        first_parts = [0]
+        for parts in accesses:
+            first_parts.append(first_parts[-1] + len(parts))
+        written: Dict[int, Set[int]] = {}
+        for edges_out in outgoing.values():
+            for index in edges_out:
+                for _, writes in accesses[index]:
+                    for slot in writes:
+                        written.setdefault(slot, set()).add(ends[index])
+        phis: Dict[int, Dict[int, int]] = {}
+        for slot, sites in written.items():
+            placed = {site for site in sites if site in joins}
+            seen = set(sites)
+            seen.add(root)
+            work = list(seen)
+            while len(work) > 0:
+                for frontier in frontiers.get(work.pop(), ()):
+                    placed.add(frontier)
+                    if frontier not in seen:
+                        seen.add(frontier)
+                        work.append(frontier)
+            for number in placed:
+                phis.setdefault(number, {})[slot] = len(self.units)
+                self.units.append((None, [], [(slot, self.new_value(slot))]))
+                self.nodes.append(number)
+        for slot, phi in phis.get(root, {}).items():
+            self.add_operand(phi, slot, slot)
+
+        self.defined = {}
+        arriving: Dict[int, List[Tuple[int, int]]] = {}
+        children = {number: [] for number in idom}
+        for number, dominator in idom.items():
+            if number != root:
+                children[dominator].append(number)
+        # Depth first on the dominator tree, the stack of a slot holds the values defined on the path to the node,
+        # a slot without one has its initial value.
+        stacks: Dict[int, List[int]] = {}
+
+        def current(slot: int) -> int:
+            stack = stacks.get(slot)
+            return stack[-1] if stack else slot
+        walk = [root]
+        while len(walk) > 0:
+            number = walk.pop()
+            if number < 0:
+                for slot, _ in self.defined[~number]:
+                    stacks[slot].pop()
+                continue
+            defined = [(slot, self.units[unit][2][0][1]) for slot, unit in phis.get(number, {}).items()]
+            defined.extend(arriving.pop(number, ()))
+            if len(defined) > 0:
+                self.defined[number] = defined
+                for slot, value in defined:
+                    stacks.setdefault(slot, []).append(value)
+                # Leaving the node, ~number is negative.
+                walk.append(~number)
+            for index in outgoing[number]:
+                outputs = []
+                for part, (reads, writes) in enumerate(accesses[index], first_parts[index]):
+                    if len(writes) == 0:
+                        continue
+                    inputs = [(slot, current(slot)) for slot in reads]
+                    part_outputs = [(slot, self.new_value(slot)) for slot in writes]
+                    unit = len(self.units)
+                    self.units.append((part, inputs, part_outputs))
+                    self.nodes.append(number)
+                    for _, value in inputs:
+                        self.users.setdefault(value, []).append(unit)
+                    outputs.extend(part_outputs)
+                end = ends[index]
+                if end in joins:
+                    values = dict(outputs)
+                    for slot, phi in phis.get(end, {}).items():
+                        self.add_operand(phi, slot, values[slot] if slot in values else current(slot))
+                elif len(outputs) > 0:
+                    arriving[end] = outputs
+            walk.extend(children[number])
+
+    def dominance_frontiers(self, joins: Set[int], incoming: Dict[int, List[int]], starts: List[int]) -> Dict[int, Set[int]]:
+        """Returns the dominance frontier of the reachable nodes that have one, with the algorithm of Cooper, Harvey and Kennedy."""
+        idom = self.idom
+        frontiers = {}
+        for number in joins:
+            for index in incoming[number]:
+                runner = starts[index]
+                while runner != idom[number]:
+                    frontiers.setdefault(runner, set()).add(number)
+                    runner = idom[runner]
+        return frontiers
+
+    def new_value(self, slot: int) -> int:
+        self.slots.append(slot)
+        return len(self.slots) - 1
+
+    def add_operand(self, phi: int, slot: int, value: int) -> None:
+        self.units[phi][1].append((slot, value))
+        self.users.setdefault(value, []).append(phi)
+
+    def __len__(self) -> int:
+        """Returns the number of def-use chains, the reads of a value by a unit."""
+        return sum(len(users) for users in self.users.values())
@@ -0,0 +1,166 @@
+from typing import Callable, Dict, Hashable, List, Tuple
+from Parser import Edge
+from Parser.renumbering import Renumbering
+
+from .abstract_analysis import AbstractAnalysis
+
+
+class GenKillTable:
+    """
+    Numbering of the facts of a gen/kill analysis, fact number i is the bit 1 << i.
+    facts: List[Hashable] the fact of each number.
+    gen: Dict[int, int] the bitset generated by each edge, keyed by the id of the edge.
+    kill: Dict[int, int] the bitset killed by each edge, keyed by the id of the edge.
+    """
+    facts: List[Hashable]
+    numbers: Dict[Hashable, int]
+    gen: Dict[int, int]
+    kill: Dict[int, int]
+
+    def __init__(self) -> None:
+        self.facts = []
+        self.numbers = {}
+        self.gen = {}
+        self.kill = {}
+
+    def bit(self, fact: Hashable) -> int:
+        """Returns the bit of a fact, numbering it if it is new."""
+        if fact not in self.numbers:
+            self.numbers[fact] = len(self.facts)
+            self.facts.append(fact)
+        return 1 << self.numbers[fact]
+
+    def __getstate__(self) -> Dict:
+        """The gen and kill bitsets are keyed by the ids of the edges, they are left out when the table is pickled."""
+        state = dict(self.__dict__)
+        state["gen"] = {}
+        state["kill"] = {}
+        return state
+
+    def to_dict(self, bits: int) -> Dict:
+        """Converts a bitset to the mapping of the equivalent analysis working with sets."""
+        return {"facts": set(self.decode(bits))}
+
+    def decode(self, bits: int) -> List[Hashable]:
+        """Returns the facts of a bitset."""
+        facts = []
+        number = 0
+        while bits:
+            if bits & 1:
+                facts.append(self.facts[number])
+            bits >>= 1
+            number += 1
+        return facts
+
+
+class BitVectorMapping:
+    """The abstract state of a gen/kill analysis, a set of facts stored as the bits of an int."""
+    __slots__ = ("bits", "table")
+    bits: int
+    table: GenKillTable
+
+    def __init__(self, bits: int, table: GenKillTable) -> None:
+        self.bits = bits
+        self.table = table
+
+    def copy(self) -> "BitVectorMapping":
+        return BitVectorMapping(self.bits, self.table)
+
+    def facts(self) -> List[Hashable]:
+        """Returns the facts in the mapping."""
+        return self.table.decode(self.bits)
+
+    def to_dict(self) -> Dict:
+        """Converts to the mapping of the equivalent analysis working with sets."""
+        return self.table.to_dict(self.bits)
+
+
+class GenKillAnalysis(AbstractAnalysis):
+    """
+    A dataflow analysis whose transfer functions are (mapping - kill) | gen.
+    Subclasses implement init_mapping by numbering the facts and filling the gen and kill bitsets of a GenKillTable.
+    """
+    @staticmethod
+    def merge(mapping1: BitVectorMapping, mapping2: BitVectorMapping) -> BitVectorMapping:
+        """Merge two mappings."""
+        merge = AbstractAnalysis.merge(mapping1, mapping2)
+        if merge is not None:
+            return merge
+        return BitVectorMapping(mapping1.bits | mapping2.bits, mapping1.table)
+
+    @staticmethod
+    def included(mapping1: BitVectorMapping, mapping2: BitVectorMapping) -> bool:
+        """Checks if the mapping1 is included in the mapping 2."""
+        undef = AbstractAnalysis.included(mapping1, mapping2)
+        if undef is not None:
+            return undef
+        return mapping1.bits & mapping2.bits == mapping1.bits
+
+    @staticmethod
+    def update_mapping(mapping: BitVectorMapping, edge: Edge) -> BitVectorMapping:
+        """Update the mapping based on the kill/gen functions of the analysis."""
+        if mapping == "undef":
+            return mapping
+        table = mapping.table
+        key = id(edge)
+        return BitVectorMapping((mapping.bits & ~table.kill.get(key, 0)) | table.gen.get(key, 0), table)
+
+    @staticmethod
+    def compile_edge(edge: Edge, mapping: BitVectorMapping) -> Callable[[BitVectorMapping], BitVectorMapping]:
+        """Returns the transfer function of the edge with its gen and kill bitsets bound."""
+        table = mapping.table
+        keep = ~table.kill.get(id(edge), 0)
+        gen = table.gen.get(id(edge), 0)
+        if keep == -1 and gen == 0:
+            # The mappings are never modified, the edge can return its input.
+            return lambda mapping: mapping
+
+        def transfer(mapping: BitVectorMapping) -> BitVectorMapping:
+            if mapping == "undef":
+                return mapping
+            return BitVectorMapping((mapping.bits & keep) | gen, table)
+        return transfer
+
+    @staticmethod
+    def renumber_fact(fact: Hashable, renumbering: Renumbering) -> Hashable:
+        """Returns the fact after an edit renumbered the program graph, the facts do not depend on the node numbers by default."""
+        return fact
+
+    @classmethod
+    def renumbering(cls, old_initial: BitVectorMapping, initial: BitVectorMapping, renumbering: Renumbering) -> Callable[[BitVectorMapping], BitVectorMapping]:
+        """
+        Moves the bit of every fact to the bit of the renumbered fact in the new table, the facts it does not have are dropped.
+        The bits are moved by runs of consecutive facts that stay consecutive.
+        """
+        table = initial.table
+        runs = []
+        for old_number, fact in enumerate(old_initial.table.facts):
+            number = table.numbers.get(cls.renumber_fact(fact, renumbering))
+            if number is None:
+                continue
+            if len(runs) > 0 and runs[-1][0] + runs[-1][1] == old_number and runs[-1][2] + runs[-1][1] == number:
+                runs[-1][1] += 1
+            else:
+                runs.append([old_number, 1, number])
+        masks = [(old_number, (1 << length) - 1, number) for old_number, length, number in runs]
+
+        def translate(mapping: BitVectorMapping) -> BitVectorMapping:
+            if mapping == "undef":
+                return mapping
+            bits = 0
+            for old_number, mask, number in masks:
+                bits |= ((mapping.bits >> old_number) & mask) << number
+            return BitVectorMapping(bits, table)
+        return translate
+
+    @staticmethod
+    def state_key(mapping: BitVectorMapping) -> Tuple[GenKillTable, int]:
+        """The bits with the table numbering the facts, the tables are compared by identity."""
+        return mapping.table, mapping.bits
+
+    @staticmethod
+    def copy_mapping(mapping: BitVectorMapping) -> BitVectorMapping:
+        """Returns a copy of a mapping."""
+        if mapping == "undef":
+            return mapping
+        return mapping.copy()
@@ -0,0 +1,163 @@
+"""Solves an analysis again after an edit of the program, reusing the states the edit cannot change."""
+from typing import Callable, Dict, List, Tuple
+
+from Parser.program_edit import IncrementalProgramGraph
+from Parser.program_graph import Edge, Node
+
+from .abstract_analysis import AbstractAnalysis
+from .solvers import AbstractSolverAlgorithm, DequeFIFOSolverAlgorithm, resume_worklist
+
+# The regions of the nodes of a graph after an edit, in the order of the analysis.
+UPSTREAM = 0
+EDITED = 1
+DOWNSTREAM = 2
+
+
+def regions(low: int, high: int, reverse: bool) -> Callable[[int], int]:
+    """Returns the region of a node number when the nodes in [low, high) are the edited ones."""
+    def region(number: int) -> int:
+        if number < low:
+            return DOWNSTREAM if reverse else UPSTREAM
+        if number >= high:
+            return UPSTREAM if reverse else DOWNSTREAM
+        return EDITED
+    return region
+
+
+def boundary_edges(boundary: List[Node]) -> List[Edge]:
+    """Returns the edges of the nodes, once each."""
+    return list({id(edge): edge for node in boundary for edge in node.incoming_edges + node.outgoing_edges}.values())
+
+
+class IncrementalAnalysis:
+    """
+    The program graph of a program and the assignment solved by an analysis, updated after each edit of the program.
+    An edit replaces top level statements, the nodes upstream of them in the order of the analysis keep their
+    states and only the new statements are solved. The nodes downstream keep their states when the flow they
+    receive from the rest of the graph is the same as before the edit, otherwise they are solved again.
+    The states kept are renumbered by the analysis, the whole graph is solved again when the declarations change.
+    """
+    program_graph: IncrementalProgramGraph
+    analysis: AbstractAnalysis
+    algorithmClass: AbstractSolverAlgorithm
+    assignment: Dict[int, Dict]
+    initial: Dict
+
+    def __init__(self, program: str, analysis: AbstractAnalysis, algorithmClass: AbstractSolverAlgorithm = DequeFIFOSolverAlgorithm) -> None:
+        self.program_graph = IncrementalProgramGraph(program)
+        self.analysis = analysis
+        self.algorithmClass = algorithmClass
+        self.solve()
+
+    def first_node(self) -> int:
+        """Returns the node the analysis starts from."""
+        if self.analysis.reverse():
+            return self.program_graph.get_last_node().number
+        return 0
+
+    def solve(self) -> int:
+        """Solves the whole graph, returns the number of steps."""
+        graph = self.program_graph
+        self.initial = self.analysis.init_mapping(graph)
+        aa = {number: "undef" for number in graph.nodes}
+        aa[self.first_node()] = self.initial
+        transfers = {id(edge): self.analysis.compile_edge(edge, self.initial)
+                     for edge in graph.get_edges()}
+        steps = resume_worklist(graph, self.analysis, self.algorithmClass, aa,
+                                graph.get_nodes(), lambda edge: transfers[id(edge)])
+        self.assignment = aa
+        return steps
+
+    def inflow(self, boundary: List[Node], region: Callable[[int], int], aa: Dict, transfer: Callable[[Edge], Callable]) -> Dict[int, Dict]:
+        """
+        Returns the join of the flows from the other regions into each downstream node, with the initial
+        mapping if the first node is downstream. The edges between the regions are edges of the boundary nodes.
+        """
+        reverse = self.analysis.reverse()
+        flows = {}
+        first = self.first_node()
+        if region(first) == DOWNSTREAM:
+            flows[first] = self.initial
+        for edge in boundary_edges(boundary):
+            source, target = (edge.end, edge.start) if reverse else (edge.start, edge.end)
+            if region(target.number) == DOWNSTREAM and region(source.number) != DOWNSTREAM:
+                flow = transfer(edge)(aa[source.number])
+                flows[target.number] = self.analysis.merge(flow, flows.get(target.number, "undef"))
+        return flows
+
+    def update(self, program: str) -> Tuple[Dict[int, Dict], int]:
+        """Updates the graph and the assignment to the edited program, returns the assignment and the number of steps."""
+        graph = self.program_graph
+        analysis = self.analysis
+        reverse = analysis.reverse()
+        edit = graph.diff(program)
+        if edit is None:
+            return self.assignment, 0
+        if [list(declared) for declared in edit.variables.values()] != [list(declared) for declared in graph.variables.values()]:
+            graph.apply(edit)
+            steps = self.solve()
+            return self.assignment, steps
+        low = graph.entry(edit.first).number
+        old_high = graph.entry(edit.old_end).number
+        old_initial = self.initial
+        old_assignment = self.assignment
+        old_inflow = self.inflow([graph.nodes[low], graph.nodes[old_high]], regions(low, old_high, reverse),
+                                 old_assignment, lambda edge: analysis.compile_edge(edge, old_initial))
+
+        renumbering = graph.apply(edit)
+        high = renumbering.high
+        region = regions(low, high, reverse)
+        boundary = [graph.nodes[low], graph.nodes[high]]
+        self.initial = analysis.init_mapping(graph)
+        translate = analysis.renumbering(old_initial, self.initial, renumbering)
+        transfers = {}
+
+        def transfer(edge: Edge) -> Callable:
+            if id(edge) not in transfers:
+                transfers[id(edge)] = analysis.compile_edge(edge, self.initial)
+            return transfers[id(edge)]
+
+        def transfer_within(area: int) -> Callable[[Edge], Callable]:
+            return lambda edge: transfer(edge) if region(edge.start.number) == area and region(edge.end.number) == area else None
+
+        aa = {}
+        downstream = {}
+        for number, mapping in old_assignment.items():
+            new_number = renumbering.node(number)
+            if new_number is None:
+                continue
+            if region(new_number) == UPSTREAM:
+                aa[new_number] = translate(mapping)
+            else:
+                downstream[new_number] = mapping
+        # The edited nodes are solved from the flow of the upstream nodes.
+        pending = []
+        for number in range(low, high):
+            aa[number] = "undef"
+        first = self.first_node()
+        if region(first) == EDITED:
+            aa[first] = self.initial
+            pending.append(graph.nodes[first])
+        for edge in boundary_edges(boundary):
+            source, target = (edge.end, edge.start) if reverse else (edge.start, edge.end)
+            if region(source.number) == UPSTREAM and region(target.number) == EDITED:
+                aa[target.number] = analysis.merge(
+                    transfer(edge)(aa[source.number]), aa[target.number])
+                pending.append(target)
+        steps = resume_worklist(graph, analysis, self.algorithmClass, aa, pending, transfer_within(EDITED))
+        # The downstream states only depend on the flow they receive.
+        flows = self.inflow(boundary, region, aa, transfer)
+        old_flows = {renumbering.node(number): translate(flow) for number, flow in old_inflow.items()}
+        if flows.keys() == old_flows.keys() and all(
+                analysis.included(flow, old_flows[number]) and analysis.included(old_flows[number], flow)
+                for number, flow in flows.items()):
+            for number, mapping in downstream.items():
+                aa[number] = translate(mapping)
+        else:
+            for number in downstream:
+                aa[number] = "undef"
+            aa.update(flows)
+            steps += resume_worklist(graph, analysis, self.algorithmClass, aa,
+                                     [graph.nodes[number] for number in flows], transfer_within(DOWNSTREAM))
+        self.assignment = {number: aa[number] for number in range(len(graph.nodes))}
+        return self.assignment, steps
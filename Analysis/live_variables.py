@@ -1,8 +1,11 @@
-from typing import Dict, List
+from typing import Callable, Dict, List
 from Analysis.abstract_analysis import AbstractAnalysis
 from Analysis.reaching_definitions import ReachingDefintionAnalysis
+from Analysis.gen_kill import BitVectorMapping, GenKillAnalysis, GenKillTable
 from Parser import Node, Edge, Action, POSSIBLE_ACTIONS
 from Parser.program_graph import ProgramGraph
+from Parser.renumbering import Renumbering
+from Parser.struc_elements import AbstractExpr, AExpr, VariableAccess
 
 
 class LiveVariableAnalysis(ReachingDefintionAnalysis):
@@ -40,6 +43,35 @@ class LiveVariableAnalysis(ReachingDefintionAnalysis):
                     edge.action.variable.name)
         return new_mapping
 
+    @staticmethod
+    def compile_edge(edge: Edge, mapping: Dict) -> Callable[[Dict], Dict]:
+        """Returns the transfer function of the edge, with the variables it reads gathered once."""
+        copy_mapping = LiveVariableAnalysis.copy_mapping
+        start = edge.start.number
+        gen = []
+        if edge.action.action_type == "assign" or edge.action.action_type == "boolean":
+            gen += edge.action.right_expression.get_variables()
+        if edge.action.action_type in ["assign", "read"] and edge.action.variable.variable_type == "array":
+            gen += edge.action.variable.child_accesses.get_variables()
+        if edge.action.action_type == "write":
+            gen.append(edge.action.variable)
+        gen = [(variable.variable_type, variable.name) for variable in gen]
+        kill = None
+        if edge.action.action_type in ["assign", "read"] and edge.action.variable.variable_type == "variable":
+            kill = edge.action.variable.name
+
+        def transfer(mapping: Dict) -> Dict:
+            if mapping == "undef":
+                return mapping
+            new_mapping = copy_mapping(mapping)
+            live = new_mapping[start]
+            for var_type, var in gen:
+                live[var_type].add(var)
+            if kill is not None:
+                live["variable"].discard(kill)
+            return new_mapping
+        return transfer
+
     @staticmethod
     def init_mapping(programGraph: ProgramGraph) -> Dict:
         """Initializes the mapping according to the analysis."""
@@ -57,6 +89,26 @@ class LiveVariableAnalysis(ReachingDefintionAnalysis):
     def reverse() -> bool:
         return True
 
+    @staticmethod
+    def renumbering(old_initial: Dict, initial: Dict, renumbering: Renumbering) -> Callable[[Dict], Dict]:
+        """Moves the live variables of every node to its new number, the nodes created by the edit have none."""
+        def translate(mapping: Dict) -> Dict:
+            if mapping == "undef":
+                return mapping
+            new_mapping = {}
+            for number in initial.keys():
+                new_mapping[number] = {
+                    "variable": set(),
+                    "array": set(),
+                    "record": set()
+                }
+            for number, variables in mapping.items():
+                new_number = renumbering.node(number)
+                if new_number is not None:
+                    new_mapping[new_number] = variables
+            return new_mapping
+        return translate
+
     @staticmethod
     def copy_mapping(mapping: Dict) -> Dict:
         """Returns a deep copy of a mapping."""
@@ -93,3 +145,68 @@ class LiveVariableAnalysis(ReachingDefintionAnalysis):
                 for variable in liveVariables:
                     new_matching[node][var_type].add(variable)
         return new_matching
+
+
+class LiveVariableTable(GenKillTable):
+    """The variables (var_type, var) of a program graph and the gen and kill of its edges."""
+
+    def to_dict(self, bits: int) -> Dict:
+        result = {
+            "variable": set(),
+            "array": set(),
+            "record": set()
+        }
+        for var_type, var in self.decode(bits):
+            result[var_type].add(var)
+        return result
+
+
+class BitVectorLiveVariableAnalysis(GenKillAnalysis):
+    """
+    Live variables where each node only stores its own live set, a bitset over the variables.
+    The equations are live(start) = (live(end) - kill) | gen for every edge,
+    the size of the abstract states is linear in the number of nodes.
+    """
+    @staticmethod
+    def init_mapping(programGraph: ProgramGraph) -> BitVectorMapping:
+        """Numbers the variables and computes the gen and kill bitsets of every edge."""
+        table = LiveVariableTable()
+        for var_type, variables in programGraph.variables.items():
+            for var in variables.keys():
+                table.bit((var_type, var))
+        for edge in programGraph.get_edges():
+            gen = 0
+            for variable in edge_used_variables(edge):
+                gen |= table.bit((variable.variable_type, variable.name))
+            if gen:
+                table.gen[id(edge)] = gen
+            if edge.action.action_type == "assign" or edge.action.action_type == "read":
+                if edge.action.variable.variable_type == "variable":
+                    table.kill[id(edge)] = table.bit(
+                        ("variable", edge.action.variable.name))
+        return BitVectorMapping(0, table)
+
+    @staticmethod
+    def reverse() -> bool:
+        return True
+
+
+def edge_used_variables(edge: Edge) -> List[VariableAccess]:
+    """Returns the variables read by the action of an edge."""
+    variables = []
+    if edge.action.action_type == "assign" or edge.action.action_type == "boolean":
+        variables += expression_variables(edge.action.right_expression)
+    if edge.action.action_type in ["assign", "read"] and edge.action.variable.variable_type == "array":
+        variables += edge.action.variable.child_accesses.get_variables()
+    if edge.action.action_type == "write":
+        variables.append(edge.action.variable)
+    return variables
+
+
+def expression_variables(expression: AbstractExpr) -> List[VariableAccess]:
+    """Returns the variables read by an expression, including the operands of a boolean expression."""
+    variables = expression.get_variables()
+    for expr in expression.expression:
+        if isinstance(expr, AExpr):
+            variables += expr.get_variables()
+    return variables
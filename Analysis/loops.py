@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional, Set, Tuple, Union
+from Parser import ProgramGraph, CompactProgramGraph
+
+from .reversePostorder import compute_reverse_post_order, successor_function
+
+# An element of a weak topological order, a node number or a loop (head, elements of the body).
+Component = Union[int, Tuple[int, list]]
+
+
+def compute_dominators(prgmGraph: Union[ProgramGraph, CompactProgramGraph], backward: bool = False, rP: Dict[int, int] = None) -> Dict[int, int]:
+    """Computes the immediate dominator of every node reachable from the initial node with the algorithm
+    of Cooper, Harvey and Kennedy. The initial node is its own immediate dominator.
+    With backward the graph is reversed and the root is the last node, giving the post dominators.
+    rP is the reverse post order with last_successor_first in the same direction, computed if it is not given.
+    """
+    if rP is None:
+        _, rP = compute_reverse_post_order(
+            prgmGraph, last_successor_first=True, backward=backward)
+    predecessors = successor_function(prgmGraph, not backward)
+    order = sorted(rP, key=lambda number: rP[number])
+    root = order[0]
+    idom = {root: root}
+
+    def intersect(finger1: int, finger2: int) -> int:
+        while finger1 != finger2:
+            while rP[finger1] > rP[finger2]:
+                finger1 = idom[finger1]
+            while rP[finger2] > rP[finger1]:
+                finger2 = idom[finger2]
+        return finger1
+
+    changed = True
+    while changed:
+        changed = False
+        for number in order[1:]:
+            new_idom = None
+            for predecessor in predecessors(number):
+                if predecessor not in idom:
+                    continue
+                new_idom = predecessor if new_idom is None else intersect(
+                    predecessor, new_idom)
+            if idom.get(number) != new_idom:
+                idom[number] = new_idom
+                changed = True
+    return idom
+
+
+def dominates(idom: Dict[int, int], dominator: int, number: int) -> bool:
+    """Checks if dominator dominates the node, by walking up the dominator tree."""
+    while number != dominator:
+        if number not in idom or idom[number] == number:
+            return False
+        number = idom[number]
+    return True
+
+
+class LoopForest:
+    """
+    The natural loops of a program graph, a loop is identified by its head.
+    body: Dict[int, Set[int]] the nodes of each loop, including the head and the nested loops.
+    parent: Dict[int, Optional[int]] the head of the loop directly containing each loop.
+    innermost: Dict[int, int] the head of the innermost loop containing each node in a loop.
+    rP: Dict[int, int] the reverse post order of the nodes reachable from the initial node.
+    """
+    body: Dict[int, Set[int]]
+    parent: Dict[int, Optional[int]]
+    innermost: Dict[int, int]
+    rP: Dict[int, int]
+
+    def __init__(self, prgmGraph: Union[ProgramGraph, CompactProgramGraph], backward: bool = False) -> None:
+        _, rP = compute_reverse_post_order(
+            prgmGraph, last_successor_first=True, backward=backward)
+        idom = compute_dominators(prgmGraph, backward, rP)
+        self.rP = rP
+        successors = successor_function(prgmGraph, backward)
+        predecessors = successor_function(prgmGraph, not backward)
+        self.body = {}
+        # An edge to a node dominating its start closes a loop, it can only go backward in reverse post order.
+        for number in idom:
+            for head in successors(number):
+                if rP[head] <= rP[number] and dominates(idom, head, number):
+                    loop = self.body.setdefault(head, {head})
+                    stack = [number]
+                    while len(stack) > 0:
+                        member = stack.pop()
+                        if member not in loop:
+                            loop.add(member)
+                            stack.extend(predecessor for predecessor in predecessors(member)
+                                         if predecessor in idom)
+        # Loops are nested, the smallest loop containing a node is the innermost one.
+        heads = sorted(self.body, key=lambda head: len(self.body[head]))
+        self.innermost = {}
+        for head in heads:
+            for member in self.body[head]:
+                self.innermost.setdefault(member, head)
+        # The first loop containing a head, other than its own, is the one directly containing it.
+        self.parent = {}
+        for head in heads:
+            for member in self.body[head]:
+                if member != head and member in self.body and member not in self.parent:
+                    self.parent[member] = head
+        for head in heads:
+            self.parent.setdefault(head, None)
+
+    def depth(self, number: int) -> int:
+        """Returns the number of loops containing the node."""
+        depth = 0
+        head = self.innermost.get(number)
+        while head is not None:
+            depth += 1
+            head = self.parent[head]
+        return depth
+
+
+def compute_weak_topological_order(prgmGraph: Union[ProgramGraph, CompactProgramGraph], backward: bool = False) -> List[Component]:
+    """
+    Orders the nodes hierarchically by loop, in reverse post order.
+    A loop is a tuple of its head and the order of the rest of its body, nested loops included.
+    Every edge going backward in the order goes to the head of a loop containing its start.
+    Nodes unreachable from the initial node come last.
+    """
+    forest = LoopForest(prgmGraph, backward)
+    rP = forest.rP
+    order = []
+    elements = {}
+    for number in sorted(rP, key=lambda number: rP[number]):
+        head = forest.innermost.get(number)
+        if head == number:
+            elements[head] = []
+            head = forest.parent[head]
+            component = (number, elements[number])
+        else:
+            component = number
+        if head is None:
+            order.append(component)
+        else:
+            elements[head].append(component)
+    if isinstance(prgmGraph, CompactProgramGraph):
+        numbers = range(prgmGraph.node_count)
+    else:
+        numbers = [node.number for node in prgmGraph.get_nodes()]
+    order.extend(number for number in numbers if number not in rP)
+    return order
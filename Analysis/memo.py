@@ -0,0 +1,69 @@
+"""Memoization of the transfer functions of an analysis, keyed by the edge and the input state."""
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+from Parser.program_graph import Edge
+
+from .abstract_analysis import AbstractAnalysis
+
+
+class TransferMemo:
+    """
+    A bounded LRU of the results of transfer functions, keyed by the edge and the state_key of the input.
+    The keys hold the edges, so an edge cannot be confused with a later one reusing its id, and the results
+    are shared by the hits: the solvers do not modify the result of a transfer.
+    """
+    size: int
+    entries: "OrderedDict[Tuple[Edge, Hashable], object]"
+    hits: int
+    misses: int
+
+    def __init__(self, size: int = 65536) -> None:
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def transfer(self, edge: Edge, transfer: Callable, state_key: Callable[[object], Hashable]) -> Callable:
+        """Returns transfer looking its results up first."""
+        entries = self.entries
+        memo = self
+
+        def memoized(mapping):
+            if mapping == "undef":
+                return mapping
+            key = (edge, state_key(mapping))
+            result = entries.get(key)
+            if result is not None:
+                entries.move_to_end(key)
+                memo.hits += 1
+                return result
+            memo.misses += 1
+            result = entries[key] = transfer(mapping)
+            if len(entries) > memo.size:
+                entries.popitem(last=False)
+            return result
+        return memoized
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "size": self.size}
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def memoized_analysis(analysis: AbstractAnalysis, memo: TransferMemo) -> AbstractAnalysis:
+    """
+    Returns a subclass of analysis whose compiled transfer functions are memoized in memo.
+    The analysis has to opt in by giving state keys, the same memo can be kept across solves of the same graph.
+    """
+    if analysis.state_key is None:
+        raise Exception(f"{analysis.__name__} does not give state keys to memoize its transfer functions.")
+    compile_edge = analysis.compile_edge
+    state_key = analysis.state_key
+
+    def memoized_compile_edge(cls, edge: Edge, mapping):
+        return memo.transfer(edge, compile_edge(edge, mapping), state_key)
+    return type(analysis.__name__, (analysis,), {"compile_edge": classmethod(memoized_compile_edge)})
@@ -0,0 +1,118 @@
+"""Optional instrumentation of the analysis pipeline, nothing is measured unless a Metrics is passed."""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Union
+
+from Parser.program_graph import Node
+
+from .abstract_analysis import AbstractAnalysis
+
+# The methods of the analyses whose calls are counted and timed.
+INSTRUMENTED = ["update_mapping", "merge", "included", "copy_mapping"]
+
+
+class Metrics:
+    """
+    Collects the measures of one or more runs.
+    phases: Dict[str, float] the wall time of each phase, parse, build, order (the order the solver computes,
+    the reverse post order fx), compile and solve.
+    calls, seconds: Dict[str, int] the number of calls and the total time of the instrumented methods of the analysis
+    and of the compiled transfer functions, the time of a call includes the calls it makes.
+    lengths: List[int] the length of the worklist before each step.
+    visits: Dict[int, int] the number of times each node was extracted from the worklist.
+    """
+    phases: Dict[str, float]
+    calls: Dict[str, int]
+    seconds: Dict[str, float]
+    lengths: List[int]
+    visits: Dict[int, int]
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.calls = {}
+        self.seconds = {}
+        self.lengths = []
+        self.visits = {}
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Adds the wall time of the block to the phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def counted(self, name: str, function: Callable) -> Callable:
+        """Returns function counting its calls and their time under name."""
+        self.calls.setdefault(name, 0)
+        self.seconds.setdefault(name, 0.0)
+        calls, seconds = self.calls, self.seconds
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[name] += time.perf_counter() - start
+                calls[name] += 1
+        return wrapper
+
+    def instrumented(self, analysis: AbstractAnalysis) -> AbstractAnalysis:
+        """
+        Returns a subclass of analysis counting the calls to its INSTRUMENTED methods, the analysis is not modified.
+        Only the calls made through the subclass are counted, the solver's and those of methods calling cls fx
+        compile_edge, not the calls an analysis makes through a class name such as ReachingDefintionAnalysis.copy_mapping.
+        """
+        methods = {name: staticmethod(self.counted(name, getattr(analysis, name))) for name in INSTRUMENTED}
+        return type(analysis.__name__, (analysis,), methods)
+
+    def visit(self, node: Union[Node, int], length: int) -> None:
+        number = node if isinstance(node, int) else node.number
+        self.visits[number] = self.visits.get(number, 0) + 1
+        self.lengths.append(length)
+
+    def to_dict(self) -> Dict:
+        return {
+            "phases": dict(self.phases),
+            "calls": {name: {"count": count, "seconds": self.seconds[name]} for name, count in self.calls.items()},
+            "worklist": {"steps": len(self.lengths), "max_length": max(self.lengths, default=0),
+                         "mean_length": sum(self.lengths) / len(self.lengths) if self.lengths else 0.0,
+                         "lengths": list(self.lengths)},
+            "visits": dict(sorted(self.visits.items())),
+        }
+
+    def report(self, top: int = 10) -> str:
+        """Returns the measures as text, with the top most visited nodes."""
+        lines = ["Phases:"]
+        lines += [f"  {phase:<10} {seconds * 1000:10.2f} ms" for phase, seconds in self.phases.items()]
+        lines.append("Calls:")
+        lines += [f"  {name:<16} {count:10} calls {self.seconds[name] * 1000:10.2f} ms"
+                  for name, count in self.calls.items()]
+        if self.lengths:
+            lines.append(f"Worklist: {len(self.lengths)} steps, length max {max(self.lengths)}, "
+                         f"mean {sum(self.lengths) / len(self.lengths):.1f}")
+        visited = sorted(self.visits.items(), key=lambda item: (-item[1], item[0]))[:top]
+        if visited:
+            lines.append("Most visited nodes:")
+            lines += [f"  q{number}: {count}" for number, count in visited]
+        return "\n".join(lines)
+
+
+class MeteredSolverAlgorithm:
+    """Wraps a solver algorithm to record the worklist length and the node of every extraction."""
+
+    def __init__(self, algorithm, metrics: Metrics) -> None:
+        self.algorithm = algorithm
+        self.metrics = metrics
+        self.insert = algorithm.insert
+        self.empty = algorithm.empty
+
+    def extract(self, worklist):
+        length = len(worklist)
+        node = self.algorithm.extract(worklist)
+        self.metrics.visit(node, length)
+        return node
@@ -0,0 +1,94 @@
+"""Solves several analyses with one worklist pass per direction."""
+from typing import Dict, List, Tuple, Union
+
+from Parser import ProgramGraph, CompactProgramGraph
+
+from .abstract_analysis import AbstractAnalysis
+from .solvers import AbstractSolverAlgorithm, node_number
+
+
+def adjacency(prgmGraph: Union[ProgramGraph, CompactProgramGraph], reverse: bool) -> Dict[int, List[Tuple]]:
+    """Returns for each node number the (edge key, source, target, target node) of the edges leaving it in the analysis order."""
+    if isinstance(prgmGraph, CompactProgramGraph):
+        if reverse:
+            offsets, edge_ids, sources, targets = prgmGraph.predecessor_offsets, prgmGraph.predecessor_edges, \
+                prgmGraph.edge_ends, prgmGraph.edge_starts
+        else:
+            offsets, edge_ids, sources, targets = prgmGraph.successor_offsets, prgmGraph.successor_edges, \
+                prgmGraph.edge_starts, prgmGraph.edge_ends
+        return {node: [(edge_id, sources[edge_id], targets[edge_id], targets[edge_id])
+                       for edge_id in edge_ids[offsets[node]:offsets[node + 1]]]
+                for node in range(prgmGraph.node_count)}
+    if reverse:
+        return {node.number: [(id(edge), edge.end.number, edge.start.number, edge.start) for edge in node.incoming_edges]
+                for node in prgmGraph.get_nodes()}
+    return {node.number: [(id(edge), edge.start.number, edge.end.number, edge.end) for edge in node.outgoing_edges]
+            for node in prgmGraph.get_nodes()}
+
+
+def product_solve(prgmGraph: Union[ProgramGraph, CompactProgramGraph], analyses: List[AbstractAnalysis], algorithmClass: AbstractSolverAlgorithm) -> Tuple[List[dict], int]:
+    """
+    Solves analyses going in the same direction as one product, the state of a node being the states of every analysis.
+    A node keeps the set of analyses whose state changed since it was last extracted, only those are propagated
+    along its edges, so each analysis does the work it would do alone while the graph is traversed once.
+    Returns the assignment of each analysis and the number of steps.
+    """
+    reverse = analyses[0].reverse()
+    algorithm: AbstractSolverAlgorithm = algorithmClass(prgmGraph, reverse)
+    edges = adjacency(prgmGraph, reverse)
+    worklist = algorithm.empty()
+    nodes = range(prgmGraph.node_count) if isinstance(prgmGraph, CompactProgramGraph) else prgmGraph.get_nodes()
+    for node in nodes:
+        algorithm.insert(node, worklist)
+    # Every analysis has to be propagated from every node once.
+    changed = dict.fromkeys(edges, (1 << len(analyses)) - 1)
+    first_node = 0
+    if reverse:
+        first_node = node_number(prgmGraph.get_last_node())
+    graph_edges = prgmGraph.get_edges()
+    if isinstance(prgmGraph, CompactProgramGraph):
+        keys = range(len(graph_edges))
+    else:
+        keys = [id(edge) for edge in graph_edges]
+    components = []
+    for index, analysis in enumerate(analyses):
+        aa = dict.fromkeys(edges, "undef")
+        aa[first_node] = analysis.init_mapping(prgmGraph)
+        transfers = dict(zip(keys, (analysis.compile_edge(edge, aa[first_node]) for edge in graph_edges)))
+        components.append((1 << index, analysis.included, analysis.merge, aa, transfers))
+    steps = 0
+    while not worklist.is_empty():
+        q0 = algorithm.extract(worklist)
+        number = node_number(q0)
+        mask = changed[number]
+        if mask == 0:
+            continue
+        changed[number] = 0
+        for bit, included, merge, aa, transfers in components:
+            if not mask & bit:
+                continue
+            for key, source, target, target_node in edges[number]:
+                s_q0 = transfers[key](aa[source])
+                if not included(mapping1=s_q0, mapping2=aa[target]):
+                    aa[target] = merge(s_q0, aa[target])
+                    changed[target] |= bit
+                    algorithm.insert(target_node, worklist)
+        steps += 1
+    return [component[3] for component in components], steps
+
+
+def product_worklist(prgmGraph: Union[ProgramGraph, CompactProgramGraph], analyses: List[AbstractAnalysis], algorithmClass: AbstractSolverAlgorithm) -> Tuple[Dict[AbstractAnalysis, dict], int]:
+    """
+    Solves the analyses with one worklist pass per direction, the analyses of a direction as one product.
+    Returns the assignment of each analysis and the total number of steps.
+    """
+    assignments = {}
+    steps = 0
+    for reverse in [False, True]:
+        group = [analysis for analysis in analyses if analysis.reverse() == reverse]
+        if len(group) == 0:
+            continue
+        group_assignments, group_steps = product_solve(prgmGraph, group, algorithmClass)
+        assignments.update(zip(group, group_assignments))
+        steps += group_steps
+    return assignments, steps
@@ -1,7 +1,9 @@
-from typing import Dict
+from typing import Callable, Dict, Hashable
 from Parser import Edge, POSSIBLE_ACTIONS, ProgramGraph
+from Parser.renumbering import Renumbering
 
 from .abstract_analysis import AbstractAnalysis
+from .gen_kill import BitVectorMapping, GenKillAnalysis, GenKillTable
 
 
 class ReachingDefintionAnalysis(AbstractAnalysis):
@@ -13,8 +15,8 @@ class ReachingDefintionAnalysis(AbstractAnalysis):
             return merge
         new_matching = ReachingDefintionAnalysis.copy_mapping(mapping1)
         for var_type, variables in mapping2.items():
-            for var in variables.keys():
-                for pair in var.values():
+            for var, pairs in variables.items():
+                for pair in pairs:
                     new_matching[var_type][var].add(pair)
         return new_matching
 
@@ -60,6 +62,49 @@ class ReachingDefintionAnalysis(AbstractAnalysis):
                 )
         return new_mapping
 
+    @staticmethod
+    def compile_edge(edge: Edge, mapping: Dict) -> Callable[[Dict], Dict]:
+        """Returns the transfer function of the edge, with the definition of the edge built once."""
+        copy_mapping = ReachingDefintionAnalysis.copy_mapping
+        if edge.action.action_type != "assign" and edge.action.action_type != "read":
+            return lambda mapping: mapping if mapping == "undef" else copy_mapping(mapping)
+        var_type = edge.action.variable.variable_type
+        var = edge.action.variable.name
+        pair = f"{edge.start.number},{edge.end.number}"
+
+        def transfer(mapping: Dict) -> Dict:
+            if mapping == "undef":
+                return mapping
+            new_mapping = copy_mapping(mapping)
+            if var_type == "variable":
+                new_mapping["variable"][var] = {pair}
+            else:
+                new_mapping[var_type][var].add(pair)
+            return new_mapping
+        return transfer
+
+    @staticmethod
+    def renumbering(old_initial: Dict, initial: Dict, renumbering: Renumbering) -> Callable[[Dict], Dict]:
+        """Renumbers the definitions of the mappings, each definition is renumbered once."""
+        pairs = {}
+
+        def translate(mapping: Dict) -> Dict:
+            if mapping == "undef":
+                return mapping
+            new_mapping = {
+                "variable": {},
+                "array": {},
+                "record": {}
+            }
+            for var_type, variables in mapping.items():
+                for var, definitions in variables.items():
+                    for pair in definitions:
+                        if pair not in pairs:
+                            pairs[pair] = renumber_pair(pair, renumbering)
+                    new_mapping[var_type][var] = {pairs[pair] for pair in definitions}
+            return new_mapping
+        return translate
+
     @staticmethod
     def copy_mapping(mapping: Dict) -> Dict:
         """Returns a deep copy of a mapping."""
@@ -72,3 +117,72 @@ class ReachingDefintionAnalysis(AbstractAnalysis):
             for var, mapping in variables.items():
                 new[var_type][var] = set([pair for pair in mapping])
         return new
+
+
+def renumber_pair(pair: str, renumbering: Renumbering) -> str:
+    """
+    Returns the definition "start,end" of an edge after an edit renumbered the program graph.
+    The initial definitions "?,0" and the definitions of the removed edges are unchanged.
+    """
+    start, end = pair.split(",")
+    if start == "?":
+        return pair
+    edge = renumbering.edge(int(start), int(end))
+    if edge is None:
+        return pair
+    return f"{edge[0]},{edge[1]}"
+
+
+class ReachingDefinitionTable(GenKillTable):
+    """The definitions (var_type, var, "start,end") of a program graph and the gen and kill of its edges."""
+
+    def to_dict(self, bits: int) -> Dict:
+        result = {
+            "variable": {},
+            "array": {},
+            "record": {}
+        }
+        for var_type, var, pair in self.facts:
+            result[var_type][var] = set()
+        for var_type, var, pair in self.decode(bits):
+            result[var_type][var].add(pair)
+        return result
+
+
+class BitVectorReachingDefintionAnalysis(GenKillAnalysis):
+    """
+    Reaching definitions computed with bitsets, each definition is a bit of a ReachingDefinitionTable.
+    The results are the same as ReachingDefintionAnalysis once converted with to_dict.
+    """
+    @staticmethod
+    def init_mapping(programGraph: ProgramGraph) -> BitVectorMapping:
+        """Numbers the definitions and computes the gen and kill bitsets of every edge."""
+        table = ReachingDefinitionTable()
+        bits = 0
+        definitions = {}
+        for var_type, variables in programGraph.variables.items():
+            for var in variables.keys():
+                bit = table.bit((var_type, var, "?,0"))
+                definitions[(var_type, var)] = bit
+                bits |= bit
+        edges = programGraph.get_edges()
+        for edge in edges:
+            if edge.action.action_type == "assign" or edge.action.action_type == "read":
+                key = (edge.action.variable.variable_type,
+                       edge.action.variable.name)
+                bit = table.bit(
+                    key + (f"{edge.start.number},{edge.end.number}",))
+                definitions[key] = definitions.get(key, 0) | bit
+                table.gen[id(edge)] = bit
+        # Only a variable is overwritten, arrays and records keep their previous definitions.
+        for edge in edges:
+            if id(edge) in table.gen and edge.action.variable.variable_type == "variable":
+                table.kill[id(edge)] = definitions[(
+                    "variable", edge.action.variable.name)]
+        return BitVectorMapping(bits, table)
+
+    @staticmethod
+    def renumber_fact(fact: Hashable, renumbering: Renumbering) -> Hashable:
+        """Renumbers the edge of a definition."""
+        var_type, var, pair = fact
+        return var_type, var, renumber_pair(pair, renumbering)
@@ -1,31 +1,65 @@
-from typing import Dict, List, Set
-from Parser import ProgramGraph, Node
+from typing import Callable, Dict, List, Set, Union
+from Parser import ProgramGraph, Node, CompactProgramGraph
 from Parser.program_graph import Edge
 
 
-def sort_rp(nodes: List[Node], rP: dict) -> List[Node]:
-    return sorted(nodes, key=lambda node: rP[node.number])
+def sort_rp(nodes: List[Union[Node, int]], rP: dict) -> List[Union[Node, int]]:
+    """Sorts nodes, or node ids of a compact program graph, by reverse post order."""
+    return sorted(nodes, key=lambda node: rP[node] if isinstance(node, int) else rP[node.number])
 
 
-def compute_reverse_post_order(prgmGraph: ProgramGraph):
+def successor_function(prgmGraph: Union[ProgramGraph, CompactProgramGraph], backward: bool = False) -> Callable[[int], List[int]]:
+    """Returns the function giving the numbers of the successors of a node number,
+    the predecessors with backward, on both graph representations.
+    """
+    if isinstance(prgmGraph, CompactProgramGraph):
+        if backward:
+            def successors(number: int) -> List[int]:
+                return [prgmGraph.edge_starts[edge_id] for edge_id in prgmGraph.incoming_edges(number)]
+        else:
+            def successors(number: int) -> List[int]:
+                return [prgmGraph.edge_ends[edge_id] for edge_id in prgmGraph.outgoing_edges(number)]
+    else:
+        if backward:
+            def successors(number: int) -> List[int]:
+                return [edge.start.number for edge in prgmGraph.nodes[number].incoming_edges]
+        else:
+            def successors(number: int) -> List[int]:
+                return [edge.end.number for edge in prgmGraph.nodes[number].outgoing_edges]
+    return successors
+
+
+def compute_reverse_post_order(prgmGraph: Union[ProgramGraph, CompactProgramGraph], last_successor_first: bool = False, backward: bool = False):
     """Computes the reverse post order and returns the set of edges that constitute the spanning
     tree and the a dict indicating the reverse post order of each node.
+    The depth first search uses an explicit stack and works on both graph representations.
+    With last_successor_first the outgoing edges of a node are explored from the last one, the exit of
+    a while loop comes after its body so the loop is ordered before the code that follows it.
+    With backward the search follows the incoming edges from the last node, for the backward analyses.
     """
+    successors = successor_function(prgmGraph, backward)
+    if last_successor_first:
+        forward_successors = successors
+
+        def successors(number: int) -> List[int]:
+            return forward_successors(number)[::-1]
     nodes = prgmGraph.get_nodes()
     rP = {}
     t = set()
-    visited = set()
-    global k
     k = len(nodes)
-
-    def dfs(node: Node):
-        global k
-        visited.add(node.number)
-        for edge in node.outgoing_edges:
-            if edge.end.number not in visited:
-                t.add(f"{edge.start.number}, {edge.end.number}")
-                dfs(node=edge.end)
-        rP[node.number] = k
-        k = k-1
-    dfs(nodes[0])
+    root = prgmGraph.get_last_node().number if backward else nodes[0].number
+    visited = {root}
+    stack = [(root, iter(successors(root)))]
+    while len(stack) > 0:
+        node, ends = stack[-1]
+        for end in ends:
+            if end not in visited:
+                visited.add(end)
+                t.add(f"{node}, {end}")
+                stack.append((end, iter(successors(end))))
+                break
+        else:
+            stack.pop()
+            rP[node] = k
+            k = k-1
     return t, rP
@@ -1,8 +1,15 @@
-from typing import List, Set, Tuple
-from Parser import ProgramGraph
-from Parser.program_graph import Node
+import heapq
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from Parser import ProgramGraph, CompactProgramGraph
+from Parser.program_graph import Edge, Node
 from .abstract_analysis import AbstractAnalysis
 from .reversePostorder import sort_rp, compute_reverse_post_order
+from .strongly_connected import compute_strongly_connected_components
+from .loops import Component, compute_weak_topological_order
+from .metrics import MeteredSolverAlgorithm, Metrics
+from .trace import Observation, WorklistObserver
 
 
 class Worklist:
@@ -16,9 +23,12 @@ class Worklist:
     def is_empty(self) -> bool:
         return len(self.currentNodes) == 0 and len(self.pendingNodes) == 0
 
+    def __len__(self) -> int:
+        return len(self.currentNodes) + len(self.pendingNodes)
+
 
 class AbstractSolverAlgorithm:
-    def __init__(self, programGraph: ProgramGraph) -> "AbstractSolverAlgorithm":
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
         pass
 
     def insert(self, node: Node, worklist: Worklist) -> None:
@@ -34,7 +44,7 @@ class AbstractSolverAlgorithm:
 class RoundRobinAlgorithm(AbstractSolverAlgorithm):
     rP: dict
 
-    def __init__(self, programGraph: ProgramGraph) -> "AbstractSolverAlgorithm":
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
         _, self.rP = compute_reverse_post_order(programGraph)
 
     def insert(self, node: Node, worklist: Worklist) -> None:
@@ -61,9 +71,255 @@ class LIFOSolverAlgorithm(AbstractSolverAlgorithm):
         worklist.currentNodes.insert(0, node)
 
 
-def worklist(prgmGraph: ProgramGraph, analysis: AbstractAnalysis, algorithmClass: AbstractSolverAlgorithm) -> Tuple[dict, int]:
-    """Runs the worklist algorithm. Returns the resulting assignment and the number of steps required to reach it."""
-    algorithm: AbstractSolverAlgorithm = algorithmClass(prgmGraph)
+def node_number(node: Union[Node, int]) -> int:
+    """Returns the number of a node, or the node id of a compact program graph."""
+    return node if isinstance(node, int) else node.number
+
+
+def node_count(programGraph: Union[ProgramGraph, CompactProgramGraph]) -> int:
+    """Returns the number of nodes, without building the node objects of a compact program graph."""
+    if isinstance(programGraph, CompactProgramGraph):
+        return programGraph.node_count
+    return len(programGraph.nodes)
+
+
+class DequeWorklist:
+    """
+    A worklist without duplicates, members has a byte per node number set while the node is in the worklist.
+    """
+    nodes: Deque[Union[Node, int]]
+    members: bytearray
+
+    def __init__(self, size: int):
+        self.nodes = deque()
+        self.members = bytearray(size)
+
+    def is_empty(self) -> bool:
+        return len(self.nodes) == 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+class DequeFIFOSolverAlgorithm(AbstractSolverAlgorithm):
+    """First in first out, a node already waiting in the worklist is not queued again."""
+    size: int
+
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
+        self.size = node_count(programGraph)
+
+    def empty(self) -> DequeWorklist:
+        return DequeWorklist(self.size)
+
+    def insert(self, node: Node, worklist: DequeWorklist) -> None:
+        number = node_number(node)
+        if not worklist.members[number]:
+            worklist.members[number] = 1
+            worklist.nodes.append(node)
+
+    def extract(self, worklist: DequeWorklist) -> Node:
+        node = worklist.nodes.popleft()
+        worklist.members[node_number(node)] = 0
+        return node
+
+
+class DequeLIFOSolverAlgorithm(DequeFIFOSolverAlgorithm):
+    """Last in first out, a node already waiting in the worklist is not pushed again."""
+
+    def extract(self, worklist: DequeWorklist) -> Node:
+        node = worklist.nodes.pop()
+        worklist.members[node_number(node)] = 0
+        return node
+
+
+class PriorityWorklist:
+    """
+    A worklist without duplicates extracted by smallest priority.
+    The heap holds the priorities of the nodes waiting, nodes gives the node of a waiting priority.
+    """
+    heap: List[int]
+    nodes: Dict[int, Union[Node, int]]
+
+    def __init__(self):
+        self.heap = []
+        self.nodes = {}
+
+    def is_empty(self) -> bool:
+        return len(self.heap) == 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class ReversePostorderSolverAlgorithm(AbstractSolverAlgorithm):
+    """
+    Always extracts the waiting node that comes first in reverse post order, with a binary heap.
+    For a backward analysis the order is the reverse post order of the reversed graph from the last node.
+    Nodes unreachable from the initial node come after all the others.
+    """
+    priorities: List[int]
+
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
+        _, rP = compute_reverse_post_order(
+            programGraph, last_successor_first=True, backward=reverse)
+        size = node_count(programGraph)
+        self.priorities = [rP.get(number, size + number)
+                           for number in range(size)]
+
+    def empty(self) -> PriorityWorklist:
+        return PriorityWorklist()
+
+    def insert(self, node: Node, worklist: PriorityWorklist) -> None:
+        priority = self.priorities[node_number(node)]
+        if priority not in worklist.nodes:
+            worklist.nodes[priority] = node
+            heapq.heappush(worklist.heap, priority)
+
+    def extract(self, worklist: PriorityWorklist) -> Node:
+        return worklist.nodes.pop(heapq.heappop(worklist.heap))
+
+
+class StronglyConnectedSolverAlgorithm(ReversePostorderSolverAlgorithm):
+    """
+    Stabilizes the strongly connected components one after the other in topological order,
+    in reverse for a backward analysis.
+    The priority of a node is the position of its component then its reverse post order in the graph,
+    a component is only extracted from once all the components before it are stable,
+    and nothing after it is visited before it is stable itself.
+    """
+
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
+        super().__init__(programGraph, reverse)
+        size = len(self.priorities)
+        components = compute_strongly_connected_components(
+            programGraph, backward=reverse)
+        for position, component in enumerate(components):
+            for number in component:
+                self.priorities[number] += position * 2 * size
+
+
+class LoopNestWorklist:
+    """
+    The nodes waiting to be visited, members has a byte per node number set while the node waits.
+    schedule is the iteration over the weak topological order that gives the next node to visit.
+    """
+    nodes: Dict[int, Union[Node, int]]
+    members: bytearray
+    count: int
+    schedule: Iterator[Union[Node, int]]
+
+    def __init__(self, size: int):
+        self.nodes = {}
+        self.members = bytearray(size)
+        self.count = 0
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class LoopNestSolverAlgorithm(AbstractSolverAlgorithm):
+    """
+    Recursive iteration strategy of Bourdoncle over the loop nesting forest.
+    The nodes are visited in the weak topological order, skipping those that do not wait,
+    a loop is iterated, innermost loops first, until its head stops changing before moving past it.
+    """
+    order: List[Component]
+    size: int
+
+    def __init__(self, programGraph: ProgramGraph, reverse: bool = False) -> "AbstractSolverAlgorithm":
+        self.size = node_count(programGraph)
+        self.order = compute_weak_topological_order(
+            programGraph, backward=reverse)
+
+    def empty(self) -> LoopNestWorklist:
+        worklist = LoopNestWorklist(self.size)
+        worklist.schedule = self.iterate(worklist)
+        return worklist
+
+    def iterate(self, worklist: LoopNestWorklist) -> Iterator[Union[Node, int]]:
+        """Yields the waiting nodes in the order of the strategy, until the worklist is empty."""
+        def stabilize(components: List[Component]) -> Iterator[Union[Node, int]]:
+            for component in components:
+                if isinstance(component, int):
+                    if worklist.members[component]:
+                        yield worklist.nodes[component]
+                else:
+                    head, body = component
+                    while worklist.members[head]:
+                        yield worklist.nodes[head]
+                        yield from stabilize(body)
+        while True:
+            yield from stabilize(self.order)
+
+    def insert(self, node: Node, worklist: LoopNestWorklist) -> None:
+        number = node_number(node)
+        if not worklist.members[number]:
+            worklist.members[number] = 1
+            worklist.nodes[number] = node
+            worklist.count += 1
+
+    def extract(self, worklist: LoopNestWorklist) -> Node:
+        node = next(worklist.schedule)
+        worklist.members[node_number(node)] = 0
+        worklist.count -= 1
+        return node
+
+
+def worklist(prgmGraph: Union[ProgramGraph, CompactProgramGraph], analysis: AbstractAnalysis,
+             algorithmClass: AbstractSolverAlgorithm, metrics: Metrics = None,
+             observer: WorklistObserver = None) -> Tuple[dict, int]:
+    """Runs the worklist algorithm. Returns the resulting assignment and the number of steps required to reach it.
+    The transfer function of every edge is compiled once by the analysis before solving.
+    With metrics the phases, the calls to the analysis and the worklist are measured into it.
+    With observer the extractions, transfers, growths of the states and insertions are sent to it.
+    """
+    observation = None
+    if observer is not None:
+        observation = Observation(observer, analysis.reverse())
+        analysis = observation.analysis(analysis)
+    if metrics is not None:
+        analysis = metrics.instrumented(analysis)
+    if isinstance(prgmGraph, CompactProgramGraph):
+        return compact_worklist(prgmGraph, analysis, algorithmClass, metrics, observation)
+    return graph_worklist(prgmGraph, analysis, algorithmClass, metrics, observation)
+
+
+def start_solver(prgmGraph: Union[ProgramGraph, CompactProgramGraph], analysis: AbstractAnalysis,
+                 algorithmClass: AbstractSolverAlgorithm, metrics: Optional[Metrics],
+                 observation: Optional[Observation]) -> AbstractSolverAlgorithm:
+    """Creates the solver algorithm, measured by metrics and observed if given."""
+    start = time.perf_counter()
+    algorithm: AbstractSolverAlgorithm = algorithmClass(
+        prgmGraph, analysis.reverse())
+    if observation is not None:
+        algorithm = observation.algorithm(algorithm)
+    if metrics is not None:
+        metrics.add_time("order", time.perf_counter() - start)
+        algorithm = MeteredSolverAlgorithm(algorithm, metrics)
+    return algorithm
+
+
+def compile_transfers(analysis: AbstractAnalysis, edges: list, mapping: dict, metrics: Optional[Metrics],
+                      observation: Optional[Observation]) -> list:
+    """Returns the transfer functions of the edges, counting their calls if metrics is given and observed if given."""
+    start = time.perf_counter()
+    transfers = [analysis.compile_edge(edge, mapping) for edge in edges]
+    if observation is not None:
+        transfers = [observation.transfer(edge, transfer) for edge, transfer in zip(edges, transfers)]
+    if metrics is not None:
+        transfers = [metrics.counted("transfer", transfer) for transfer in transfers]
+        metrics.add_time("compile", time.perf_counter() - start)
+    return transfers
+
+
+def graph_worklist(prgmGraph: ProgramGraph, analysis: AbstractAnalysis,
+                   algorithmClass: AbstractSolverAlgorithm, metrics: Metrics = None,
+                   observation: Observation = None) -> Tuple[dict, int]:
+    """Runs the worklist algorithm on a program graph, see worklist."""
+    algorithm = start_solver(prgmGraph, analysis, algorithmClass, metrics, observation)
     aa = {}
     worklist = algorithm.empty()
     for node in prgmGraph.get_nodes():
@@ -73,22 +329,105 @@ def worklist(prgmGraph: ProgramGraph, analysis: AbstractAnalysis, algorithmClass
     if analysis.reverse():
         first_node = prgmGraph.get_last_node().number
     aa[first_node] = analysis.init_mapping(prgmGraph)
+    edges = prgmGraph.get_edges()
+    transfers = dict(zip(map(id, edges), compile_transfers(analysis, edges, aa[first_node], metrics, observation)))
+    start = time.perf_counter()
     steps = 0
     while not worklist.is_empty():
         q0 = algorithm.extract(worklist)
         if analysis.reverse():
             for edge in q0.incoming_edges:
-                s_q0 = analysis.update_mapping(aa[edge.end.number], edge)
+                s_q0 = transfers[id(edge)](aa[edge.end.number])
                 if not analysis.included(mapping1=s_q0, mapping2=aa[edge.start.number]):
                     aa[edge.start.number] = analysis.merge(
                         s_q0, aa[edge.start.number])
                     algorithm.insert(edge.start, worklist)
         else:
             for edge in q0.outgoing_edges:
-                s_q0 = analysis.update_mapping(aa[edge.start.number], edge)
+                s_q0 = transfers[id(edge)](aa[edge.start.number])
                 if not analysis.included(mapping1=s_q0, mapping2=aa[edge.end.number]):
                     aa[edge.end.number] = analysis.merge(
                         s_q0, aa[edge.end.number])
                     algorithm.insert(edge.end, worklist)
         steps += 1
+    if metrics is not None:
+        metrics.add_time("solve", time.perf_counter() - start)
     return aa, steps
+
+
+def compact_worklist(prgmGraph: CompactProgramGraph, analysis: AbstractAnalysis,
+                     algorithmClass: AbstractSolverAlgorithm, metrics: Metrics = None,
+                     observation: Observation = None) -> Tuple[dict, int]:
+    """Runs the worklist algorithm on a compact program graph, the algorithm works on node ids.
+    Returns the same assignment and number of steps as on the equivalent program graph.
+    """
+    algorithm = start_solver(prgmGraph, analysis, algorithmClass, metrics, observation)
+    aa = ["undef"] * prgmGraph.node_count
+    worklist = algorithm.empty()
+    for node in range(prgmGraph.node_count):
+        algorithm.insert(node, worklist)
+    first_node = 0
+    if analysis.reverse():
+        first_node = prgmGraph.last_node
+    aa[first_node] = analysis.init_mapping(prgmGraph)
+    transfers = compile_transfers(analysis, prgmGraph.get_edges(), aa[first_node], metrics, observation)
+    if analysis.reverse():
+        offsets, edge_ids, sources, targets = prgmGraph.predecessor_offsets, prgmGraph.predecessor_edges, \
+            prgmGraph.edge_ends, prgmGraph.edge_starts
+    else:
+        offsets, edge_ids, sources, targets = prgmGraph.successor_offsets, prgmGraph.successor_edges, \
+            prgmGraph.edge_starts, prgmGraph.edge_ends
+    start = time.perf_counter()
+    steps = 0
+    while not worklist.is_empty():
+        q0 = algorithm.extract(worklist)
+        for index in range(offsets[q0], offsets[q0+1]):
+            edge_id = edge_ids[index]
+            target = targets[edge_id]
+            s_q0 = transfers[edge_id](aa[sources[edge_id]])
+            if not analysis.included(mapping1=s_q0, mapping2=aa[target]):
+                aa[target] = analysis.merge(s_q0, aa[target])
+                algorithm.insert(target, worklist)
+        steps += 1
+    if metrics is not None:
+        metrics.add_time("solve", time.perf_counter() - start)
+    return dict(enumerate(aa)), steps
+
+
+def resume_worklist(prgmGraph: ProgramGraph, analysis: AbstractAnalysis,
+                    algorithmClass: AbstractSolverAlgorithm, aa: dict, pending: Iterable[Node],
+                    transfer: Callable[[Edge], Optional[Callable]]) -> int:
+    """Runs the worklist algorithm from the assignment aa, updated in place, with only the pending nodes in the worklist.
+    transfer returns the transfer function of an edge, or None for the edges that are not followed.
+    Returns the number of steps.
+    """
+    algorithm: AbstractSolverAlgorithm = algorithmClass(
+        prgmGraph, analysis.reverse())
+    worklist = algorithm.empty()
+    for node in pending:
+        algorithm.insert(node, worklist)
+    steps = 0
+    while not worklist.is_empty():
+        q0 = algorithm.extract(worklist)
+        if analysis.reverse():
+            for edge in q0.incoming_edges:
+                edge_transfer = transfer(edge)
+                if edge_transfer is None:
+                    continue
+                s_q0 = edge_transfer(aa[edge.end.number])
+                if not analysis.included(mapping1=s_q0, mapping2=aa[edge.start.number]):
+                    aa[edge.start.number] = analysis.merge(
+                        s_q0, aa[edge.start.number])
+                    algorithm.insert(edge.start, worklist)
+        else:
+            for edge in q0.outgoing_edges:
+                edge_transfer = transfer(edge)
+                if edge_transfer is None:
+                    continue
+                s_q0 = edge_transfer(aa[edge.start.number])
+                if not analysis.included(mapping1=s_q0, mapping2=aa[edge.end.number]):
+                    aa[edge.end.number] = analysis.merge(
+                        s_q0, aa[edge.end.number])
+                    algorithm.insert(edge.end, worklist)
+        steps += 1
+    return steps
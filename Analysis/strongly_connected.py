@@ -0,0 +1,60 @@
+from typing import List, Union
+from Parser import ProgramGraph, CompactProgramGraph
+
+from .reversePostorder import successor_function
+
+
+def compute_strongly_connected_components(prgmGraph: Union[ProgramGraph, CompactProgramGraph], backward: bool = False) -> List[List[int]]:
+    """Computes the strongly connected components of the graph with Tarjan's algorithm, using explicit stacks.
+    Returns the node numbers of each component. The components reachable from the initial node, or from the last
+    node with backward where the edges are followed in reverse, come first in topological order starting with its
+    component, then the unreachable components in topological order among themselves.
+    """
+    successors = successor_function(prgmGraph, backward)
+    if isinstance(prgmGraph, CompactProgramGraph):
+        numbers = list(range(prgmGraph.node_count))
+    else:
+        numbers = [node.number for node in prgmGraph.get_nodes()]
+    root = prgmGraph.get_last_node().number if backward else numbers[0]
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    reachable = 0
+    for start in [root] + numbers:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(successors(start)))]
+        while len(work) > 0:
+            node, ends = work[-1]
+            for end in ends:
+                if end not in index:
+                    index[end] = low[end] = len(index)
+                    stack.append(end)
+                    on_stack.add(end)
+                    work.append((end, iter(successors(end))))
+                    break
+                elif end in on_stack:
+                    low[node] = min(low[node], index[end])
+            else:
+                work.pop()
+                if len(work) > 0:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        if start == root:
+            reachable = len(components)
+    # Tarjan's algorithm finds a component after all the components reachable from it.
+    return components[reachable - 1::-1] + components[:reachable - 1:-1]
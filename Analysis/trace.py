@@ -0,0 +1,205 @@
+"""Events of a worklist run for an observer, a JSON lines trace of them and its replay."""
+import json
+from typing import Callable, Dict, IO, Iterable, List, Tuple, Union
+
+from Parser.program_graph import Edge, Node
+
+from .abstract_analysis import AbstractAnalysis
+
+VARIABLE_TYPES = ["variable", "array", "record"]
+
+
+class WorklistObserver:
+    """
+    Receives the events of a worklist run, the nodes are given by their numbers.
+    The source and the target of an edge are in the order of the analysis, reversed for a backward analysis.
+    """
+
+    def extracted(self, node: int, length: int) -> None:
+        """node is extracted from the worklist that held length nodes."""
+
+    def transferred(self, source: int, target: int) -> None:
+        """The transfer function of the edge is applied to the state of source."""
+
+    def grown(self, source: int, target: int, old, new) -> None:
+        """The state of target grows from old to new with the result of the transfer along the edge."""
+
+    def queued(self, node: int) -> None:
+        """node is inserted in the worklist, it may already be waiting."""
+
+
+class Observation:
+    """
+    Wraps the analysis, the solver algorithm and the transfer functions of a run to send their events to observer.
+    edge is the (source, target) of the last transfer, the one whose result is merged.
+    """
+    observer: WorklistObserver
+    reverse: bool
+    edge: Tuple[int, int]
+
+    def __init__(self, observer: WorklistObserver, reverse: bool) -> None:
+        self.observer = observer
+        self.reverse = reverse
+        self.edge = None
+
+    def analysis(self, analysis: AbstractAnalysis) -> AbstractAnalysis:
+        """Returns a subclass of analysis reporting the merges the solver makes."""
+        merge = analysis.merge
+        observation = self
+
+        def observed_merge(mapping1, mapping2):
+            mapping = merge(mapping1, mapping2)
+            observation.observer.grown(*observation.edge, mapping2, mapping)
+            return mapping
+        return type(analysis.__name__, (analysis,), {"merge": staticmethod(observed_merge)})
+
+    def transfer(self, edge: Edge, transfer: Callable) -> Callable:
+        source, target = (edge.end.number, edge.start.number) if self.reverse else (edge.start.number, edge.end.number)
+        observation = self
+
+        def observed_transfer(mapping):
+            observation.edge = (source, target)
+            observation.observer.transferred(source, target)
+            return transfer(mapping)
+        return observed_transfer
+
+    def algorithm(self, algorithm) -> "ObservedSolverAlgorithm":
+        return ObservedSolverAlgorithm(algorithm, self.observer)
+
+
+class ObservedSolverAlgorithm:
+    """Wraps a solver algorithm to report the insertions and the extractions."""
+
+    def __init__(self, algorithm, observer: WorklistObserver) -> None:
+        self.algorithm = algorithm
+        self.observer = observer
+        self.empty = algorithm.empty
+
+    def insert(self, node: Union[Node, int], worklist) -> None:
+        self.observer.queued(node if isinstance(node, int) else node.number)
+        self.algorithm.insert(node, worklist)
+
+    def extract(self, worklist) -> Union[Node, int]:
+        length = len(worklist)
+        node = self.algorithm.extract(worklist)
+        self.observer.extracted(node if isinstance(node, int) else node.number, length)
+        return node
+
+
+def changed_variables(old, new) -> List[str]:
+    """Returns the names of the variables whose state differs between two mappings of an analysis."""
+    changed = set()
+
+    def as_dict(mapping):
+        if mapping == "undef" or mapping is None:
+            return {}
+        return mapping.to_dict() if hasattr(mapping, "to_dict") else mapping
+
+    def compare(old, new, name):
+        if isinstance(new, dict):
+            for key, value in new.items():
+                compare(old.get(key) if isinstance(old, dict) else None, value,
+                        name if key in VARIABLE_TYPES or isinstance(key, int) else key)
+        elif name is None and isinstance(new, (set, frozenset)):
+            # A set of variable names, as in the live variables.
+            changed.update(set(new) ^ set(old or ()))
+        elif old != new:
+            changed.add(name)
+    compare(as_dict(old), as_dict(new), None)
+    return sorted(changed)
+
+
+class TraceWriter(WorklistObserver):
+    """
+    Writes the events as JSON lines to output, after a first line holding header.
+    An event is a list starting with its kind and the number of steps done:
+    ["x", step, node, length], ["t", step, source, target], ["g", step, source, target, [variables]], ["q", step, node].
+    """
+    output: IO
+    step: int
+
+    def __init__(self, output: IO, header: Dict) -> None:
+        self.output = output
+        self.step = 0
+        output.write(json.dumps(header) + "\n")
+
+    def write(self, event: list) -> None:
+        self.output.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def extracted(self, node: int, length: int) -> None:
+        self.step += 1
+        self.write(["x", self.step, node, length])
+
+    def transferred(self, source: int, target: int) -> None:
+        self.write(["t", self.step, source, target])
+
+    def grown(self, source: int, target: int, old, new) -> None:
+        self.write(["g", self.step, source, target, changed_variables(old, new)])
+
+    def queued(self, node: int) -> None:
+        self.write(["q", self.step, node])
+
+
+def read_trace(lines: Iterable[str]) -> Tuple[Dict, List[list]]:
+    """Returns the header and the events of a trace."""
+    lines = iter(lines)
+    header = json.loads(next(lines))
+    return header, [json.loads(line) for line in lines if line.strip()]
+
+
+def replay(events: List[list], buckets: int = 10, top: int = 10) -> Dict:
+    """
+    Rebuilds the convergence of a run from its events: the timeline splits the steps in buckets with the growths,
+    the nodes grown and the mean worklist length of each, and the nodes, edges and variables are ranked by the
+    number of growths they caused, each growth queuing its target to be propagated again.
+    """
+    steps = sum(1 for event in events if event[0] == "x")
+    size = max(1, -(-steps // buckets))
+    timeline = [{"steps": [start + 1, min(start + size, steps)], "growths": 0, "nodes": set(), "lengths": []}
+                for start in range(0, steps, size)]
+    node_growths, edge_growths, edge_transfers, variable_growths, visits = {}, {}, {}, {}, {}
+    for event in events:
+        kind, step = event[0], event[1]
+        bucket = timeline[max(0, step - 1) // size] if timeline else None
+        if kind == "x":
+            visits[event[2]] = visits.get(event[2], 0) + 1
+            bucket["lengths"].append(event[3])
+        elif kind == "t":
+            edge = f"{event[2]}->{event[3]}"
+            edge_transfers[edge] = edge_transfers.get(edge, 0) + 1
+        elif kind == "g":
+            edge = f"{event[2]}->{event[3]}"
+            node_growths[event[3]] = node_growths.get(event[3], 0) + 1
+            edge_growths[edge] = edge_growths.get(edge, 0) + 1
+            for variable in event[4]:
+                variable_growths[variable] = variable_growths.get(variable, 0) + 1
+            if bucket is not None:
+                bucket["growths"] += 1
+                bucket["nodes"].add(event[3])
+
+    def ranking(counts: Dict) -> List[list]:
+        return [[key, count] for key, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:top]]
+    return {
+        "steps": steps,
+        "timeline": [{"steps": bucket["steps"], "growths": bucket["growths"], "nodes": len(bucket["nodes"]),
+                      "mean_length": sum(bucket["lengths"]) / len(bucket["lengths"]) if bucket["lengths"] else 0.0}
+                     for bucket in timeline],
+        "nodes": [[node, count, visits.get(node, 0)] for node, count in ranking(node_growths)],
+        "edges": [[edge, count, edge_transfers[edge]] for edge, count in ranking(edge_growths)],
+        "variables": ranking(variable_growths),
+    }
+
+
+def replay_report(summary: Dict) -> str:
+    """Returns the summary of replay as text."""
+    lines = [f"{summary['steps']} steps", "Timeline:"]
+    lines += [f"  steps {bucket['steps'][0]:>6}-{bucket['steps'][1]:<6} {bucket['growths']:6} growths "
+              f"{bucket['nodes']:5} nodes grown, worklist {bucket['mean_length']:.1f}"
+              for bucket in summary["timeline"]]
+    lines.append("Nodes grown the most (growths, visits):")
+    lines += [f"  q{node}: {count}, {visits}" for node, count, visits in summary["nodes"]]
+    lines.append("Edges growing their target the most (growths, transfers):")
+    lines += [f"  {edge}: {count}, {transfers}" for edge, count, transfers in summary["edges"]]
+    lines.append("Variables changed the most:")
+    lines += [f"  {variable}: {count}" for variable, count in summary["variables"]]
+    return "\n".join(lines)
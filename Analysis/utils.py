@@ -1,5 +1,6 @@
 
 from Analysis.SignDetection.sign_detection import SignDetectionMapping
+from Analysis.gen_kill import BitVectorMapping
 
 
 def display_assignment(aa: dict):
@@ -8,6 +9,23 @@ def display_assignment(aa: dict):
         if isinstance(abs_mapping, SignDetectionMapping):
             print(abs_mapping)
         else:
+            if isinstance(abs_mapping, BitVectorMapping):
+                abs_mapping = abs_mapping.to_dict()
             for var_type, mapping in abs_mapping.items():
                 print(var_type)
                 print(mapping)
+
+
+def jsonable_assignment(aa: dict) -> dict:
+    """Converts an assignment to lists and dicts that can be written as JSON, the sets are sorted."""
+    def convert(value):
+        if isinstance(value, (SignDetectionMapping, BitVectorMapping)):
+            value = value.to_dict()
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+        return value
+    return {node_number: convert(abs_mapping) for node_number, abs_mapping in sorted(aa.items(), key=lambda item: item[0])}
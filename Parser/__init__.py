@@ -1 +1,2 @@
 from .program_graph import Node, Edge, Action, POSSIBLE_ACTIONS, ProgramGraph
+from .compact_graph import CompactProgramGraph
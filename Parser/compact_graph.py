@@ -0,0 +1,154 @@
+"""Array backed representation of a program graph."""
+from array import array
+from typing import Dict, List
+
+from .program_graph import Action, Edge, Node, ProgramGraph
+from .struc_elements import VariableDeclaration
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class CompactNode:
+    """
+    A node of a CompactProgramGraph, only carries what the analyses read from a node.
+    """
+    __slots__ = ("number", "last")
+    number: int
+    last: bool
+
+    def __init__(self, number: int, last: bool = False) -> None:
+        self.number = number
+        self.last = last
+
+
+class CompactEdge:
+    """
+    A read only view of an edge of a CompactProgramGraph that the analyses can use as an Edge.
+    """
+    __slots__ = ("start", "end", "action")
+    start: CompactNode
+    end: CompactNode
+    action: Action
+
+    def __init__(self, start: CompactNode, end: CompactNode, action: Action) -> None:
+        self.start = start
+        self.end = end
+        self.action = action
+
+
+class CompactProgramGraph:
+    """
+    A program graph stored in compressed sparse rows.
+    Nodes are the integers 0 to node_count - 1, node 0 is the initial node.
+    The outgoing edges of node n are the edge ids successor_edges[successor_offsets[n]:successor_offsets[n+1]],
+    in the same order as the outgoing edges of the object graph, likewise for the predecessors.
+    edge_starts, edge_ends and actions give the start node, the end node and the action of an edge id.
+    """
+    node_count: int
+    last_node: int
+    successor_offsets: array
+    successor_edges: array
+    predecessor_offsets: array
+    predecessor_edges: array
+    edge_starts: array
+    edge_ends: array
+    actions: List[Action]
+    variables: Dict[str, Dict[str, VariableDeclaration]]
+
+    def __init__(self, programGraph: ProgramGraph) -> None:
+        nodes = programGraph.get_nodes()
+        self.node_count = len(nodes)
+        self.last_node = programGraph.get_last_node().number
+        self.variables = programGraph.variables
+        edge_ids = {}
+        self.edge_starts = array("q")
+        self.edge_ends = array("q")
+        self.actions = []
+        for edge in programGraph.edges:
+            edge_ids[id(edge)] = len(self.actions)
+            self.edge_starts.append(edge.start.number)
+            self.edge_ends.append(edge.end.number)
+            self.actions.append(edge.action)
+        self.successor_offsets = array("q", [0] * (self.node_count + 1))
+        self.successor_edges = array("q")
+        self.predecessor_offsets = array("q", [0] * (self.node_count + 1))
+        self.predecessor_edges = array("q")
+        for node in sorted(nodes, key=lambda node: node.number):
+            for edge in node.outgoing_edges:
+                self.successor_edges.append(edge_ids[id(edge)])
+            for edge in node.incoming_edges:
+                self.predecessor_edges.append(edge_ids[id(edge)])
+            self.successor_offsets[node.number+1] = len(self.successor_edges)
+            self.predecessor_offsets[node.number +
+                                     1] = len(self.predecessor_edges)
+        self.__nodes = None
+        self.__edges = None
+
+    @property
+    def nodes(self) -> Dict[int, CompactNode]:
+        """The nodes as objects, for the analyses that read the nodes of the graph."""
+        if self.__nodes is None:
+            self.__nodes = {
+                number: CompactNode(number, number == self.last_node)
+                for number in range(self.node_count)
+            }
+        return self.__nodes
+
+    def get_nodes(self) -> List[CompactNode]:
+        """Returns the nodes as a list."""
+        return list(self.nodes.values())
+
+    def get_last_node(self) -> CompactNode:
+        """Returns the last node of the program graph."""
+        return self.nodes[self.last_node]
+
+    def edge(self, edge_id: int) -> CompactEdge:
+        """Returns the edge view of an edge id, to give to the analyses."""
+        if self.__edges is None:
+            nodes = self.nodes
+            self.__edges = [
+                CompactEdge(nodes[start], nodes[end], action)
+                for start, end, action in zip(self.edge_starts, self.edge_ends, self.actions)
+            ]
+        return self.__edges[edge_id]
+
+    def get_edges(self) -> List[CompactEdge]:
+        """Returns the edge views of all the edges, in edge id order."""
+        return [self.edge(edge_id) for edge_id in range(len(self.actions))]
+
+    def outgoing_edges(self, node: int) -> array:
+        """Returns the ids of the outgoing edges of the node."""
+        return self.successor_edges[self.successor_offsets[node]:self.successor_offsets[node+1]]
+
+    def incoming_edges(self, node: int) -> array:
+        """Returns the ids of the incoming edges of the node."""
+        return self.predecessor_edges[self.predecessor_offsets[node]:self.predecessor_offsets[node+1]]
+
+    def as_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """Returns the arrays as numpy arrays sharing their memory, requires numpy."""
+        if numpy is None:
+            raise Exception("numpy is not installed.")
+        return {
+            name: numpy.frombuffer(getattr(self, name), dtype=numpy.int64)
+            for name in ["successor_offsets", "successor_edges", "predecessor_offsets",
+                         "predecessor_edges", "edge_starts", "edge_ends"]
+        }
+
+    def to_program_graph(self) -> ProgramGraph:
+        """Converts back to a program graph made of Node and Edge objects."""
+        nodes = {number: Node(number, number == self.last_node)
+                 for number in range(self.node_count)}
+        edges = [
+            Edge(nodes[start], nodes[end], action)
+            for start, end, action in zip(self.edge_starts, self.edge_ends, self.actions)
+        ]
+        # Restores the order of the edges of each node.
+        for number, node in nodes.items():
+            node.outgoing_edges = [edges[edge_id]
+                                   for edge_id in self.outgoing_edges(number)]
+            node.incoming_edges = [edges[edge_id]
+                                   for edge_id in self.incoming_edges(number)]
+        return ProgramGraph.from_graph(nodes, edges, self.variables)
@@ -1,9 +1,17 @@
-"""Takes an array of token and creates the abstract syntax tree resulting."""
+"""Takes an array of token and creates the abstract syntax tree resulting.
+
+The grammar is LALR(1): every statement is its own `statement` node, blocks are
+sequences of statements and expressions are flat lists of operands and operators.
+The compiled parser is cached on disk by lark so importing the module only has to
+unpickle the parse tables.
+"""
+import re
+from typing import List
+
 from lark import Lark
 
-grammar = Lark(r"""
+GRAMMAR = r"""
     %import common.SIGNED_NUMBER -> NUMBER
-    %import common.ESCAPED_STRING -> STRING
     %import common.CNAME -> CNAME
     %import common.WS
     %ignore WS
@@ -12,47 +20,43 @@ grammar = Lark(r"""
     declaration: var_declare
                 | arr_declare
                 | rec_declare
-    var_declare: "int" variable";"
-    arr_declare: "int["NUMBER"] " variable";"
-    rec_declare: "{int fst; int snd} " variable";"
-    statement: (assignment
+    var_declare: "int" variable ";"
+    arr_declare: "int" "[" NUMBER "]" variable ";"
+    rec_declare: "{" "int" "fst" ";" "int" "snd" "}" variable ";"
+    statement: assignment
             | if
             | else
             | while
             | read
-            | write)*
-    if: "if ("b_expr") {" statement "}"
-    else: "if ("b_expr") {" statement "} else {"statement"}"
-    while: "while ("b_expr") {" statement "}"
-    read: "read " access";"
-    write: "write " access";"
+            | write
+    block: statement*
+    if: "if" "(" b_expr ")" "{" block "}"
+    else: "if" "(" b_expr ")" "{" block "}" "else" "{" block "}"
+    while: "while" "(" b_expr ")" "{" block "}"
+    read: "read" access ";"
+    write: "write" access ";"
     access: array_access
           | record_access
           | variable
-    array_access: variable "["(access | NUMBER | a_expr)"]"
+    array_access: variable "[" a_expr "]"
     record_access: record_fst_access
                  | record_snd_access
     record_fst_access: variable ".fst"
     record_snd_access: variable ".snd"
-    assignment: access ":="a_expr";"
+    assignment: access ":=" a_expr ";"
     variable: CNAME
-    ?value: NUMBER
-    | access
-    | array
-    | record
-
-    array: "[" [value ("," value)*] "]"
-    record: "(" value "," value ")"
 
-    b_expr: "true" -> true
-          | "false" -> false
-          | a_expr opr a_expr
-          | b_expr opb b_expr
-          | not
-    not: "not" b_expr
-    a_expr: a_expr opa a_expr
-        | access
-        | NUMBER
+    b_expr: _b_atom (opb _b_atom)*
+    _b_atom: TRUE
+           | FALSE
+           | a_expr opr a_expr
+           | not
+    not: "not" _b_atom
+    TRUE: "true"
+    FALSE: "false"
+    a_expr: _a_atom (opa _a_atom)*
+    _a_atom: access
+           | NUMBER
     opa: add
             | sub
             | mul
@@ -79,4 +83,77 @@ grammar = Lark(r"""
     supe: ">="
     eq: "=="
     neq: "!="
-""", start="program")
+"""
+
+grammar = Lark(GRAMMAR, start="program", parser="lalr", cache=True)
+
+# The tokens that delimit the top level statements, and the keyword continuing an if.
+_DELIMITERS = re.compile(r"[{};]|\belse\b")
+_SPACES = re.compile(r"\s*")
+
+
+class StatementSplitter:
+    """
+    Splits a program fed piece by piece into the text of its top level statements and declarations, without parsing it.
+    A statement ends with a ";" or a "}" outside of any braces, except a "}" followed by else
+    and the "}" of a record declaration, which ends with a ";".
+    buffer holds the text of the statement being read, scan is the position in buffer to look for delimiters from.
+    """
+    buffer: str
+    scan: int
+    depth: int
+    record: bool
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.scan = 0
+        self.depth = 0
+        self.record = False
+
+    def feed(self, text: str, final: bool = False) -> List[str]:
+        """
+        Returns the statements completed by text, the rest of the text stays in buffer.
+        With final there is no more text, a "}" at the end of the buffer ends a statement.
+        """
+        buffer = self.buffer + text
+        statements = []
+        start = 0
+        resume, self.scan = self.scan, len(buffer)
+        for match in _DELIMITERS.finditer(buffer, resume):
+            token = match.group()
+            if token == "{":
+                if self.depth == 0:
+                    self.record = buffer[start:match.start()].strip() == ""
+                self.depth += 1
+            elif token == "}":
+                if self.depth == 1 and not self.record:
+                    following = _SPACES.match(buffer, match.end()).end()
+                    # An else followed by a word boundary is needed to tell it from a name.
+                    if not final and len(buffer) < following + 5:
+                        self.scan = match.start()
+                        break
+                    if _DELIMITERS.match(buffer, following) is None or not buffer.startswith("else", following):
+                        statements.append(buffer[start:match.end()])
+                        start = match.end()
+                self.depth -= 1
+            elif token == ";" and self.depth == 0:
+                statements.append(buffer[start:match.end()])
+                start = match.end()
+                self.record = False
+        self.buffer = buffer[start:]
+        self.scan -= start
+        return statements
+
+
+def split_statements(program: str) -> List[str]:
+    """
+    Splits a program into the text of its top level statements and declarations, see StatementSplitter.
+    Joining the statements gives back the program.
+    """
+    splitter = StatementSplitter()
+    statements = splitter.feed(program, final=True)
+    if splitter.buffer.strip() or len(statements) == 0:
+        statements.append(splitter.buffer)
+    else:
+        statements[-1] += splitter.buffer
+    return statements
@@ -0,0 +1,189 @@
+"""Updates the program graph of a program after an edit of its text, by top level statements.
+
+The nodes of a top level statement are numbered after the node it starts from and its last node
+is the node the next statement starts from, so the statements before an edit keep their nodes and
+the statements after it are only renumbered.
+"""
+from typing import Dict, List, Optional, Set
+
+from lark import Tree
+
+from .parser import grammar, split_statements
+from .program_graph import Edge, Node, ProgramGraph, ProgramGraphBuilder, VariableDeclaration, check_declarations, merge_nodes
+from .renumbering import Renumbering
+from .struc_elements import ExpressionTable
+
+
+def statement_texts(program: str) -> List[str]:
+    """Returns the text of each top level statement of the program without the spaces around it."""
+    return [text.strip() for text in split_statements(program) if not text.isspace() and text != ""]
+
+
+class Statement:
+    """
+    A top level statement or declaration and its part of the program graph.
+    text: str the text of the statement without the spaces around it.
+    exit: Node the node following the statement, the statement starts from the exit of the statement before it.
+    nodes: List[Node] the nodes created for the statement, the exit last.
+    edges: List[Edge] the edges of the statement.
+    variables: Dict[str, Set[str]] the variables used by the statement.
+    declarations: Dict[str, Dict[str, VariableDeclaration]] the variables declared by the statement.
+    """
+    __slots__ = ("text", "exit", "nodes", "edges", "variables", "declarations")
+    text: str
+    exit: Node
+    nodes: List[Node]
+    edges: List[Edge]
+    variables: Dict[str, Set[str]]
+    declarations: Dict[str, Dict[str, VariableDeclaration]]
+
+    def __init__(self, text: str, tree: Tree, start: Node, expressions: ExpressionTable = None) -> None:
+        builder = ProgramGraphBuilder(start, expressions)
+        builder.add(tree)
+        self.text = text
+        self.exit = builder.last_node
+        self.nodes = list(builder.nodes.values())
+        self.edges = builder.edges
+        self.variables = builder.variables
+        self.declarations = builder.declarations
+
+
+class ProgramEdit:
+    """
+    The difference between the statements of a program graph and the statements of a new text.
+    The statements [first, old_end) are replaced by statements, built from start which stands in for
+    the node they start from until the edit is applied.
+    variables: Dict[str, Dict[str, VariableDeclaration]] the declarations of the new program.
+    """
+    first: int
+    old_end: int
+    start: Node
+    statements: List[Statement]
+    variables: Dict[str, Dict[str, VariableDeclaration]]
+
+    def __init__(self, first: int, old_end: int, start: Node, statements: List[Statement], variables: Dict[str, Dict[str, VariableDeclaration]]) -> None:
+        self.first = first
+        self.old_end = old_end
+        self.start = start
+        self.statements = statements
+        self.variables = variables
+
+
+class IncrementalProgramGraph(ProgramGraph):
+    """
+    A program graph that keeps the part of the graph of each top level statement, so that an edit
+    only builds the statements that changed. The graph is the same as the program graph of the text.
+    The accesses and expressions of all the statements, before and after the edits, are interned in expressions.
+    """
+    initial: Node
+    statements: List[Statement]
+    expressions: ExpressionTable
+
+    def __init__(self, program: str) -> None:
+        self.initial = Node(0)
+        self.statements = []
+        self.expressions = ExpressionTable()
+        texts = statement_texts(program)
+        trees = [self.parse(text) for text in texts]
+        start = self.initial
+        for text, tree in zip(texts, trees):
+            self.statements.append(Statement(text, tree, start, self.expressions))
+            start = self.statements[-1].exit
+        self.variables = self.declare(self.statements)
+        start.last = True
+        self.collect()
+
+    @staticmethod
+    def parse(text: str) -> Tree:
+        """Parses the text of one top level statement."""
+        children = grammar.parse(text).children
+        if len(children) != 1:
+            raise Exception(f"Not a top level statement: {text}")
+        return children[0]
+
+    @staticmethod
+    def declare(statements: List[Statement]) -> Dict[str, Dict[str, VariableDeclaration]]:
+        """Returns the declarations of the statements, as a program graph of all of them would."""
+        variables = {"variable": set(), "array": set(), "record": set()}
+        declarations = {"variable": dict(), "array": dict(), "record": dict()}
+        for statement in statements:
+            for var_type in variables:
+                variables[var_type].update(statement.variables[var_type])
+                declarations[var_type].update(statement.declarations[var_type])
+        return check_declarations(variables, declarations)
+
+    def collect(self) -> None:
+        """Gathers the nodes and the edges of the statements."""
+        self.nodes = {0: self.initial}
+        self.edges = []
+        for statement in self.statements:
+            for node in statement.nodes:
+                self.nodes[node.number] = node
+            self.edges.extend(statement.edges)
+
+    def entry(self, index: int) -> Node:
+        """Returns the node the statement index starts from, the final node for the index after the last one."""
+        return self.statements[index - 1].exit if index > 0 else self.initial
+
+    def diff(self, program: str) -> Optional[ProgramEdit]:
+        """
+        Matches the statements of program with the statements of the graph, from the start and from the end.
+        Returns None if they are all the same, otherwise the edit, the statements that changed being parsed.
+        The graph is not modified.
+        """
+        texts = statement_texts(program)
+        old_texts = [statement.text for statement in self.statements]
+        first = 0
+        while first < min(len(texts), len(old_texts)) and texts[first] == old_texts[first]:
+            first += 1
+        last = 0
+        while last < min(len(texts), len(old_texts)) - first and texts[-1 - last] == old_texts[-1 - last]:
+            last += 1
+        if first + last == len(texts) == len(old_texts):
+            return None
+        # The new statements are built from a stand in for their entry, the graph is not changed.
+        start = Node(self.entry(first).number)
+        statements = []
+        for text in texts[first:len(texts) - last]:
+            statements.append(Statement(text, self.parse(text), statements[-1].exit if statements else start,
+                                        self.expressions))
+        variables = self.declare(self.statements[:first] + statements +
+                                 self.statements[len(self.statements) - last:])
+        return ProgramEdit(first, len(self.statements) - last, start, statements, variables)
+
+    def apply(self, edit: ProgramEdit) -> Renumbering:
+        """Replaces the statements of the edit, the other statements keep their nodes and edges."""
+        entry = self.entry(edit.first)
+        old_exit = self.entry(edit.old_end)
+        old_last = self.entry(len(self.statements))
+        for statement in self.statements[edit.first:edit.old_end]:
+            for edge in statement.edges:
+                edge.start.outgoing_edges.remove(edge)
+                edge.end.incoming_edges.remove(edge)
+        exit = edit.statements[-1].exit if len(edit.statements) > 0 else entry
+        if exit is not old_exit:
+            # The edges of the statement after the edit are on old_exit, with their other end after it.
+            kept = [edge for edge in old_exit.outgoing_edges if edge.end.number <= old_exit.number]
+            moved = [edge for edge in old_exit.outgoing_edges if edge.end.number > old_exit.number]
+            old_exit.outgoing_edges = kept
+            for edge in moved:
+                edge.start = exit
+                exit.outgoing_edges.append(edge)
+            kept = [edge for edge in old_exit.incoming_edges if edge.start.number <= old_exit.number]
+            moved = [edge for edge in old_exit.incoming_edges if edge.start.number > old_exit.number]
+            old_exit.incoming_edges = kept
+            for edge in moved:
+                edge.end = exit
+                exit.incoming_edges.append(edge)
+        merge_nodes(entry, edit.start)
+        renumbering = Renumbering(entry.number, old_exit.number, exit.number)
+        shift = exit.number - old_exit.number
+        for statement in self.statements[edit.old_end:]:
+            for node in statement.nodes:
+                node.number += shift
+        self.statements[edit.first:edit.old_end] = edit.statements
+        old_last.last = False
+        self.entry(len(self.statements)).last = True
+        self.variables = edit.variables
+        self.collect()
+        return renumbering
@@ -1,11 +1,12 @@
 """Converts AST to program graph."""
 
 
-from typing import Dict, List, Set, Tuple, Union
-from .parser import grammar
-from .struc_elements import AExpr, BExpr, VariableAccess, VariableDeclaration
-from lark import Tree, Token
-from .utils import check_edges
+import time
+from itertools import count
+from typing import IO, Dict, Iterator, List, Set, Tuple, Union
+from .parser import GRAMMAR, StatementSplitter, grammar
+from .struc_elements import AExpr, BExpr, ExpressionTable, VariableAccess, VariableDeclaration
+from lark import Lark, Transformer, Tree, Token
 POSSIBLE_ACTIONS = ["assign", "read", "write", "boolean", "declare"]
 
 
@@ -15,6 +16,7 @@ class Node:
     The initial node has number 0.
     The final node has the boolean set to true.
     """
+    __slots__ = ("number", "last", "outgoing_edges", "incoming_edges")
     number: int
     last: bool
     outgoing_edges: List["Edge"]
@@ -36,6 +38,7 @@ class Action:
     Fx: A[b+1] = a+c that would be a+c.
     For a boolean expression the right expression is the boolean expression itself.
     """
+    __slots__ = ("action_type", "variable", "right_expression")
     action_type: str
     variable: Union[VariableAccess, VariableDeclaration]
     right_expression: Union[AExpr, BExpr]
@@ -70,6 +73,7 @@ class Action:
 
 
 class Edge:
+    __slots__ = ("start", "end", "action")
     start: Node
     end: Node
     action: Action
@@ -92,21 +96,60 @@ class ProgramGraph:
     edges: List[Edge]
     variables: Dict[str, Dict[str, VariableDeclaration]]
 
-    def __init__(self, program: str) -> None:
-        tree = grammar.parse(program)
-        self.edges, init_node = high_level_edges(tree)
-        check_edges(self.edges)
-        self.nodes = {
-            0: init_node
-        }
-        self.__explore_nodes()
-        variables = {
-            "variable": set(),
-            "array": set(),
-            "record": set()
-        }
-        get_all_variables(tree, variables)
-        self.variables = get_all_declared_variables(variables, self.edges)
+    def __init__(self, program: str, inline: bool = False, metrics=None) -> None:
+        """Builds the program graph of program.
+        With inline the graph is built while parsing, without keeping the parse tree.
+        metrics is an Analysis.metrics.Metrics the parse and build times are added to, inline only has a build time.
+        """
+        start = time.perf_counter()
+        if inline:
+            self.edges, self.nodes, variables, declarations = inline_edges(
+                program)
+        else:
+            tree = grammar.parse(program)
+            if metrics is not None:
+                metrics.add_time("parse", time.perf_counter() - start)
+                start = time.perf_counter()
+            builder = ProgramGraphBuilder()
+            for child in tree.children:
+                builder.add(child)
+            builder.finish()
+            self.edges, self.nodes = builder.edges, builder.nodes
+            variables, declarations = builder.variables, builder.declarations
+        self.variables = check_declarations(variables, declarations)
+        if metrics is not None:
+            metrics.add_time("build", time.perf_counter() - start)
+
+    @classmethod
+    def from_graph(cls, nodes: Dict[int, Node], edges: List[Edge], variables: Dict[str, Dict[str, VariableDeclaration]]) -> "ProgramGraph":
+        """Creates a program graph from nodes and edges that are already built."""
+        program_graph = cls.__new__(cls)
+        program_graph.nodes = nodes
+        program_graph.edges = edges
+        program_graph.variables = variables
+        return program_graph
+
+    @classmethod
+    def from_stream(cls, stream: IO[str], chunk_size: int = 1 << 16) -> "ProgramGraph":
+        """
+        Builds the program graph of the program read from stream, chunk_size characters at a time.
+        Each top level statement is parsed and added to the graph once it has been read, so only the text and the
+        parse tree of one statement are kept besides the graph. The graph is the same as the graph of the whole text.
+        """
+        builder = ProgramGraphBuilder()
+        splitter = StatementSplitter()
+
+        def add(statements: List[str]) -> None:
+            for statement in statements:
+                if not statement.isspace():
+                    for child in grammar.parse(statement).children:
+                        builder.add(child)
+        for text in iter(lambda: stream.read(chunk_size), ""):
+            add(splitter.feed(text))
+        add(splitter.feed("", final=True) + [splitter.buffer])
+        builder.finish()
+        return cls.from_graph(builder.nodes, builder.edges,
+                              check_declarations(builder.variables, builder.declarations))
 
     def get_edges(self) -> List[Edge]:
         """Returns a deep copy of the edges."""
@@ -120,133 +163,226 @@ class ProgramGraph:
         """Returns the last node of the program graph."""
         return self.nodes[len(self.nodes)-1]
 
-    def __explore_nodes(self):
-        """Parses the edges to find all nodes."""
-        edges_to_explore = self.get_edges()
-        while len(edges_to_explore) > 0:
-            edge = edges_to_explore.pop()
-            self.nodes[edge.end.number] = edge.end
-
-
-def compute_edges(start: Node, end: Node, tree: Tree) -> List[Edge]:
-    if tree.data == "assignment" or tree.data == "read" or tree.data == "write":
-        action: Action = None
-        # Parsing the Tree to get the variable that is being accessed.
-        variable = expand_access(tree.children[0])
-        if tree.data == "assignment":
-            # Parsing the Tree to get the value the variable is being assigned to.
-            value = expand_a_expr(tree.children[1])
-
-            action = Action("assign", variable, value)
-        elif tree.data == "read":
-            action = Action("read", variable)
-        else:
-            action = Action("write", variable)
-        edge = Edge(start, end, action)
-        return [edge]
-    elif tree.data == "if" or tree.data == "else" or tree.data == "while":
-        b_expr = expand_b_expr(tree.children[0])
-        not_b_expr = BExpr(["not"] + b_expr.copy().expression)
-        if_branch_node = Node(start.number+1)
-        end.number = if_branch_node.number+1
-        if_action = Action("boolean", right_expression=b_expr)
-        if_edge = Edge(start, if_branch_node, if_action)
-        else_edge: Edge = None
-        else_action = Action(
-            "boolean", right_expression=not_b_expr)
-        if tree.data == "else":
-            else_branch_node = Node(if_branch_node.number+1)
-            end.number = else_branch_node.number+1
-            else_edge = Edge(start, else_branch_node,
-                             else_action)
-            additional_edges = compute_edges(
-                if_branch_node, end, tree.children[1]) + compute_edges(else_branch_node, end, tree.children[2])
-        else:  # if and while
-            else_edge = Edge(start, end, else_action)
-            if tree.data == "if":
-                additional_edges = compute_edges(
-                    if_branch_node, end, tree.children[1])
-            else:  # while branching
-                end.number += 1
-                additional_edges = compute_edges(
-                    if_branch_node, start, tree.children[1])
-        return [if_edge, else_edge] + additional_edges
-    elif tree.data == "statement":
-        end.number = start.number + 1
-        return compute_edges(start, end, tree.children[0])
-    elif tree.data == "declaration":
-        end.number = start.number + 1
-        variable = None
-        if tree.children[0].data == "var_declare":
-            variable = VariableDeclaration(
-                name=tree.children[0].children[0].children[0].value,
-                variable_type="variable"
-            )
-        elif tree.children[0].data == "arr_declare":
-            variable = VariableDeclaration(
-                name=tree.children[0].children[1].children[0].value,
-                variable_type="array",
-                array_len=tree.children[0].children[0].value
-            )
+
+class ProgramGraphBuilder:
+    """
+    Builds a program graph from the parse tree with an explicit stack, so the nesting depth is not limited.
+    Nodes are numbered once when they are created, the final node having the highest number.
+    The variables used and the declarations are gathered in the same traversal.
+    Given a start node the statements are appended after it, the nodes created are numbered from
+    the number following it and start itself is not in nodes.
+    The accesses and expressions are interned in expressions, which can be shared by several builders.
+    """
+    nodes: Dict[int, Node]
+    edges: List[Edge]
+    variables: Dict[str, Set[str]]
+    declarations: Dict[str, Dict[str, VariableDeclaration]]
+    expressions: ExpressionTable
+    last_node: Node
+    next_number: int
+
+    def __init__(self, start: Node = None, expressions: ExpressionTable = None) -> None:
+        self.nodes = {}
+        self.edges = []
+        self.variables = {
+            "variable": set(),
+            "array": set(),
+            "record": set()
+        }
+        self.declarations = {
+            "variable": dict(),
+            "array": dict(),
+            "record": dict()
+        }
+        self.expressions = ExpressionTable() if expressions is None else expressions
+        if start is None:
+            self.next_number = 0
+            self.last_node = Node(-1)
+            self.__number(self.last_node)
         else:
-            variable = VariableDeclaration(
-                name=tree.children[0].children[0].children[0].value,
-                variable_type="record"
-            )
-        return [Edge(start, end, Action("declare", variable))]
+            self.next_number = start.number + 1
+            self.last_node = start
+
+    def add(self, tree: Tree) -> None:
+        """Appends a top level statement or declaration at the end of the graph."""
+        end = Node(-1)
+        self.compute_edges(self.last_node, end, tree)
+        self.__number(end)
+        self.last_node = end
+
+    def finish(self) -> Node:
+        """Marks the final node, returns the initial node."""
+        self.last_node.last = True
+        return self.nodes[0]
+
+    def compute_edges(self, start: Node, end: Node, tree: Tree) -> None:
+        """Computes the edges going from start to end for the given tree.
+        The end node is numbered by the caller.
+        """
+        # A work item without tree numbers its node once the items pushed before are done.
+        stack: List[Tuple[Node, Node, Tree]] = [(start, end, tree)]
+        while len(stack) > 0:
+            start, end, tree = stack.pop()
+            if tree is None:
+                self.__number(start)
+            elif tree.data == "statement":
+                stack.append((start, end, tree.children[0]))
+            elif tree.data == "assignment" or tree.data == "read" or tree.data == "write":
+                action: Action = None
+                # Parsing the Tree to get the variable that is being accessed.
+                variable = expand_access(tree.children[0], self.variables, self.expressions)
+                if tree.data == "assignment":
+                    # Parsing the Tree to get the value the variable is being assigned to.
+                    value = expand_a_expr(tree.children[1], self.variables, self.expressions)
+
+                    action = Action("assign", variable, value)
+                elif tree.data == "read":
+                    action = Action("read", variable)
+                else:
+                    action = Action("write", variable)
+                self.edges.append(Edge(start, end, action))
+            elif tree.data == "if" or tree.data == "else" or tree.data == "while":
+                b_expr = expand_b_expr(tree.children[0], self.variables, self.expressions)
+                not_b_expr = self.expressions.negation(b_expr)
+                if_branch_node = Node(-1)
+                self.__number(if_branch_node)
+                self.edges.append(Edge(start, if_branch_node, Action(
+                    "boolean", right_expression=b_expr)))
+                else_action = Action(
+                    "boolean", right_expression=not_b_expr)
+                if tree.data == "else":
+                    else_branch_node = Node(-1)
+                    self.__number(else_branch_node)
+                    self.edges.append(
+                        Edge(start, else_branch_node, else_action))
+                    stack.append((else_branch_node, end, tree.children[2]))
+                    stack.append((if_branch_node, end, tree.children[1]))
+                else:  # if and while
+                    self.edges.append(Edge(start, end, else_action))
+                    if tree.data == "if":
+                        stack.append((if_branch_node, end, tree.children[1]))
+                    else:  # while branching, the body loops back to the start.
+                        stack.append(
+                            (if_branch_node, start, tree.children[1]))
+            elif tree.data == "block":
+                if len(tree.children) == 0:
+                    raise Exception("Empty blocks are not supported.")
+                # Pushed in reverse, each middle node is numbered after the statement before it.
+                next_node = end
+                for child in reversed(tree.children[1:]):
+                    middle_node = Node(-1)
+                    stack.append((middle_node, next_node, child))
+                    stack.append((middle_node, None, None))
+                    next_node = middle_node
+                stack.append((start, next_node, tree.children[0]))
+            elif tree.data == "declaration":
+                variable = expand_declaration(tree.children[0])
+                self.declarations[variable.variable_type][variable.name] = variable
+                self.edges.append(Edge(start, end, Action("declare", variable)))
+
+    def __number(self, node: Node) -> None:
+        """Gives the next number to the node."""
+        node.number = self.next_number
+        self.next_number += 1
+        self.nodes[node.number] = node
 
 
 def high_level_edges(tree: Tree) -> Tuple[List[Edge], Node]:
     """High level function to create a program grah, returns a set of edges and the initial node."""
     if tree.data == "program":
-        start_node = Node(0)
-        init_node = start_node
-        end_node = Node(-1)
-        edges: List[Edge] = []
+        builder = ProgramGraphBuilder()
         for child in tree.children:
-            edges += compute_edges(start_node, end_node, child)
-            start_node = end_node
-            end_node = Node(end_node.number)
-        start_node.last = True
-        return edges, init_node
+            builder.add(child)
+        return builder.edges, builder.finish()
     else:
         raise Exception("Supplied tree does not start with program.")
 
 
-def expand_a_expr(tree: Tree) -> AExpr:
-    """Given an a_expr tree unfolds the a_expr"""
-    expr = []
-    for child in tree.children:
-        if isinstance(child, Token):
-            expr.append(child.value)
-        elif child.data == "access":
-            var = expand_access(child)
-            expr.append(var)
-        elif child.data == "opa":
-            var = expand_opa(child)
-            expr.append(var)
-        else:  # Case nested in another opa
-            for expr_a in expand_a_expr(child).expression:
-                expr.append(expr_a)
-    return AExpr(expr)
-
-
-def expand_b_expr(tree: Tree) -> BExpr:
+def expand_declaration(tree: Tree) -> VariableDeclaration:
+    """Given a var_declare, arr_declare or rec_declare tree returns the declared variable."""
+    if tree.data == "var_declare":
+        return VariableDeclaration(
+            name=tree.children[0].children[0].value,
+            variable_type="variable"
+        )
+    elif tree.data == "arr_declare":
+        return VariableDeclaration(
+            name=tree.children[1].children[0].value,
+            variable_type="array",
+            array_len=tree.children[0].value
+        )
+    return VariableDeclaration(
+        name=tree.children[0].children[0].value,
+        variable_type="record"
+    )
+
+
+def expand_a_expr(tree: Tree, variables: Dict[str, Set[str]] = None, expressions: ExpressionTable = None) -> AExpr:
+    """Given an a_expr tree unfolds the a_expr.
+    The variables accessed are added to variables if given, the expression is interned in expressions if given.
+    The indices of the arrays are unfolded with an explicit stack, so their nesting depth is not limited.
+    """
+    if expressions is None:
+        expressions = ExpressionTable()
+    # The children left to read of each a_expr being unfolded, its elements so far and the array it is the index of.
+    stack: List[Tuple[Iterator, list, str]] = [(iter(tree.children), [], None)]
+    while True:
+        children, expr, array = stack[-1]
+        for child in children:
+            if isinstance(child, Token):
+                expr.append(child.value)
+            elif child.data == "access" and child.children[0].data == "array_access":
+                array_access = child.children[0]
+                variable_name = array_access.children[0].children[0].value
+                if variables is not None:
+                    variables["array"].add(variable_name)
+                stack.append((iter(array_access.children[1].children), [], variable_name))
+                break
+            elif child.data == "access":
+                expr.append(expand_access(child, variables, expressions))
+            else:
+                expr.append(expand_opa(child))
+        else:
+            stack.pop()
+            a_expr = expressions.a_expr(expr)
+            if array is None:
+                return a_expr
+            stack[-1][1].append(expressions.access(array, "array", child_accesses=a_expr))
+
+
+def expand_b_expr(tree: Tree, variables: Dict[str, Set[str]] = None, expressions: ExpressionTable = None) -> BExpr:
+    """Given a b_expr or not tree unfolds it in a flat expression.
+    The variables accessed are added to variables if given, the expression is interned in expressions if given.
+    """
+    if expressions is None:
+        expressions = ExpressionTable()
     expr = []
-    for child in tree.children:
-        if isinstance(child, Token):
-            expr.append(child.value)
-        elif child.data == "a_expr":
-            expr.append(expand_a_expr(child))
-        elif child.data == "opr":
-            expr.append(expand_opr(child))
-        elif child.data == "opb":
-            expr.append(expand_opb(child))
-        else:  # Case nested in another opa
-            if child.data == "not":
+    flatten_b_expr(tree, variables, expressions, expr)
+    return expressions.b_expr(expr)
+
+
+def flatten_b_expr(tree: Tree, variables: Dict[str, Set[str]], expressions: ExpressionTable, expr: list) -> None:
+    """
+    Appends the flat expression of a b_expr or not tree to expr, the negations are not interned on their own.
+    The nested negations are read with a stack of the children left to read, so their depth is not limited.
+    """
+    stack: List[Iterator] = [iter(tree.children)]
+    while len(stack) > 0:
+        for child in stack[-1]:
+            if isinstance(child, Token):  # true or false
+                expr.append(child.value)
+            elif child.data == "a_expr":
+                expr.append(expand_a_expr(child, variables, expressions))
+            elif child.data == "opr":
+                expr.append(expand_opr(child))
+            elif child.data == "opb":
+                expr.append(expand_opb(child))
+            else:  # Negation, flattened in the expression.
                 expr.append("not")
-            expr.append(expand_b_expr(child))
-    return BExpr(expr)
+                stack.append(iter(child.children))
+                break
+        else:
+            stack.pop()
 
 
 def expand_opa(tree: Tree) -> str:
@@ -287,57 +423,320 @@ def expand_opb(tree: Tree) -> str:
         return "|"
 
 
-def expand_access(tree: Tree) -> VariableAccess:
+def expand_access(tree: Tree, variables: Dict[str, Set[str]] = None, expressions: ExpressionTable = None) -> VariableAccess:
     """Given an access tree returns the variable access and the type of access.
     var: variable access, arr: array access, rec: record access.
+    The variables accessed are added to variables if given, the access is interned in expressions if given.
     """
+    if expressions is None:
+        expressions = ExpressionTable()
     tree = tree.children[0]
     if tree.data == 'variable':
-        return VariableAccess(tree.children[0].value, "variable")
+        if variables is not None:
+            variables["variable"].add(tree.children[0].value)
+        return expressions.access(tree.children[0].value, "variable")
     elif tree.data == "record_access":
         variable_name = tree.children[0].children[0].children[0].value
+        if variables is not None:
+            variables["record"].add(variable_name)
         if tree.children[0].data == "record_fst_access":
-            return VariableAccess(variable_name, "record", "fst")
+            return expressions.access(variable_name, "record", "fst")
         else:
-            return VariableAccess(variable_name, "record", "snd")
-    else:  # Array access
+            return expressions.access(variable_name, "record", "snd")
+    else:  # Array access, expand_a_expr unfolds the nested indices without recursing.
         variable_name = tree.children[0].children[0].value
-        if isinstance(tree.children[1], Token):  # Case direct number
-            return VariableAccess(variable_name, "array", child_accesses=AExpr([tree.children[1].value]))
-        else:  # Another access to dig in
-            a_expr = expand_a_expr(tree.children[1])
-            return VariableAccess(variable_name, "array", child_accesses=a_expr)
+        if variables is not None:
+            variables["array"].add(variable_name)
+        a_expr = expand_a_expr(tree.children[1], variables, expressions)
+        return expressions.access(variable_name, "array", child_accesses=a_expr)
 
 
-def get_all_variables(tree: Tree, variables: Dict):
-    """Returns all variables that will be encountered"""
-    if tree.data == "variable":
-        variables["variable"].add(tree.children[0].value)
-    elif tree.data == "record_access":
-        variables["record"].add(tree.children[0].children[0].children[0].value)
-    elif tree.data == "array_access":
-        variables["array"].add(tree.children[0].children[0].value)
-        if isinstance(tree.children[1], Tree):
-            get_all_variables(tree.children[1], variables)
-    elif tree.data == "declaration":
-        pass
-    else:
-        for child in tree.children:
-            if isinstance(child, Tree):
-                get_all_variables(child, variables)
-
-
-def get_all_declared_variables(variables: Dict, edges: List[Edge]) -> Dict:
-    """Gets all declared variables and returns an error if a variable as not been declared."""
-    declarations = {
-        "variable": dict(),
-        "array": dict(),
-        "record": dict()
-    }
-    for edge in filter(lambda x: isinstance(x.action.variable, VariableDeclaration), edges):
-        declarations[edge.action.variable.variable_type][edge.action.variable.name] = edge.action.variable
+def check_declarations(variables: Dict[str, Set[str]], declarations: Dict) -> Dict:
+    """Returns the declarations and raises an error if a variable has not been declared."""
     for variable_type, var in variables.items():
         for var_name in var:
             if var_name not in declarations[variable_type]:
                 raise Exception(f"Variable {var_name} not declared.")
     return declarations
+
+
+class GraphFragment:
+    """
+    A part of a program graph built by the ProgramGraphTransformer.
+    entry: Node the node the fragment starts from.
+    exit: Node the node the fragment ends in.
+    edges: List[Edge] the edges of the fragment in the order high_level_edges creates them.
+    order: List[Node] the inner nodes in the order high_level_edges numbers them.
+    """
+    __slots__ = ("entry", "exit", "edges", "order")
+    entry: Node
+    exit: Node
+    edges: List[Edge]
+    order: List[Node]
+
+    def __init__(self, entry: Node, exit: Node, edges: List[Edge], order: List[Node]) -> None:
+        self.entry = entry
+        self.exit = exit
+        self.edges = edges
+        self.order = order
+
+
+def merge_nodes(node: Node, other: Node) -> None:
+    """Moves all the edges of other to node, other must not be used afterwards."""
+    for edge in other.outgoing_edges:
+        edge.start = node
+        node.outgoing_edges.append(edge)
+    for edge in other.incoming_edges:
+        edge.end = node
+        node.incoming_edges.append(edge)
+
+
+class ProgramGraphTransformer(Transformer):
+    """
+    Transformer called by the LALR parser on every reduction.
+    Statements are turned into GraphFragment that are connected by merging their nodes,
+    the nodes are numbered once the whole program is read.
+    The graph is the same as the one computed by high_level_edges.
+    """
+    variables: Dict[str, Set[str]]
+    declarations: Dict[str, Dict[str, VariableDeclaration]]
+    expressions: ExpressionTable
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets the variables and the expressions encountered in the previous program."""
+        self.variables = {
+            "variable": set(),
+            "array": set(),
+            "record": set()
+        }
+        self.declarations = {
+            "variable": dict(),
+            "array": dict(),
+            "record": dict()
+        }
+        self.expressions = ExpressionTable()
+
+    def program(self, children: List[GraphFragment]) -> Tuple[List[Edge], Dict[int, Node], Dict, Dict]:
+        init_node = Node(0)
+        start_node = init_node
+        order: List[Node] = [init_node]
+        edges: List[Edge] = []
+        for fragment in children:
+            merge_nodes(start_node, fragment.entry)
+            edges += fragment.edges
+            order += fragment.order
+            order.append(fragment.exit)
+            start_node = fragment.exit
+        start_node.last = True
+        nodes = {}
+        for number, node in enumerate(order):
+            node.number = number
+            nodes[number] = node
+        return edges, nodes, self.variables, self.declarations
+
+    def declaration(self, children: List[VariableDeclaration]) -> GraphFragment:
+        self.declarations[children[0].variable_type][children[0].name] = children[0]
+        start, end = Node(-1), Node(-1)
+        return GraphFragment(start, end, [Edge(start, end, Action("declare", children[0]))], [])
+
+    def var_declare(self, children: List[str]) -> VariableDeclaration:
+        return VariableDeclaration(name=children[0], variable_type="variable")
+
+    def arr_declare(self, children: List[Union[Token, str]]) -> VariableDeclaration:
+        return VariableDeclaration(name=children[1], variable_type="array", array_len=children[0].value)
+
+    def rec_declare(self, children: List[str]) -> VariableDeclaration:
+        return VariableDeclaration(name=children[0], variable_type="record")
+
+    def statement(self, children: List[GraphFragment]) -> GraphFragment:
+        return children[0]
+
+    def block(self, children: List[GraphFragment]) -> GraphFragment:
+        if len(children) == 0:
+            raise Exception("Empty blocks are not supported.")
+        first = children[0]
+        edges = first.edges
+        order = first.order
+        middle_node = first.exit
+        for fragment in children[1:]:
+            order.append(middle_node)
+            merge_nodes(middle_node, fragment.entry)
+            edges += fragment.edges
+            order += fragment.order
+            middle_node = fragment.exit
+        return GraphFragment(first.entry, middle_node, edges, order)
+
+    def assignment(self, children: List[Union[VariableAccess, AExpr]]) -> GraphFragment:
+        return self.__single_edge(Action("assign", children[0], children[1]))
+
+    def read(self, children: List[VariableAccess]) -> GraphFragment:
+        return self.__single_edge(Action("read", children[0]))
+
+    def write(self, children: List[VariableAccess]) -> GraphFragment:
+        return self.__single_edge(Action("write", children[0]))
+
+    def if_(self, children: List[Union[BExpr, GraphFragment]]) -> GraphFragment:
+        start, if_branch_node, end = Node(-1), Node(-1), Node(-1)
+        if_edge, else_edge = self.__branching_edges(
+            start, if_branch_node, end, children[0])
+        body = children[1]
+        merge_nodes(if_branch_node, body.entry)
+        merge_nodes(end, body.exit)
+        return GraphFragment(start, end, [if_edge, else_edge] + body.edges, [if_branch_node] + body.order)
+
+    def else_(self, children: List[Union[BExpr, GraphFragment]]) -> GraphFragment:
+        start, if_branch_node, else_branch_node, end = Node(
+            -1), Node(-1), Node(-1), Node(-1)
+        if_edge, else_edge = self.__branching_edges(
+            start, if_branch_node, else_branch_node, children[0])
+        if_body, else_body = children[1], children[2]
+        merge_nodes(if_branch_node, if_body.entry)
+        merge_nodes(else_branch_node, else_body.entry)
+        merge_nodes(end, if_body.exit)
+        merge_nodes(end, else_body.exit)
+        return GraphFragment(start, end, [if_edge, else_edge] + if_body.edges + else_body.edges,
+                             [if_branch_node, else_branch_node] + if_body.order + else_body.order)
+
+    def while_(self, children: List[Union[BExpr, GraphFragment]]) -> GraphFragment:
+        start, if_branch_node, end = Node(-1), Node(-1), Node(-1)
+        if_edge, else_edge = self.__branching_edges(
+            start, if_branch_node, end, children[0])
+        # The body loops back to the start.
+        body = children[1]
+        merge_nodes(if_branch_node, body.entry)
+        merge_nodes(start, body.exit)
+        return GraphFragment(start, end, [if_edge, else_edge] + body.edges, [if_branch_node] + body.order)
+
+    def access(self, children: List[Union[str, VariableAccess]]) -> VariableAccess:
+        if isinstance(children[0], VariableAccess):
+            return children[0]
+        self.variables["variable"].add(children[0])
+        return self.expressions.access(children[0], "variable")
+
+    def array_access(self, children: List[Union[str, AExpr]]) -> VariableAccess:
+        self.variables["array"].add(children[0])
+        return self.expressions.access(children[0], "array", child_accesses=children[1])
+
+    def record_access(self, children: List[VariableAccess]) -> VariableAccess:
+        self.variables["record"].add(children[0].name)
+        return children[0]
+
+    def record_fst_access(self, children: List[str]) -> VariableAccess:
+        return self.expressions.access(children[0], "record", "fst")
+
+    def record_snd_access(self, children: List[str]) -> VariableAccess:
+        return self.expressions.access(children[0], "record", "snd")
+
+    def variable(self, children: List[Token]) -> str:
+        return children[0].value
+
+    def b_expr(self, children: List[Union[Token, AExpr, str, list]]) -> BExpr:
+        expr = []
+        for child in children:
+            if isinstance(child, Token):  # true or false
+                expr.append(child.value)
+            elif isinstance(child, list):  # Negation, flattened in the expression.
+                for expr_b in child:
+                    expr.append(expr_b)
+            else:
+                expr.append(child)
+        return self.expressions.b_expr(expr)
+
+    def not_(self, children: List[Union[Token, AExpr, str, list]]) -> list:
+        """Returns the flat expression of the negation, the BExpr is created by b_expr."""
+        expr = ["not"]
+        for child in children:
+            if isinstance(child, Token):
+                expr.append(child.value)
+            elif isinstance(child, list):
+                for expr_b in child:
+                    expr.append(expr_b)
+            else:
+                expr.append(child)
+        return expr
+
+    def a_expr(self, children: List[Union[Token, VariableAccess, str]]) -> AExpr:
+        return self.expressions.a_expr([child.value if isinstance(child, Token) else child for child in children])
+
+    def opa(self, children: List[str]) -> str:
+        return children[0]
+
+    def opb(self, children: List[str]) -> str:
+        return children[0]
+
+    def opr(self, children: List[str]) -> str:
+        return children[0]
+
+    def add(self, _) -> str:
+        return "+"
+
+    def sub(self, _) -> str:
+        return "-"
+
+    def mul(self, _) -> str:
+        return "*"
+
+    def div(self, _) -> str:
+        return "/"
+
+    def mod(self, _) -> str:
+        return "%"
+
+    def and_(self, _) -> str:
+        return "&"
+
+    def or_(self, _) -> str:
+        return "|"
+
+    def inf(self, _) -> str:
+        return "<"
+
+    def infe(self, _) -> str:
+        return "<="
+
+    def sup(self, _) -> str:
+        return ">"
+
+    def supe(self, _) -> str:
+        return ">="
+
+    def eq(self, _) -> str:
+        return "=="
+
+    def neq(self, _) -> str:
+        return "!="
+
+    def __single_edge(self, action: Action) -> GraphFragment:
+        start, end = Node(-1), Node(-1)
+        return GraphFragment(start, end, [Edge(start, end, action)], [])
+
+    def __branching_edges(self, start: Node, if_branch_node: Node, else_node: Node, b_expr: BExpr) -> Tuple[Edge, Edge]:
+        """Creates the edges of the condition and of its negation."""
+        not_b_expr = self.expressions.negation(b_expr)
+        if_edge = Edge(start, if_branch_node, Action(
+            "boolean", right_expression=b_expr))
+        else_edge = Edge(start, else_node, Action(
+            "boolean", right_expression=not_b_expr))
+        return if_edge, else_edge
+
+
+# Rules named after python keywords.
+for rule in ["if", "else", "while", "not", "and", "or"]:
+    setattr(ProgramGraphTransformer, rule,
+            getattr(ProgramGraphTransformer, rule + "_"))
+
+graph_transformer = ProgramGraphTransformer()
+graph_parser = Lark(GRAMMAR, start="program", parser="lalr",
+                    cache=True, transformer=graph_transformer)
+
+
+def inline_edges(program: str) -> Tuple[List[Edge], Dict[int, Node], Dict, Dict]:
+    """Parses the program with the graph transformer inlined in the parser.
+    Returns the edges, the nodes, all the variables encountered and the declarations.
+    """
+    graph_transformer.reset()
+    return graph_parser.parse(program)
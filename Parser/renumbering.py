@@ -0,0 +1,36 @@
+"""The change of the node numbers of a program graph after an edit, kept apart from the edits so the analyses can use it."""
+from typing import Optional, Tuple
+
+
+class Renumbering:
+    """
+    How an edit changed the node numbers.
+    The nodes in [low, old_high) were removed, the nodes in [low, high) were created and the nodes from
+    old_high on moved by high - old_high. Node old_high keeps the edges of the statements after the edit,
+    when low == old_high the edges of the statement before it stay on node low.
+    """
+    __slots__ = ("low", "old_high", "high")
+    low: int
+    old_high: int
+    high: int
+
+    def __init__(self, low: int, old_high: int, high: int) -> None:
+        self.low = low
+        self.old_high = old_high
+        self.high = high
+
+    def node(self, number: int) -> Optional[int]:
+        """Returns the new number of a node, None for the removed nodes."""
+        if number < self.low:
+            return number
+        if number >= self.old_high:
+            return number + self.high - self.old_high
+        return None
+
+    def edge(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """Returns the new start and end numbers of an edge, None for the removed edges."""
+        if start < self.low:
+            return start, end
+        if start >= self.old_high:
+            return start + self.high - self.old_high, end + self.high - self.old_high
+        return None
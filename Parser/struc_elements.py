@@ -1,7 +1,8 @@
-from typing import List, Union
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
 VALID_A_OPERATORS = {"+", "-", "*", "/", "%"}
 VALID_B_OPERATORS = {"&", "|", "not"}
-VALID_R_OPERATORS = {">", "<", ">=", "<=", "=="}
+VALID_R_OPERATORS = {">", "<", ">=", "<=", "==", "!="}
+BOOLEAN_CONSTANTS = {"true", "false"}
 
 
 class VariableDeclaration:
@@ -12,6 +13,7 @@ class VariableDeclaration:
     variable_type: str can be variable, array or record.
     array_len: int in the case of an array the length of the array.
     """
+    __slots__ = ("name", "variable_type", "array_len")
     name: str
     variable_type: str
     array_len: int
@@ -40,11 +42,14 @@ class VariableAccess:
     child_accesses: AExpr in the case of an array the arithemetic expression computing the index.
     variable_type: str can be variable, array or record.
     rec_type: str in the case of a record specify wether it's fst or snd.
+    id: int the number of the access in its ExpressionTable, None if it is not in one.
     """
+    __slots__ = ("name", "child_accesses", "variable_type", "rec_type", "id")
     name: str
     child_accesses: "AExpr"
     variable_type: str
     rec_type: str
+    id: int
 
     def __init__(self, name: str, variable_type: str, rec_type: str = "", child_accesses: "AExpr" = None) -> None:
         self.name = name
@@ -55,11 +60,12 @@ class VariableAccess:
             if not rec_type == "fst" and not rec_type == "snd":
                 raise Exception(
                     "Record accessed without specifying .fst or .snd.")
-            self.rec_type = rec_type
         elif variable_type == "array":
             if child_accesses is None:
                 raise Exception("Array accessed without specifying the index")
-            self.child_accesses = child_accesses
+        self.rec_type = rec_type
+        self.child_accesses = child_accesses
+        self.id = None
 
     def __str__(self) -> str:
         if self.variable_type == "variable":
@@ -69,136 +75,192 @@ class VariableAccess:
         return f"{self.name}[{self.child_accesses}]"
 
     def copy(self) -> "VariableAccess":
-        child_accesses = self.child_accesses.copy()
+        child_accesses = None if self.child_accesses is None else self.child_accesses.copy()
         return VariableAccess(self.name, self.variable_type, self.rec_type, child_accesses)
 
 
 class BooleanOperation:
     """An object representing a boolean operation."""
+    __slots__ = ("right", "left", "operator")
     right: Union["BooleanOperation", "AbstractExpr"]
     left: Union["BooleanOperation", "AbstractExpr"]
     operator: str
 
     def __init__(self, bexpr: "BExpr") -> None:
-        if "&" in bexpr.expression:
-            index = bexpr.expression.index("&")
-            self.operator = "&"
-        elif "|" in bexpr.expression:
-            index = bexpr.expression.index("|")
-            self.operator = "|"
-        elif "not" in bexpr.expression:
-            index = bexpr.expression.index("not")
-            self.operator = "not"
-        # No more boolean operators this is now a relational operation.
-        else:
-            self.__relative_init(bexpr)
-            return
-        left = BExpr(bexpr.expression[0: index])
-        if not self.operator == "not":
-            self.left = BooleanOperation(left)
-        # not operator will have the left empty.
-        else:
-            self.left = None
-        right = BExpr(bexpr.expression[index+1:])
-        self.right = BooleanOperation(right)
+        root = boolean_operation_tree(bexpr.expression)
+        self.operator = root.operator
+        self.left = root.left
+        self.right = root.right
+
+    @classmethod
+    def negation(cls, operation: "BooleanOperation") -> "BooleanOperation":
+        """Returns the not operation of operation, operation is its right and is not copied."""
+        negation = cls.__new__(cls)
+        negation.operator = "not"
+        negation.left = None
+        negation.right = operation
+        return negation
 
     def is_relational(self) -> bool:
         """Indicates whether the operation is a relational boolean operaton."""
         return self.operator in VALID_R_OPERATORS
 
+    def is_constant(self) -> bool:
+        """Indicates whether the operation is the constant true or false."""
+        return self.operator in BOOLEAN_CONSTANTS
+
     def __str__(self) -> str:
         return f"{'' if self.left is None else self.left} {self.operator} {self.right}"
 
-    def __relative_init(self, bexpr: "BExpr") -> None:
-        """To call to initialize the operation as a relative operation."""
-        nb_relative_operations = 0
-        for r_operator in VALID_R_OPERATORS:
-            if r_operator in bexpr.expression:
-                nb_relative_operations += 1
-                index = bexpr.expression.index(r_operator)
-                self.operator = r_operator
-        if nb_relative_operations != 1:
-            print(bexpr)
-            raise Exception(
-                f"Error a relative operation was supplied with 0 or multiple relational operators. {bexpr}")
-        left_expr = []
-        for expr in bexpr.expression[0:index]:
-            if isinstance(expr, AExpr):
-                for sub_expr in expr.expression:
-                    left_expr.append(sub_expr)
-            else:
-                left_expr.append(expr)
-        left = AExpr(left_expr)
-        if len(left.expression) == 1:
-            self.left = left
-        else:
-            self.left = Operation(left)
-        right_expr = []
-        for expr in bexpr.expression[index+1:]:
-            if isinstance(expr, AExpr):
-                for sub_expr in expr.expression:
-                    right_expr.append(sub_expr)
-            else:
-                right_expr.append(expr)
-        right = AExpr(right_expr)
-        if len(right.expression) == 1:
-            self.right = right
-        else:
-            self.right = Operation(right)
-
 
 class Operation:
     """An object representing an arithmetic operation between two variables."""
+    __slots__ = ("right", "left", "operator")
     right: Union["Operation", "AbstractExpr"]
     left: Union["Operation", "AbstractExpr"]
     operator: str
 
     def __init__(self, aexpr: "AExpr") -> None:
-        if "*" in aexpr.expression:
-            index = aexpr.expression.index("*")
-            self.operator = "*"
-        elif "/" in aexpr.expression:
-            index = aexpr.expression.index("/")
-            self.operator = "/"
-        elif "%" in aexpr.expression:
-            index = aexpr.expression.index("%")
-            self.operator = "%"
-        elif "+" in aexpr.expression:
-            index = aexpr.expression.index("+")
-            self.operator = "+"
-        elif "-" in aexpr.expression:
-            index = aexpr.expression.index("-")
-            self.operator = "-"
-        else:
-            raise Exception("Not an operation.")
-        left = AExpr(aexpr.expression[0:index])
-        if len(left.expression) == 1:
-            self.left = left
-        else:
-            self.left = Operation(left)
-        right = AExpr(aexpr.expression[index+1:])
-        if len(right.expression) == 1:
-            self.right = right
-        else:
-            self.right = Operation(right)
+        root = operation_tree(aexpr.expression)
+        self.operator = root.operator
+        self.left = root.left
+        self.right = root.right
 
     def __str__(self) -> str:
         return f"{self.left} {self.operator} {self.left}"
 
 
+# The operators in the order the expressions are split at them: the root of the tree of an expression is the first
+# occurrence of the first operator present, and both sides are split the same way. The tree is the Cartesian tree of
+# the operators ordered by rank then position, built left to right with the stack of its rightmost path.
+A_SPLIT_RANKS = {"*": 0, "/": 1, "%": 2, "+": 3, "-": 4}
+B_SPLIT_RANKS = {"&": 0, "|": 1, "not": 2}
+
+
+def operation_tree(expression: Sequence[Union[VariableAccess, str]]) -> Operation:
+    """Builds the operation tree of a flat arithmetic expression in one pass, raises an error if it is not an operation."""
+    if len(expression) < 3 or len(expression) % 2 == 0 or expression[0] in A_SPLIT_RANKS:
+        raise Exception("Not an operation.")
+    stack: List[Operation] = []
+    ranks: List[int] = []
+    operand = AExpr((expression[0],))
+    for index in range(1, len(expression), 2):
+        rank = A_SPLIT_RANKS.get(expression[index])
+        if rank is None or expression[index + 1] in A_SPLIT_RANKS:
+            raise Exception("Not an operation.")
+        operation = Operation.__new__(Operation)
+        operation.operator = expression[index]
+        # The operations of higher rank before it are in its left side.
+        while len(ranks) > 0 and ranks[-1] > rank:
+            ranks.pop()
+            operand = stack.pop()
+        operation.left = operand
+        operand = AExpr((expression[index + 1],))
+        operation.right = operand
+        if len(stack) > 0:
+            stack[-1].right = operation
+        stack.append(operation)
+        ranks.append(rank)
+    return stack[0]
+
+
+def boolean_operation_tree(expression: Sequence[Union["AExpr", VariableAccess, str]]) -> BooleanOperation:
+    """
+    Builds the boolean operation tree of a flat boolean expression in one pass.
+    What is before a not in its side is left out, as a not has no left.
+    """
+    stack: List[BooleanOperation] = []
+    ranks: List[int] = []
+    start = 0
+    for index, element in enumerate(expression):
+        rank = B_SPLIT_RANKS.get(element) if isinstance(element, str) else None
+        if rank is None:
+            continue
+        operation = BooleanOperation.__new__(BooleanOperation)
+        operation.operator = element
+        operation.left = None
+        atom = expression[start:index]
+        start = index + 1
+        if len(ranks) > 0 and ranks[-1] > rank:
+            # The atom is the right of the previous operation, which is in the left side of this one.
+            stack[-1].right = relational_tree(atom)
+            while len(ranks) > 0 and ranks[-1] > rank:
+                ranks.pop()
+                operation.left = stack.pop()
+        elif element != "not":
+            operation.left = relational_tree(atom)
+        if len(stack) > 0:
+            stack[-1].right = operation
+        stack.append(operation)
+        ranks.append(rank)
+    if len(stack) == 0:
+        return relational_tree(expression)
+    stack[-1].right = relational_tree(expression[start:])
+    return stack[0]
+
+
+def relational_tree(expression: Sequence[Union["AExpr", VariableAccess, str]]) -> BooleanOperation:
+    """Builds the operation of a boolean expression without &, | or not, a constant or a relational operation."""
+    operation = BooleanOperation.__new__(BooleanOperation)
+    # A boolean constant has neither left nor right.
+    if len(expression) == 1 and expression[0] in BOOLEAN_CONSTANTS:
+        operation.operator = expression[0]
+        operation.left = None
+        operation.right = None
+        return operation
+    found = {}
+    for index, element in enumerate(expression):
+        if isinstance(element, str) and element in VALID_R_OPERATORS and element not in found:
+            found[element] = index
+    if len(found) != 1:
+        raise Exception(
+            f"Error a relative operation was supplied with 0 or multiple relational operators. {BExpr(expression)}")
+    (operation.operator, index), = found.items()
+    operation.left = relational_side(expression[0:index])
+    operation.right = relational_side(expression[index+1:])
+    return operation
+
+
+def relational_side(side: Sequence[Union["AExpr", VariableAccess, str]]) -> Union[Operation, "AExpr"]:
+    """Returns the arithmetic expression of a side of a relational operation if it is a single element, its operation otherwise."""
+    # A side made of one expression has the tree of that expression, which is shared.
+    if len(side) == 1 and isinstance(side[0], AExpr):
+        return side[0] if len(side[0].expression) == 1 else side[0].operation
+    flat = []
+    for expr in side:
+        if isinstance(expr, AExpr):
+            flat.extend(expr.expression)
+        else:
+            flat.append(expr)
+    if len(flat) == 1:
+        return AExpr(flat)
+    return operation_tree(flat)
+
+
 class AbstractExpr:
-    """An abstract class representing an expression."""
-    expression: List[Union[VariableAccess, str]]
-    operation: Operation
-
-    def __init__(self, expression: List[Union[VariableAccess, str]]) -> None:
-        self.expression = []
-        for expr in expression:
-            self.expression.append(expr)
-        try:
-            self.operation = Operation(self)
-        except Exception as err:
-            pass
+    """An abstract class representing an expression.
+    The operation tree is only built when it is first used.
+    id: int the number of the expression in its ExpressionTable, None if it is not in one.
+    """
+    __slots__ = ("expression", "id", "__operation")
+    expression: Tuple[Union[VariableAccess, str], ...]
+    id: int
+
+    def __init__(self, expression: Iterable[Union[VariableAccess, str]]) -> None:
+        self.expression = tuple(expression)
+        self.id = None
+        self.__operation = None
+
+    @property
+    def operation(self) -> Union[Operation, BooleanOperation]:
+        """The operation tree of the expression."""
+        if self.__operation is None:
+            self.__operation = self.build_operation()
+        return self.__operation
+
+    def build_operation(self) -> Union[Operation, BooleanOperation]:
+        """Builds the operation tree, raises an error if the expression is not an operation."""
+        return operation_tree(self.expression)
 
     def __str__(self) -> str:
         return " ".join([str(expr) for expr in self.expression])
@@ -214,20 +276,28 @@ class AbstractExpr:
         return AbstractExpr(new_expr)
 
     def get_variables(self) -> List[VariableAccess]:
-        """Returns a list of all the variables accessed in the expression."""
+        """
+        Returns a list of all the variables accessed in the expression.
+        The indices of the arrays are read with a stack of the elements left to read, so their nesting depth is not limited.
+        """
         variables = []
-        for variable in self.expression:
-            if isinstance(variable, VariableAccess):
-                if variable.variable_type == "variable" or variable.variable_type == "record":
-                    variables.append(variable)
-                else:
-                    for child in variable.child_accesses.get_variables():
-                        variables.append(child)
+        stack: List[Iterator] = [iter(self.expression)]
+        while len(stack) > 0:
+            for variable in stack[-1]:
+                if isinstance(variable, VariableAccess):
+                    if variable.variable_type == "variable" or variable.variable_type == "record":
+                        variables.append(variable)
+                    else:
+                        stack.append(iter(variable.child_accesses.expression))
+                        break
+            else:
+                stack.pop()
         return variables
 
 
 class AExpr(AbstractExpr):
     """An object representing an arithmetic expression."""
+    __slots__ = ()
 
     def copy(self) -> "AExpr":
         """Deep copy of an expression."""
@@ -241,15 +311,22 @@ class AExpr(AbstractExpr):
 
 
 class BExpr(AbstractExpr):
-    """An object representing an arithmetic expression."""
-    expression: List[Union[AExpr, VariableAccess, str]]
+    """An object representing an arithmetic expression.
+    negated: BExpr the expression this one is the negation of when its operation tree is a not over the tree of negated.
+    """
+    __slots__ = ("negated",)
+    expression: Tuple[Union[AExpr, VariableAccess, str], ...]
+    negated: "BExpr"
 
-    def __init__(self, expression: List[Union[AExpr, VariableAccess, str]]) -> None:
-        self.expression = []
-        for expr in expression:
-            self.expression.append(expr)
-        if len(self.expression) > 0:
-            self.operation = BooleanOperation(self)
+    def __init__(self, expression: Iterable[Union[AExpr, VariableAccess, str]]) -> None:
+        super().__init__(expression)
+        self.negated = None
+
+    def build_operation(self) -> BooleanOperation:
+        """Builds the boolean operation tree, the tree of a negation shares the tree of the negated expression."""
+        if self.negated is not None:
+            return BooleanOperation.negation(self.negated.operation)
+        return boolean_operation_tree(self.expression)
 
     def copy(self) -> "BExpr":
         """Deep copy of an expression."""
@@ -260,3 +337,62 @@ class BExpr(AbstractExpr):
                 new = expr.copy()
             new_expr.append(new)
         return BExpr(new_expr)
+
+
+class ExpressionTable:
+    """
+    Interning table of the accesses and the expressions of a program graph, an access or an expression is created once
+    and shared by all its occurrences, fx: every Data[right+1] is the same VariableAccess.
+    Equal objects being the same object they are compared with `is` and hashed by identity, they must not be modified.
+    Each object gets the number of objects created before it as id, so results can be kept per expression in a list.
+    """
+    __slots__ = ("accesses", "a_exprs", "b_exprs")
+    accesses: Dict[tuple, VariableAccess]
+    a_exprs: Dict[tuple, AExpr]
+    b_exprs: Dict[tuple, BExpr]
+
+    def __init__(self) -> None:
+        self.accesses = {}
+        self.a_exprs = {}
+        self.b_exprs = {}
+
+    def __len__(self) -> int:
+        return len(self.accesses) + len(self.a_exprs) + len(self.b_exprs)
+
+    def access(self, name: str, variable_type: str, rec_type: str = "", child_accesses: AExpr = None) -> VariableAccess:
+        """Returns the access, child_accesses must come from the table."""
+        key = (name, variable_type, rec_type, child_accesses)
+        access = self.accesses.get(key)
+        if access is None:
+            access = VariableAccess(name, variable_type, rec_type, child_accesses)
+            access.id = len(self)
+            self.accesses[key] = access
+        return access
+
+    def a_expr(self, expression: Iterable[Union[VariableAccess, str]]) -> AExpr:
+        """Returns the arithmetic expression, its accesses must come from the table."""
+        key = tuple(expression)
+        a_expr = self.a_exprs.get(key)
+        if a_expr is None:
+            a_expr = AExpr(key)
+            a_expr.id = len(self)
+            self.a_exprs[key] = a_expr
+        return a_expr
+
+    def b_expr(self, expression: Iterable[Union[AExpr, VariableAccess, str]]) -> BExpr:
+        """Returns the boolean expression, its arithmetic expressions must come from the table."""
+        key = tuple(expression)
+        b_expr = self.b_exprs.get(key)
+        if b_expr is None:
+            b_expr = BExpr(key)
+            b_expr.id = len(self)
+            self.b_exprs[key] = b_expr
+        return b_expr
+
+    def negation(self, b_expr: BExpr) -> BExpr:
+        """Returns not b_expr, sharing the elements of b_expr instead of copying them."""
+        negation = self.b_expr(("not",) + b_expr.expression)
+        # Without & or | the not applies to the whole expression, its tree is a not over the tree of b_expr.
+        if "&" not in b_expr.expression and "|" not in b_expr.expression:
+            negation.negated = b_expr
+        return negation
@@ -0,0 +1,132 @@
+"""Runs analyses on many microC programs with a pool of processes.
+
+Each program is parsed once and solved with every analysis and solver given, one JSON line is written
+per program with the steps and the wall time of each run, fx:
+`python batch.py programs/ --analyses SignDetectionAnalysis --solvers FIFOSolverAlgorithm --output results.jsonl`
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, DequeFIFOSolverAlgorithm,
+                      DequeLIFOSolverAlgorithm, FIFOSolverAlgorithm, LIFOSolverAlgorithm, LiveVariableAnalysis,
+                      LoopNestSolverAlgorithm, ReachingDefintionAnalysis, ReversePostorderSolverAlgorithm,
+                      SignDetectionAnalysis, StronglyConnectedSolverAlgorithm, worklist)
+from Analysis.metrics import Metrics
+from Analysis.solvers import RoundRobinAlgorithm
+from Analysis.utils import jsonable_assignment
+from Parser import ProgramGraph
+
+ANALYSES = {analysis.__name__: analysis for analysis in [
+    ReachingDefintionAnalysis, BitVectorReachingDefintionAnalysis, LiveVariableAnalysis,
+    BitVectorLiveVariableAnalysis, SignDetectionAnalysis]}
+SOLVERS = {algorithm.__name__: algorithm for algorithm in [
+    FIFOSolverAlgorithm, LIFOSolverAlgorithm, RoundRobinAlgorithm, DequeFIFOSolverAlgorithm, DequeLIFOSolverAlgorithm,
+    ReversePostorderSolverAlgorithm, StronglyConnectedSolverAlgorithm, LoopNestSolverAlgorithm]}
+
+
+def program_files(paths: List[str], pattern: str) -> List[str]:
+    """Returns the files of the paths, a path being a file, a glob or a directory searched recursively for pattern."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True)))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            files.extend(sorted(glob.glob(path, recursive=True)))
+    return files
+
+
+def load_parser() -> None:
+    """Initializes a worker, the parser is loaded once when the Parser package is imported."""
+    import Parser.parser
+
+
+def analyse_file(path: str, analyses: List[str], solvers: List[str], assignments: bool = True, metrics: bool = False) -> Dict:
+    """Builds the program graph of a file and solves it with each analysis and solver.
+    With metrics the measures of Analysis.metrics are added to the record.
+    """
+    record = {"program": path}
+    try:
+        start = time.perf_counter()
+        graph_metrics = Metrics() if metrics else None
+        with open(path, "r") as text:
+            program_graph = ProgramGraph(text.read(), metrics=graph_metrics)
+        record["graph_seconds"] = time.perf_counter() - start
+        if metrics:
+            record["graph_metrics"] = graph_metrics.phases
+        record["nodes"] = len(program_graph.nodes)
+        record["edges"] = len(program_graph.edges)
+        record["results"] = {}
+        for analysis in analyses:
+            for solver in solvers:
+                start = time.perf_counter()
+                solve_metrics = Metrics() if metrics else None
+                aa, steps = worklist(program_graph, ANALYSES[analysis], SOLVERS[solver], solve_metrics)
+                result = {"steps": steps, "seconds": time.perf_counter() - start}
+                if assignments:
+                    result["assignment"] = jsonable_assignment(aa)
+                if metrics:
+                    result["metrics"] = solve_metrics.to_dict()
+                record["results"][f"{analysis}/{solver}"] = result
+    except Exception as exception:
+        record["error"] = f"{type(exception).__name__}: {exception}"
+    return record
+
+
+def run_batch(files: List[str], analyses: List[str], solvers: List[str], workers: int = None, assignments: bool = True, metrics: bool = False) -> Iterator[Dict]:
+    """Analyses the files in a pool of workers processes, yields the record of each file in order."""
+    task = partial(analyse_file, analyses=analyses, solvers=solvers, assignments=assignments, metrics=metrics)
+    workers = workers or os.cpu_count() or 1
+    # Several files per task so that small programs do not cost a round trip each.
+    chunksize = max(1, len(files) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_parser) as executor:
+        yield from executor.map(task, files, chunksize=chunksize)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("paths", nargs="+",
+                           help="Program files, directories or glob patterns.")
+    argparser.add_argument("--pattern", default="*.txt",
+                           help="Name pattern of the programs in the directories.")
+    argparser.add_argument("--analyses", nargs="+", default=["SignDetectionAnalysis"], choices=sorted(ANALYSES),
+                           help="Analyses to run on every program.")
+    argparser.add_argument("--solvers", nargs="+", default=["FIFOSolverAlgorithm"], choices=sorted(SOLVERS),
+                           help="Worklist algorithms to solve every analysis with.")
+    argparser.add_argument("--workers", type=int, default=None,
+                           help="Number of worker processes, the number of cores by default.")
+    argparser.add_argument("--output", default=None,
+                           help="JSON lines file to write, the standard output by default.")
+    argparser.add_argument("--no-assignments", action="store_true",
+                           help="Only write the steps and the timings, not the solved assignments.")
+    argparser.add_argument("--metrics", action="store_true",
+                           help="Add the phase timings, the calls to the analyses and the worklist measures.")
+    args = argparser.parse_args()
+
+    files = program_files(args.paths, args.pattern)
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    errors = 0
+    try:
+        for record in run_batch(files, args.analyses, args.solvers, args.workers, not args.no_assignments,
+                                args.metrics):
+            errors += "error" in record
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} programs, {errors} errors, {elapsed:.2f}s, {len(files) / elapsed:.1f} programs/s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
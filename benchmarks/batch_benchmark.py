@@ -0,0 +1,48 @@
+"""Measures the throughput of the batch analysis for an increasing number of worker processes.
+
+The corpus is written to a temporary directory, programs of 1 to 8 copies of microCCode.txt.
+Run from the root of the repository: `python -m benchmarks.batch_benchmark`
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from batch import run_batch
+
+from .parser_benchmark import synthetic_program
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--programs", type=int, default=64,
+                           help="Number of programs in the corpus.")
+    argparser.add_argument("--workers", type=int, nargs="*", default=None,
+                           help="Numbers of worker processes, powers of two up to the number of cores by default.")
+    args = argparser.parse_args()
+
+    workers = args.workers
+    if workers is None:
+        workers = [1]
+        while workers[-1] * 2 <= (os.cpu_count() or 1):
+            workers.append(workers[-1] * 2)
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for index in range(args.programs):
+            path = os.path.join(directory, f"program{index}.txt")
+            with open(path, "w") as program:
+                program.write(synthetic_program(1 + index % 8))
+            files.append(path)
+        base = None
+        for count in workers:
+            start = time.perf_counter()
+            records = list(run_batch(files, ["BitVectorReachingDefintionAnalysis", "SignDetectionAnalysis"],
+                                     ["DequeFIFOSolverAlgorithm"], count, assignments=False))
+            elapsed = time.perf_counter() - start
+            assert all("error" not in record for record in records)
+            base = base or elapsed
+            print(f"{count} workers: {len(files) / elapsed:.1f} programs/s, {base / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Compares the time and the peak memory of the two ways of building a program graph.
+
+Run from the root of the repository: `python -m benchmarks.build_benchmark`
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Tuple
+
+from Parser import ProgramGraph
+
+from .parser_benchmark import synthetic_program
+
+
+def measure(program: str, inline: bool) -> Tuple[float, int, int]:
+    """Builds the program graph and returns the wall time, the peak memory and the number of edges."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    program_graph = ProgramGraph(program, inline=inline)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(program_graph.edges)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[1, 10, 50],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    args = argparser.parse_args()
+
+    for copies in args.sizes:
+        program = synthetic_program(copies)
+        for inline in [False, True]:
+            elapsed, peak, edges = measure(program, inline)
+            mode = "inline" if inline else "tree"
+            print(f"{copies} copies, {mode}: {elapsed:.4f}s, peak {peak / 1024:.0f} KiB, "
+                  f"{peak / edges:.0f} bytes per edge")
+
+
+if __name__ == "__main__":
+    main()
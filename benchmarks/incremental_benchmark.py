@@ -0,0 +1,114 @@
+"""Compares solving a program again after a one statement edit with the incremental analysis.
+
+The edits change an assignment in the middle of the synthetic programs, the incremental time is
+the mean of the edit and of the update back to the original program.
+With --check random edits of generated programs are solved incrementally by the distributive analyses,
+it exits with 1 if a result differs from solving the edited program from scratch.
+Run from the root of the repository: `python -m benchmarks.incremental_benchmark`
+"""
+import argparse
+import random
+import sys
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, DequeFIFOSolverAlgorithm,
+                      LiveVariableAnalysis, ReachingDefintionAnalysis, SignDetectionAnalysis, worklist)
+from Analysis.incremental import IncrementalAnalysis
+from Parser import ProgramGraph
+from Parser.program_edit import statement_texts
+
+from .parser_benchmark import best_time, synthetic_program
+from .solver_benchmark import check_programs, comparable
+
+ANALYSES = [BitVectorReachingDefintionAnalysis,
+            BitVectorLiveVariableAnalysis, SignDetectionAnalysis]
+# The statement edited and what it is replaced with.
+STATEMENT = "b := 4;"
+EDITS = {
+    "same signs": ["b := 5;"],
+    "new sign": ["b := 0;"],
+    "insertion": [STATEMENT, "c := 1;"],
+}
+
+
+def edited_program(program: str, replacement: list) -> str:
+    """Replaces the occurrence of STATEMENT in the middle of the program."""
+    texts = statement_texts(program)
+    occurrences = [index for index, text in enumerate(texts) if text == STATEMENT]
+    index = occurrences[len(occurrences) // 2]
+    return "\n".join(texts[:index] + replacement + texts[index + 1:])
+
+
+def random_edit(texts: list, rng: random.Random) -> list:
+    """Deletes, inserts or replaces a statement, the declarations are kept."""
+    statements = [text for text in texts if not text.startswith(("int", "{"))]
+    edited = list(texts)
+    index = rng.randrange(len(edited))
+    operation = rng.choice(["delete", "insert", "replace"])
+    if operation == "insert":
+        edited.insert(index, rng.choice(statements))
+    elif not edited[index].startswith(("int", "{")):
+        if operation == "delete":
+            del edited[index]
+        else:
+            edited[index] = rng.choice(statements)
+    return edited
+
+
+def check(programs: int, edits: int = 10) -> int:
+    """Returns the number of incremental updates differing from solving the edited program from scratch."""
+    mismatches = 0
+    rng = random.Random(0)
+    for program in check_programs(programs):
+        for analysis in [BitVectorReachingDefintionAnalysis, BitVectorLiveVariableAnalysis,
+                         ReachingDefintionAnalysis, LiveVariableAnalysis]:
+            texts = statement_texts(program)
+            incremental = IncrementalAnalysis(program, analysis)
+            for _ in range(edits):
+                texts = random_edit(texts, rng)
+                edited = "\n".join(texts)
+                aa, _ = incremental.update(edited)
+                reference, _ = worklist(ProgramGraph(edited), analysis, DequeFIFOSolverAlgorithm)
+                if {node: comparable(mapping) for node, mapping in aa.items()} != \
+                        {node: comparable(mapping) for node, mapping in reference.items()}:
+                    mismatches += 1
+                    print(f"{analysis.__name__} differs after an edit")
+    return mismatches
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[4, 16, 64],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--repeat", type=int, default=5,
+                           help="Number of runs, the best one is reported.")
+    argparser.add_argument("--check", type=int, nargs="?", const=10, metavar="PROGRAMS",
+                           help="Check the incremental results on edits of PROGRAMS generated programs instead.")
+    args = argparser.parse_args()
+
+    if args.check is not None:
+        mismatches = check(args.check)
+        print(f"{mismatches} results differ")
+        return 1 if mismatches > 0 else 0
+
+    for copies in args.sizes:
+        program = "\n".join(statement_texts(synthetic_program(copies)))
+        print(f"{copies} copies, {len(ProgramGraph(program).nodes)} nodes")
+        for analysis in ANALYSES:
+            incremental = IncrementalAnalysis(program, analysis)
+            print(f"  {analysis.__name__}")
+            for name, replacement in EDITS.items():
+                edited = edited_program(program, replacement)
+                _, full_steps = worklist(ProgramGraph(edited), analysis, DequeFIFOSolverAlgorithm)
+                full_time = best_time(lambda: worklist(ProgramGraph(edited), analysis, DequeFIFOSolverAlgorithm),
+                                      args.repeat)
+                _, steps = incremental.update(edited)
+                incremental.update(program)
+                incremental_time = best_time(lambda: (incremental.update(edited), incremental.update(program)),
+                                             args.repeat) / 2
+                print(f"    {name}: full {full_time * 1000:.1f} ms ({full_steps} steps), "
+                      f"incremental {incremental_time * 1000:.1f} ms ({steps} steps), "
+                      f"{full_time / incremental_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
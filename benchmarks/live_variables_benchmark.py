@@ -0,0 +1,43 @@
+"""Shows how the memory of the live variables analyses grows with the number of nodes.
+
+Run from the root of the repository: `python -m benchmarks.live_variables_benchmark`
+"""
+import argparse
+import time
+import tracemalloc
+
+from Analysis import BitVectorLiveVariableAnalysis, FIFOSolverAlgorithm, LiveVariableAnalysis, worklist
+from Parser import ProgramGraph
+
+from .parser_benchmark import synthetic_program
+
+
+def measure(program_graph: ProgramGraph, analysis) -> str:
+    """Solves the analysis and describes its wall time and its peak memory per node."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, steps = worklist(program_graph, analysis, FIFOSolverAlgorithm)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return f"{steps} steps, {elapsed:.3f}s, peak {peak / 1024:.0f} KiB ({peak / len(program_graph.nodes):.0f} bytes per node)"
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[1, 2, 4],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--skip-legacy", action="store_true",
+                           help="Only run the per node analysis, the legacy one is quadratic.")
+    args = argparser.parse_args()
+
+    for copies in args.sizes:
+        program_graph = ProgramGraph(synthetic_program(copies))
+        print(f"{copies} copies, {len(program_graph.nodes)} nodes")
+        if not args.skip_legacy:
+            print(f"  LiveVariableAnalysis: {measure(program_graph, LiveVariableAnalysis)}")
+        print(f"  BitVectorLiveVariableAnalysis: {measure(program_graph, BitVectorLiveVariableAnalysis)}")
+
+
+if __name__ == "__main__":
+    main()
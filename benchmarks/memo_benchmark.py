@@ -0,0 +1,91 @@
+"""Measures the memoization of the transfer functions of the sign detection.
+
+The memo only hits when an edge receives a state it has seen before: when a graph is solved again with the same memo,
+or when the incremental analysis solves the downstream statements again after an edit. It is measured with the
+compiled transfer functions and with transfer functions calling update_mapping.
+With --check the memoized analyses are solved twice with the same memo on generated programs with every algorithm on
+both graph forms, it exits with 1 if a result or a number of steps differs from the analysis without memo.
+Run from the root of the repository: `python -m benchmarks.memo_benchmark`
+"""
+import argparse
+import sys
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, DequeFIFOSolverAlgorithm,
+                      SignDetectionAnalysis, worklist)
+from Analysis.abstract_analysis import AbstractAnalysis
+from Analysis.incremental import IncrementalAnalysis
+from Analysis.memo import TransferMemo, memoized_analysis
+from Parser import CompactProgramGraph, ProgramGraph
+from Parser.program_edit import statement_texts
+
+from .incremental_benchmark import EDITS, edited_program
+from .parser_benchmark import best_time, synthetic_program
+from .solver_benchmark import ALGORITHMS, check_programs, comparable
+
+
+class UpdateMappingSignDetection(SignDetectionAnalysis):
+    """The sign detection with transfer functions calling update_mapping."""
+    compile_edge = classmethod(AbstractAnalysis.compile_edge.__func__)
+
+
+def check(programs: int) -> int:
+    """Returns the number of solves of the memoized analyses differing from the analyses without memo."""
+    mismatches = 0
+    for program in check_programs(programs):
+        program_graph = ProgramGraph(program)
+        for graph in [program_graph, CompactProgramGraph(program_graph)]:
+            for analysis in [SignDetectionAnalysis, BitVectorReachingDefintionAnalysis, BitVectorLiveVariableAnalysis]:
+                for algorithm in ALGORITHMS:
+                    aa, steps = worklist(graph, analysis, algorithm)
+                    reference = {node: comparable(mapping) for node, mapping in aa.items()}, steps
+                    memoized = memoized_analysis(analysis, TransferMemo())
+                    # The second solve gets its transfers from the memo.
+                    for _ in range(2):
+                        aa, steps = worklist(graph, memoized, algorithm)
+                        if ({node: comparable(mapping) for node, mapping in aa.items()}, steps) != reference:
+                            mismatches += 1
+                            print(f"{analysis.__name__} with {algorithm.__name__} on the {type(graph).__name__} "
+                                  f"differs when memoized")
+    return mismatches
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--copies", type=int, default=64,
+                           help="Number of copies of microCCode.txt in the synthetic program.")
+    argparser.add_argument("--size", type=int, default=65536,
+                           help="Number of entries of the memo.")
+    argparser.add_argument("--repeat", type=int, default=5,
+                           help="Number of runs, the best one is reported.")
+    argparser.add_argument("--check", type=int, nargs="?", const=10, metavar="PROGRAMS",
+                           help="Check the results of the memoized analyses on PROGRAMS generated programs instead.")
+    args = argparser.parse_args()
+
+    if args.check is not None:
+        mismatches = check(args.check)
+        print(f"{mismatches} results differ")
+        return 1 if mismatches > 0 else 0
+
+    program = "\n".join(statement_texts(synthetic_program(args.copies)))
+    program_graph = ProgramGraph(program)
+    for analysis in [SignDetectionAnalysis, UpdateMappingSignDetection]:
+        print(analysis.__name__)
+        memo = TransferMemo(args.size)
+        memoized = memoized_analysis(analysis, memo)
+        plain_time = best_time(lambda: worklist(program_graph, analysis, DequeFIFOSolverAlgorithm), args.repeat)
+        worklist(program_graph, memoized, DequeFIFOSolverAlgorithm)
+        memo_time = best_time(lambda: worklist(program_graph, memoized, DequeFIFOSolverAlgorithm), args.repeat)
+        print(f"  solved again: {plain_time * 1000:.1f} ms, memoized {memo_time * 1000:.1f} ms, {memo.stats()}")
+        for name, replacement in EDITS.items():
+            edited = edited_program(program, replacement)
+            memo = TransferMemo(args.size)
+            plain = IncrementalAnalysis(program, analysis)
+            incremental = IncrementalAnalysis(program, memoized_analysis(analysis, memo))
+            plain_time = best_time(lambda: (plain.update(edited), plain.update(program)), args.repeat) / 2
+            memo_time = best_time(lambda: (incremental.update(edited), incremental.update(program)), args.repeat) / 2
+            print(f"  {name}: incremental {plain_time * 1000:.1f} ms, memoized {memo_time * 1000:.1f} ms, "
+                  f"{memo.hits} hits, {memo.misses} misses")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Reports the memory retained by a program graph, in bytes per edge.
+
+Run from the root of the repository: `python -m benchmarks.memory_benchmark`
+"""
+import argparse
+import gc
+import tracemalloc
+
+from Parser import ProgramGraph
+
+from .parser_benchmark import synthetic_program
+
+
+def retained_memory(program: str, operations: bool) -> int:
+    """Builds the program graph and returns the memory it retains.
+    With operations the operation trees of all the expressions are built too, as the sign analysis does.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    program_graph = ProgramGraph(program)
+    if operations:
+        for edge in program_graph.edges:
+            expression = edge.action.right_expression
+            if expression is not None and len(expression.expression) > 1:
+                expression.operation
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) // len(program_graph.edges)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[10, 50],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    args = argparser.parse_args()
+
+    # Warms up the caches of the parser so they are not counted.
+    ProgramGraph(synthetic_program(1))
+    for copies in args.sizes:
+        program = synthetic_program(copies)
+        print(f"{copies} copies: {retained_memory(program, False)} bytes per edge, "
+              f"{retained_memory(program, True)} with all the operation trees")
+
+
+if __name__ == "__main__":
+    main()
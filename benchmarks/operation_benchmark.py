@@ -0,0 +1,61 @@
+"""Times building the operation trees of long arithmetic expressions and boolean conditions.
+
+The trees are built in one pass, so the time per operator should not grow with the length.
+Run from the root of the repository: `python -m benchmarks.operation_benchmark`
+"""
+import argparse
+import random
+
+from Parser.struc_elements import AExpr, BExpr, VariableAccess
+
+from .parser_benchmark import best_time
+
+A_OPERATORS = ["+", "-", "*", "/", "%"]
+R_OPERATORS = ["<", "<=", ">", ">=", "==", "!="]
+
+
+def arithmetic_expression(operators: int, rng: random.Random) -> list:
+    """A flat arithmetic expression with the given number of operators."""
+    operands = [VariableAccess(name, "variable") for name in ["a", "b", "c"]] + ["1", "-2"]
+    expression = [rng.choice(operands)]
+    for _ in range(operators):
+        expression.append(rng.choice(A_OPERATORS))
+        expression.append(rng.choice(operands))
+    return expression
+
+
+def boolean_expression(operators: int, rng: random.Random) -> list:
+    """A flat condition with the given number of &, | and not, each comparison having a short arithmetic expression."""
+    expression = []
+    for index in range(operators + 1):
+        if index > 0:
+            expression.append(rng.choice(["&", "|"]))
+        if rng.random() < 0.3:
+            expression.append("not")
+        expression.extend([AExpr(arithmetic_expression(2, rng)), rng.choice(R_OPERATORS), AExpr(["0"])])
+    return expression
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--operators", type=int, nargs="*", default=[10, 100, 1000, 10000],
+                           help="Number of operators of the expressions.")
+    argparser.add_argument("--repeat", type=int, default=5,
+                           help="Number of runs, the best one is reported.")
+    args = argparser.parse_args()
+
+    rng = random.Random(0)
+    for operators in args.operators:
+        arithmetic = arithmetic_expression(operators, rng)
+        boolean = boolean_expression(operators, rng)
+        # New expressions are created every time, an expression keeping its tree once built.
+        arithmetic_time = best_time(lambda: AExpr(arithmetic).operation, args.repeat)
+        boolean_time = best_time(lambda: BExpr([AExpr(expr.expression) if isinstance(expr, AExpr) else expr
+                                                for expr in boolean]).operation, args.repeat)
+        print(f"{operators} operators, arithmetic: {arithmetic_time * 1e3:.3f}ms "
+              f"({arithmetic_time / operators * 1e6:.2f}us per operator), boolean: {boolean_time * 1e3:.3f}ms "
+              f"({boolean_time / operators * 1e6:.2f}us per operator)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Compares the LALR parser against the former Earley parser.
+
+Run from the root of the repository: `python -m benchmarks.parser_benchmark`
+"""
+import argparse
+import subprocess
+import sys
+import time
+from typing import Callable
+
+from lark import Lark
+
+from Parser.parser import GRAMMAR
+
+# The ambiguous grammar that was parsed with Earley before the LALR rewrite.
+LEGACY_GRAMMAR = r"""
+    %import common.SIGNED_NUMBER -> NUMBER
+    %import common.ESCAPED_STRING -> STRING
+    %import common.CNAME -> CNAME
+    %import common.WS
+    %ignore WS
+
+    program: (statement | declaration)*
+    declaration: var_declare
+                | arr_declare
+                | rec_declare
+    var_declare: "int" variable";"
+    arr_declare: "int["NUMBER"] " variable";"
+    rec_declare: "{int fst; int snd} " variable";"
+    statement: (assignment
+            | if
+            | else
+            | while
+            | read
+            | write)*
+    if: "if ("b_expr") {" statement "}"
+    else: "if ("b_expr") {" statement "} else {"statement"}"
+    while: "while ("b_expr") {" statement "}"
+    read: "read " access";"
+    write: "write " access";"
+    access: array_access
+          | record_access
+          | variable
+    array_access: variable "["(access | NUMBER | a_expr)"]"
+    record_access: record_fst_access
+                 | record_snd_access
+    record_fst_access: variable ".fst"
+    record_snd_access: variable ".snd"
+    assignment: access ":="a_expr";"
+    variable: CNAME
+    ?value: NUMBER
+    | access
+    | array
+    | record
+
+    array: "[" [value ("," value)*] "]"
+    record: "(" value "," value ")"
+
+    b_expr: "true" -> true
+          | "false" -> false
+          | a_expr opr a_expr
+          | b_expr opb b_expr
+          | not
+    not: "not" b_expr
+    a_expr: a_expr opa a_expr
+        | access
+        | NUMBER
+    opa: add
+            | sub
+            | mul
+            | div
+            | mod
+    add : "+"
+    sub: "-"
+    mul: "*"
+    div: "/"
+    mod: "%"
+    opb: and
+        | or
+    and: "&"
+    or: "|"
+    opr: inf
+        | infe
+        | sup
+        | supe
+        | eq
+        | neq
+    inf: "<"
+    infe: "<="
+    sup: ">"
+    supe: ">="
+    eq: "=="
+    neq: "!="
+"""
+
+
+def synthetic_program(copies: int) -> str:
+    """Builds a large program by repeating the statements of microCCode.txt."""
+    with open("microCCode.txt", "r") as text:
+        program = text.read()
+    declarations, statements = [], []
+    for line in program.splitlines(keepends=True):
+        if line.startswith("int") or line.startswith("{int"):
+            declarations.append(line)
+        else:
+            statements.append(line)
+    return "".join(declarations) + "\n".join(["".join(statements)] * copies)
+
+
+def best_time(function: Callable, repeat: int) -> float:
+    """Returns the best wall time of repeat calls to function."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def import_time() -> float:
+    """Time needed by a fresh interpreter to import the Parser package, without the interpreter startup."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import Parser"], check=True)
+    return time.perf_counter() - start - startup
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[1, 5, 20],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--skip-earley", action="store_true",
+                           help="Only time the LALR parser, Earley is very slow on large inputs.")
+    args = argparser.parse_args()
+
+    start = time.perf_counter()
+    lalr = Lark(GRAMMAR, start="program", parser="lalr")
+    print(f"LALR grammar compilation: {time.perf_counter() - start:.4f}s")
+    start = time.perf_counter()
+    Lark(GRAMMAR, start="program", parser="lalr", cache=True)
+    print(f"LALR grammar loaded from cache: {time.perf_counter() - start:.4f}s")
+    print(f"import Parser in a new process: {import_time():.4f}s")
+    earley = None
+    if not args.skip_earley:
+        start = time.perf_counter()
+        earley = Lark(LEGACY_GRAMMAR, start="program")
+        print(f"Earley grammar compilation: {time.perf_counter() - start:.4f}s")
+
+    for copies in args.sizes:
+        program = synthetic_program(copies)
+        lines = program.count("\n") + 1
+        lalr_time = best_time(lambda: lalr.parse(program), args.repeat)
+        line = f"{copies} copies ({lines} lines): LALR {lalr_time:.4f}s"
+        if earley is not None:
+            earley_time = best_time(lambda: earley.parse(program), args.repeat)
+            line += f", Earley {earley_time:.4f}s, speedup x{earley_time / lalr_time:.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
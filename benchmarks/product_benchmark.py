@@ -0,0 +1,80 @@
+"""Compares solving analyses one by one with solving them as products, one worklist pass per direction.
+
+With --check the products are solved on generated programs with every algorithm on both graph forms,
+it exits with 1 if the result of an analysis differs from solving it alone.
+Run from the root of the repository: `python -m benchmarks.product_benchmark`
+"""
+import argparse
+import sys
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, DequeFIFOSolverAlgorithm,
+                      LiveVariableAnalysis, LoopNestSolverAlgorithm, ReachingDefintionAnalysis, SignDetectionAnalysis,
+                      worklist)
+from Analysis.product import product_worklist
+from Parser import CompactProgramGraph, ProgramGraph
+
+from .parser_benchmark import best_time, synthetic_program
+from .solver_benchmark import ALGORITHMS, check_programs, comparable
+
+ANALYSES = [BitVectorReachingDefintionAnalysis,
+            SignDetectionAnalysis, BitVectorLiveVariableAnalysis]
+CHECKED_ANALYSES = ANALYSES + [ReachingDefintionAnalysis, LiveVariableAnalysis]
+
+
+def separately(program_graph, algorithm) -> int:
+    """Solves the analyses one after the other, returns the total number of steps."""
+    return sum(worklist(program_graph, analysis, algorithm)[1] for analysis in ANALYSES)
+
+
+def check(programs: int) -> int:
+    """Returns the number of results of the analyses solved in products differing from solving them alone."""
+    mismatches = 0
+    for program in check_programs(programs):
+        program_graph = ProgramGraph(program)
+        for graph in [program_graph, CompactProgramGraph(program_graph)]:
+            for algorithm in ALGORITHMS:
+                results, _ = product_worklist(graph, CHECKED_ANALYSES, algorithm)
+                for analysis in CHECKED_ANALYSES:
+                    aa, _ = worklist(graph, analysis, algorithm)
+                    if {node: comparable(mapping) for node, mapping in results[analysis].items()} != \
+                            {node: comparable(mapping) for node, mapping in aa.items()}:
+                        mismatches += 1
+                        print(f"{analysis.__name__} with {algorithm.__name__} on the {type(graph).__name__} "
+                              f"differs from solving it alone")
+    return mismatches
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[1, 16, 64],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--compact", action="store_true",
+                           help="Solve on the CompactProgramGraph of the programs.")
+    argparser.add_argument("--repeat", type=int, default=3,
+                           help="Number of runs, the best one is reported.")
+    argparser.add_argument("--check", type=int, nargs="?", const=10, metavar="PROGRAMS",
+                           help="Check the results of the products on PROGRAMS generated programs instead.")
+    args = argparser.parse_args()
+
+    if args.check is not None:
+        mismatches = check(args.check)
+        print(f"{mismatches} results differ")
+        return 1 if mismatches > 0 else 0
+
+    print(f"Analyses: {', '.join(analysis.__name__ for analysis in ANALYSES)}")
+    for copies in args.sizes:
+        program_graph = ProgramGraph(synthetic_program(copies))
+        print(f"{copies} copies, {len(program_graph.nodes)} nodes")
+        if args.compact:
+            program_graph = CompactProgramGraph(program_graph)
+        for algorithm in [DequeFIFOSolverAlgorithm, LoopNestSolverAlgorithm]:
+            steps = separately(program_graph, algorithm)
+            separate_time = best_time(lambda: separately(program_graph, algorithm), args.repeat)
+            _, product_steps = product_worklist(program_graph, ANALYSES, algorithm)
+            product_time = best_time(lambda: product_worklist(program_graph, ANALYSES, algorithm), args.repeat)
+            print(f"  {algorithm.__name__}: separately {steps} steps, {separate_time:.3f}s, "
+                  f"product {product_steps} steps, {product_time:.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Generates random microC programs of a given shape, the same parameters and seed always give the same program.
+
+Run from the root of the repository, fx: `python -m benchmarks.program_generator --statements 500 --depth 4 > program.txt`
+"""
+import argparse
+import random
+from typing import List
+
+
+class ProgramGenerator:
+    """
+    Builds the text of a program accepted by the grammar of Parser/parser.py, every variable used is declared.
+    variables, arrays, records: int the number of each kind of declaration.
+    statements: int the number of statements, the statements nested in ifs and whiles included.
+    depth: int the maximal nesting of whiles and ifs.
+    fan_out: int the number of branches of a conditional, a chain of if else.
+    expression_depth: int the maximal number of operators of an expression, array indices holding expressions one less deep.
+    """
+    OPA = ["+", "-", "*", "/", "%"]
+    OPR = ["<", "<=", ">", ">=", "==", "!="]
+    OPB = ["&", "|"]
+
+    def __init__(self, variables: int = 8, arrays: int = 2, records: int = 2, statements: int = 100, depth: int = 3,
+                 fan_out: int = 2, expression_depth: int = 2, seed: int = 0) -> None:
+        if variables < 1:
+            raise Exception("A program needs at least one variable.")
+        self.variables = [f"v{index}" for index in range(variables)]
+        self.arrays = [f"A{index}" for index in range(arrays)]
+        self.records = [f"R{index}" for index in range(records)]
+        self.statements = statements
+        self.depth = depth
+        self.fan_out = max(1, fan_out)
+        self.expression_depth = expression_depth
+        self.random = random.Random(seed)
+
+    def number(self) -> str:
+        return str(self.random.choice([0, 1, 2, 5, 10, 100, -1, -7]))
+
+    def access(self, depth: int) -> str:
+        """A variable, an array element or a record field."""
+        kinds = ["variable"] * 3 + ["array"] * bool(self.arrays) + ["record"] * bool(self.records)
+        kind = self.random.choice(kinds)
+        if kind == "array":
+            return f"{self.random.choice(self.arrays)}[{self.a_expr(depth - 1)}]"
+        if kind == "record":
+            return f"{self.random.choice(self.records)}.{self.random.choice(['fst', 'snd'])}"
+        return self.random.choice(self.variables)
+
+    def a_expr(self, depth: int) -> str:
+        depth = max(depth, 0)
+        atoms = [self.access(depth) if self.random.random() < 0.6 else self.number()
+                 for _ in range(self.random.randint(1, depth + 1))]
+        return " ".join(atom if index == 0 else f"{self.random.choice(self.OPA)} {atom}"
+                        for index, atom in enumerate(atoms))
+
+    def b_expr(self) -> str:
+        atoms = []
+        for _ in range(self.random.randint(1, max(1, self.expression_depth))):
+            atom = f"{self.a_expr(self.expression_depth - 1)} {self.random.choice(self.OPR)} {self.a_expr(self.expression_depth - 1)}"
+            if self.random.random() < 0.1:
+                atom = "not " + atom
+            atoms.append(atom)
+        return " ".join(atom if index == 0 else f"{self.random.choice(self.OPB)} {atom}"
+                        for index, atom in enumerate(atoms))
+
+    def simple(self) -> str:
+        kind = self.random.random()
+        if kind < 0.7:
+            return f"{self.access(self.expression_depth)} := {self.a_expr(self.expression_depth)};"
+        if kind < 0.85:
+            return f"read {self.access(self.expression_depth)};"
+        return f"write {self.access(self.expression_depth)};"
+
+    def block(self, budget: int, depth: int, indent: str) -> List[str]:
+        """Returns the lines of a sequence of budget statements."""
+        lines = []
+        while budget > 0:
+            budget -= 1
+            if depth >= self.depth or budget == 0 or self.random.random() < 0.6:
+                lines.append(indent + self.simple())
+                continue
+            body = self.random.randint(1, budget)
+            budget -= body
+            if self.random.random() < 0.5:
+                lines.append(f"{indent}while ({self.b_expr()}) {{")
+                lines.extend(self.block(body, depth + 1, indent + "    "))
+                lines.append(indent + "}")
+            else:
+                lines.extend(self.conditional(body, depth, indent))
+        return lines
+
+    def conditional(self, budget: int, depth: int, indent: str) -> List[str]:
+        """Returns the lines of a chain of ifs with fan_out branches sharing the budget."""
+        branches = min(budget, self.fan_out if self.random.random() < 0.8 else 1)
+        lines = [f"{indent}if ({self.b_expr()}) {{"]
+        for branch in range(branches):
+            body = max(1, budget // (branches - branch))
+            budget -= body
+            lines.extend(self.block(body, depth + 1, indent + "    "))
+            if branch < branches - 2:
+                lines.append(f"{indent}}} else {{ if ({self.b_expr()}) {{")
+            elif branch == branches - 2:
+                lines.append(f"{indent}}} else {{")
+        lines.append(indent + "}" * (1 + max(0, branches - 2)))
+        return lines
+
+    def program(self) -> str:
+        declarations = [f"int {name};" for name in self.variables]
+        declarations += [f"int[{self.random.randint(1, 100)}] {name};" for name in self.arrays]
+        declarations += [f"{{int fst; int snd}} {name};" for name in self.records]
+        return "\n".join(declarations + self.block(self.statements, 0, "")) + "\n"
+
+
+def generate_program(variables: int = 8, arrays: int = 2, records: int = 2, statements: int = 100, depth: int = 3,
+                     fan_out: int = 2, expression_depth: int = 2, seed: int = 0) -> str:
+    """Returns a random program, see ProgramGenerator for the parameters."""
+    return ProgramGenerator(variables, arrays, records, statements, depth, fan_out, expression_depth, seed).program()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--variables", type=int, default=8)
+    argparser.add_argument("--arrays", type=int, default=2)
+    argparser.add_argument("--records", type=int, default=2)
+    argparser.add_argument("--statements", type=int, default=100)
+    argparser.add_argument("--depth", type=int, default=3,
+                           help="Maximal nesting of the whiles and ifs.")
+    argparser.add_argument("--fan-out", type=int, default=2,
+                           help="Number of branches of the conditionals.")
+    argparser.add_argument("--expression-depth", type=int, default=2,
+                           help="Maximal number of operators of an expression.")
+    argparser.add_argument("--seed", type=int, default=0)
+    args = argparser.parse_args()
+    print(generate_program(args.variables, args.arrays, args.records, args.statements, args.depth, args.fan_out,
+                           args.expression_depth, args.seed), end="")
+
+
+if __name__ == "__main__":
+    main()
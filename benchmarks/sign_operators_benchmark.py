@@ -0,0 +1,95 @@
+"""Compares the abstract sign operators on sets of strings with the bitmask tables.
+
+Every operator is evaluated on all the pairs of non empty sign sets.
+Run from the root of the repository: `python -m benchmarks.sign_operators_benchmark`
+"""
+import argparse
+from itertools import combinations
+
+from Analysis.SignDetection.abstract_sign_operators import abstract_arithmetic, relational
+from Analysis.SignDetection.sign_lattice import (ARITHMETIC_FUNCTIONS, ARITHMETIC_TABLES, RELATIONAL_OPERATORS,
+                                                 RELATIONAL_TABLES, SIGN_BITS, SIZE, decode, encode)
+
+from .parser_benchmark import best_time
+
+SIGN_SETS = [set(signs) for size in range(1, len(SIGN_BITS) + 1)
+             for signs in combinations(SIGN_BITS, size)]
+
+
+def set_relational(operator: str, left_signs: set, right_signs: set):
+    """The relational operator on sets, as the sign analysis evaluated it before the tables."""
+    possible_left_signs = set()
+    possible_right_signs = set()
+    for left_sign in left_signs:
+        for right_sign in right_signs:
+            if "tt" in relational(operator, left_sign, right_sign):
+                possible_left_signs.add(left_sign)
+                possible_right_signs.add(right_sign)
+    return possible_left_signs, possible_right_signs
+
+
+def sets_arithmetic():
+    for fct in ARITHMETIC_FUNCTIONS.values():
+        for left in SIGN_SETS:
+            for right in SIGN_SETS:
+                abstract_arithmetic(left, right, fct)
+
+
+def bits_arithmetic(bitmasks):
+    def run():
+        for table in ARITHMETIC_TABLES.values():
+            for left in bitmasks:
+                for right in bitmasks:
+                    table[left * SIZE + right]
+    return run
+
+
+def sets_relational():
+    for operator in RELATIONAL_OPERATORS:
+        for left in SIGN_SETS:
+            for right in SIGN_SETS:
+                set_relational(operator, left, right)
+
+
+def bits_relational(bitmasks):
+    def run():
+        for table in RELATIONAL_TABLES.values():
+            for left in bitmasks:
+                for right in bitmasks:
+                    table[left * SIZE + right]
+    return run
+
+
+def check(bitmasks):
+    """Checks that the tables give the same results as the operators on sets."""
+    for operator, fct in ARITHMETIC_FUNCTIONS.items():
+        for left, left_bits in zip(SIGN_SETS, bitmasks):
+            for right, right_bits in zip(SIGN_SETS, bitmasks):
+                assert decode(ARITHMETIC_TABLES[operator][left_bits * SIZE + right_bits]) == \
+                    abstract_arithmetic(left, right, fct), (operator, left, right)
+    for operator in RELATIONAL_OPERATORS:
+        for left, left_bits in zip(SIGN_SETS, bitmasks):
+            for right, right_bits in zip(SIGN_SETS, bitmasks):
+                possible_left, possible_right = RELATIONAL_TABLES[operator][left_bits * SIZE + right_bits]
+                assert (decode(possible_left), decode(possible_right)) == \
+                    set_relational(operator, left, right), (operator, left, right)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=20,
+                           help="Number of runs, the best one is reported.")
+    args = argparser.parse_args()
+
+    bitmasks = [encode(signs) for signs in SIGN_SETS]
+    check(bitmasks)
+    for name, sets, bits in [("arithmetic", sets_arithmetic, bits_arithmetic(bitmasks)),
+                             ("relational", sets_relational, bits_relational(bitmasks))]:
+        sets_time = best_time(sets, args.repeat)
+        bits_time = best_time(bits, args.repeat)
+        print(f"{name}: sets {sets_time * 1000:.2f} ms, bitmasks {bits_time * 1000:.2f} ms, "
+              f"{sets_time / bits_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
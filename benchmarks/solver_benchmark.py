@@ -0,0 +1,105 @@
+"""Compares the steps and the wall time of the worklist algorithms.
+
+The results are checked against the first algorithm. The sign detection is not distributive,
+its result can depend on the order of the visits.
+With --check the distributive analyses are solved on generated programs with every algorithm on both graph forms,
+it exits with 1 if a result differs from the first algorithm on the program graph.
+
+Run from the root of the repository: `python -m benchmarks.solver_benchmark`
+"""
+import argparse
+import sys
+import time
+from typing import List
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, DequeFIFOSolverAlgorithm,
+                      DequeLIFOSolverAlgorithm, FIFOSolverAlgorithm, LIFOSolverAlgorithm, LiveVariableAnalysis,
+                      LoopNestSolverAlgorithm, ReachingDefintionAnalysis, ReversePostorderSolverAlgorithm,
+                      SignDetectionAnalysis, StronglyConnectedSolverAlgorithm, worklist)
+from Analysis.solvers import RoundRobinAlgorithm
+from Parser import CompactProgramGraph, ProgramGraph
+
+from .parser_benchmark import synthetic_program
+from .program_generator import generate_program
+
+ANALYSES = [BitVectorReachingDefintionAnalysis,
+            BitVectorLiveVariableAnalysis, SignDetectionAnalysis]
+LEGACY_ANALYSES = [ReachingDefintionAnalysis,
+                   LiveVariableAnalysis, SignDetectionAnalysis]
+# The analyses whose result does not depend on the order of the visits.
+DISTRIBUTIVE_ANALYSES = [BitVectorReachingDefintionAnalysis, BitVectorLiveVariableAnalysis,
+                         ReachingDefintionAnalysis, LiveVariableAnalysis]
+ALGORITHMS = [FIFOSolverAlgorithm, LIFOSolverAlgorithm, RoundRobinAlgorithm, DequeFIFOSolverAlgorithm,
+              DequeLIFOSolverAlgorithm, ReversePostorderSolverAlgorithm, StronglyConnectedSolverAlgorithm,
+              LoopNestSolverAlgorithm]
+
+
+def comparable(mapping):
+    """Returns the mapping in a form that can be compared with ==."""
+    return mapping.to_dict() if hasattr(mapping, "to_dict") else mapping
+
+
+def check_programs(count: int) -> List[str]:
+    """microCCode.txt and count generated programs, to check results on."""
+    return [synthetic_program(1)] + [generate_program(statements=30, depth=3, seed=seed) for seed in range(count)]
+
+
+def check(programs: int) -> int:
+    """Returns the number of results of the distributive analyses differing from the first algorithm on the program graph."""
+    mismatches = 0
+    for program in check_programs(programs):
+        program_graph = ProgramGraph(program)
+        for analysis in DISTRIBUTIVE_ANALYSES:
+            reference = None
+            for graph in [program_graph, CompactProgramGraph(program_graph)]:
+                for algorithm in ALGORITHMS:
+                    aa, _ = worklist(graph, analysis, algorithm)
+                    result = {node: comparable(mapping) for node, mapping in aa.items()}
+                    if reference is None:
+                        reference = result
+                    elif result != reference:
+                        mismatches += 1
+                        print(f"{analysis.__name__} with {algorithm.__name__} on the {type(graph).__name__} "
+                              f"differs from {ALGORITHMS[0].__name__}")
+    return mismatches
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[1, 16, 64],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--compact", action="store_true",
+                           help="Solve on the CompactProgramGraph of the programs.")
+    argparser.add_argument("--legacy", action="store_true",
+                           help="Use the analyses working with sets, LiveVariableAnalysis is quadratic in the number of nodes.")
+    argparser.add_argument("--check", type=int, nargs="?", const=10, metavar="PROGRAMS",
+                           help="Check the results of the distributive analyses on PROGRAMS generated programs instead.")
+    args = argparser.parse_args()
+
+    if args.check is not None:
+        mismatches = check(args.check)
+        print(f"{mismatches} results differ")
+        return 1 if mismatches > 0 else 0
+
+    for copies in args.sizes:
+        program_graph = ProgramGraph(synthetic_program(copies))
+        print(f"{copies} copies, {len(program_graph.nodes)} nodes")
+        if args.compact:
+            program_graph = CompactProgramGraph(program_graph)
+        for analysis in LEGACY_ANALYSES if args.legacy else ANALYSES:
+            print(f"  {analysis.__name__}")
+            reference = None
+            for algorithm in ALGORITHMS:
+                start = time.perf_counter()
+                aa, steps = worklist(program_graph, analysis, algorithm)
+                elapsed = time.perf_counter() - start
+                result = {node: comparable(mapping)
+                          for node, mapping in aa.items()}
+                if reference is None:
+                    reference = result
+                print(f"    {algorithm.__name__}: {steps} steps, {elapsed:.3f}s"
+                      f"{'' if result == reference else f', differs from {ALGORITHMS[0].__name__}'}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
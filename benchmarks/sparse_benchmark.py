@@ -0,0 +1,46 @@
+"""Compares the sign detection solved on the program graph with the sign detection solved on the def-use chains of the slots.
+
+The def-use graph is built once then solved, both are timed. The programs are generated with many variables,
+straight-line code with --depth 0.
+Run from the root of the repository: `python -m benchmarks.sparse_benchmark`
+"""
+import argparse
+
+from Analysis import ReversePostorderSolverAlgorithm, SignDetectionAnalysis, worklist
+from Analysis.SignDetection.sparse_sign_detection import SparseSignDetection
+from Parser import ProgramGraph
+
+from .parser_benchmark import best_time
+from .program_generator import generate_program
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--variables", type=int, nargs="*", default=[100, 1000, 10000],
+                           help="Number of variables of the generated programs.")
+    argparser.add_argument("--statements", type=int, default=5000,
+                           help="Number of statements of the generated programs.")
+    argparser.add_argument("--depth", type=int, default=0,
+                           help="Maximal nesting of whiles and ifs of the generated programs.")
+    argparser.add_argument("--repeat", type=int, default=3,
+                           help="Number of runs, the best one is reported.")
+    args = argparser.parse_args()
+
+    for variables in args.variables:
+        program_graph = ProgramGraph(generate_program(
+            variables=variables, statements=args.statements, depth=args.depth))
+        print(f"{variables} variables, {len(program_graph.nodes)} nodes")
+        _, steps = worklist(program_graph, SignDetectionAnalysis, ReversePostorderSolverAlgorithm)
+        dense_time = best_time(lambda: worklist(
+            program_graph, SignDetectionAnalysis, ReversePostorderSolverAlgorithm), args.repeat)
+        print(f"  worklist: {steps} steps, {dense_time:.3f}s")
+        sparse = SparseSignDetection(program_graph)
+        build_time = best_time(lambda: SparseSignDetection(program_graph), args.repeat)
+        _, units = sparse.solve()
+        solve_time = best_time(sparse.solve, args.repeat)
+        print(f"  def-use: {len(sparse.graph.units)} units, {len(sparse.graph)} chains, built in {build_time:.3f}s, "
+              f"{units} units visited, {solve_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
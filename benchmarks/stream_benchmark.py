@@ -0,0 +1,60 @@
+"""Compares building the program graph of a file read at once with building it from the file read as a stream.
+
+The peak memory counts the graph, which both keep, the difference is the text and the parse tree.
+Run from the root of the repository: `python -m benchmarks.stream_benchmark`
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from Parser import ProgramGraph
+
+from .program_generator import generate_program
+
+
+def measure(build: Callable[[], ProgramGraph]) -> Tuple[float, int, int]:
+    """Returns the wall time, the peak memory and the number of edges of build."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    program_graph = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(program_graph.edges)
+
+
+def read_whole(path: str) -> ProgramGraph:
+    with open(path, "r") as text:
+        return ProgramGraph(text.read())
+
+
+def read_stream(path: str) -> ProgramGraph:
+    with open(path, "r") as text:
+        return ProgramGraph.from_stream(text)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--statements", type=int, nargs="*", default=[1000, 10000],
+                           help="Number of statements of the generated programs.")
+    args = argparser.parse_args()
+
+    # Warms up the parser so that loading it is not counted.
+    ProgramGraph("int a;")
+    for statements in args.statements:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "program.txt")
+            with open(path, "w") as program:
+                program.write(generate_program(statements=statements))
+            size = os.path.getsize(path)
+            for name, build in [("whole", read_whole), ("stream", read_stream)]:
+                elapsed, peak, edges = measure(lambda: build(path))
+                print(f"{statements} statements ({size / 1024:.0f} KiB), {name}: {elapsed:.3f}s, "
+                      f"peak {peak / 1024:.0f} KiB, {peak / edges:.0f} bytes per edge")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Times parsing, building and solving generated programs and compares the results with a baseline.
+
+Every program of PROGRAMS is generated with benchmarks/program_generator.py, the wall time is the best of
+the repeated runs and the peak memory is measured in a separate run. Results are saved as JSON, fx:
+`python -m benchmarks.suite run --output baseline.json`
+`python -m benchmarks.suite run --output results.json --baseline baseline.json`
+`python -m benchmarks.suite compare baseline.json results.json`
+compare exits with 1 when a regression is found.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from batch import ANALYSES, SOLVERS
+from Analysis import worklist
+from Parser import ProgramGraph
+from Parser.parser import grammar
+from Parser.program_graph import ProgramGraphBuilder, check_declarations
+
+from .parser_benchmark import best_time
+from .program_generator import generate_program
+
+# The parameters of the generated programs, see ProgramGenerator.
+PROGRAMS = {
+    "small": dict(statements=50),
+    "medium": dict(statements=500),
+    "large": dict(statements=2000),
+    "deep": dict(statements=500, depth=8),
+    "wide": dict(statements=500, fan_out=6),
+    "expressions": dict(statements=500, expression_depth=5),
+    "declarations": dict(statements=500, variables=64, arrays=16, records=16),
+}
+DEFAULT_ANALYSES = ["BitVectorReachingDefintionAnalysis", "BitVectorLiveVariableAnalysis", "SignDetectionAnalysis"]
+DEFAULT_SOLVERS = ["FIFOSolverAlgorithm", "DequeFIFOSolverAlgorithm", "ReversePostorderSolverAlgorithm",
+                   "LoopNestSolverAlgorithm"]
+
+
+def peak_memory(function: Callable) -> int:
+    """Returns the peak memory allocated during a call to function, in bytes."""
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def build(tree) -> ProgramGraph:
+    """Builds the program graph of a parse tree, as ProgramGraph does."""
+    builder = ProgramGraphBuilder()
+    for child in tree.children:
+        builder.add(child)
+    builder.finish()
+    return ProgramGraph.from_graph(builder.nodes, builder.edges,
+                                   check_declarations(builder.variables, builder.declarations))
+
+
+def measure(function: Callable, repeat: int) -> Dict:
+    """Returns the best wall time and the peak memory of function."""
+    return {"seconds": best_time(function, repeat), "peak_bytes": peak_memory(function)}
+
+
+def run_program(parameters: Dict, analyses: List[str], solvers: List[str], repeat: int) -> Dict:
+    """Measures the phases of one generated program."""
+    program = generate_program(**parameters)
+    tree = grammar.parse(program)
+    program_graph = build(tree)
+    record = {"parameters": parameters, "lines": program.count("\n"),
+              "nodes": len(program_graph.nodes), "edges": len(program_graph.edges),
+              "parse": measure(lambda: grammar.parse(program), repeat),
+              "build": measure(lambda: build(tree), repeat),
+              "solve": {}}
+    for analysis in analyses:
+        for solver in solvers:
+            _, steps = worklist(program_graph, ANALYSES[analysis], SOLVERS[solver])
+            result = measure(lambda: worklist(program_graph, ANALYSES[analysis], SOLVERS[solver]), repeat)
+            result["steps"] = steps
+            record["solve"][f"{analysis}/{solver}"] = result
+    return record
+
+
+def run(programs: List[str], analyses: List[str], solvers: List[str], repeat: int) -> Dict:
+    results = {"python": platform.python_version(), "machine": platform.machine(), "programs": {}}
+    for name in programs:
+        start = time.perf_counter()
+        results["programs"][name] = run_program(PROGRAMS[name], analyses, solvers, repeat)
+        print(f"{name}: {results['programs'][name]['nodes']} nodes, {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+    return results
+
+
+def measurements(results: Dict) -> Dict[Tuple[str, str], Dict]:
+    """Returns the measures of the results by program and phase."""
+    flat = {}
+    for name, record in results["programs"].items():
+        flat[(name, "parse")] = record["parse"]
+        flat[(name, "build")] = record["build"]
+        for run_name, result in record["solve"].items():
+            flat[(name, run_name)] = result
+    return flat
+
+
+def compare(baseline: Dict, results: Dict, threshold: float, min_seconds: float) -> List[str]:
+    """
+    Returns the regressions of the results: a time or a peak memory more than threshold above the baseline,
+    times under min_seconds being noise, and any increase of the number of steps.
+    """
+    regressions = []
+    old = measurements(baseline)
+    for key, new in measurements(results).items():
+        if key not in old:
+            continue
+        name = "/".join(key)
+        before = old[key]
+        if new["seconds"] > before["seconds"] * (1 + threshold) and new["seconds"] > min_seconds:
+            regressions.append(f"{name}: {before['seconds']:.4f}s -> {new['seconds']:.4f}s")
+        if new["peak_bytes"] > before["peak_bytes"] * (1 + threshold):
+            regressions.append(f"{name}: peak {before['peak_bytes']} -> {new['peak_bytes']} bytes")
+        if new.get("steps", 0) > before.get("steps", 0):
+            regressions.append(f"{name}: {before['steps']} -> {new['steps']} steps")
+    return regressions
+
+
+def report(regressions: List[str]) -> int:
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = argparser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Runs the benchmarks and saves the results.")
+    run_parser.add_argument("--programs", nargs="+", default=list(PROGRAMS), choices=list(PROGRAMS))
+    run_parser.add_argument("--analyses", nargs="+", default=DEFAULT_ANALYSES, choices=sorted(ANALYSES))
+    run_parser.add_argument("--solvers", nargs="+", default=DEFAULT_SOLVERS, choices=sorted(SOLVERS))
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="Number of runs, the best one is reported.")
+    run_parser.add_argument("--output", required=True,
+                            help="JSON file to write the results to.")
+    run_parser.add_argument("--baseline", default=None,
+                            help="Results to compare the new results with.")
+    compare_parser = commands.add_parser("compare", help="Compares saved results with a baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    for command in [run_parser, compare_parser]:
+        command.add_argument("--threshold", type=float, default=0.2,
+                             help="Relative increase of a time or a peak memory reported as a regression.")
+        command.add_argument("--min-seconds", type=float, default=0.001,
+                             help="Times below are not compared.")
+    args = argparser.parse_args()
+
+    if args.command == "run":
+        results = run(args.programs, args.analyses, args.solvers, args.repeat)
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=1)
+        if args.baseline is None:
+            return 0
+        with open(args.baseline, "r") as baseline:
+            return report(compare(json.load(baseline), results, args.threshold, args.min_seconds))
+    with open(args.baseline, "r") as baseline, open(args.results, "r") as results:
+        return report(compare(json.load(baseline), json.load(results), args.threshold, args.min_seconds))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Compares solving with the compiled transfer functions of the edges and with update_mapping on every visit.
+
+Run from the root of the repository: `python -m benchmarks.transfer_benchmark`
+"""
+import argparse
+import time
+
+from Analysis import (BitVectorLiveVariableAnalysis, BitVectorReachingDefintionAnalysis, FIFOSolverAlgorithm,
+                      LiveVariableAnalysis, ReachingDefintionAnalysis, SignDetectionAnalysis, worklist)
+from Analysis.abstract_analysis import AbstractAnalysis
+from Parser import ProgramGraph
+
+from .parser_benchmark import synthetic_program
+
+ANALYSES = [ReachingDefintionAnalysis, BitVectorReachingDefintionAnalysis, LiveVariableAnalysis,
+            BitVectorLiveVariableAnalysis, SignDetectionAnalysis]
+
+
+def interpreted(analysis):
+    """Returns the analysis with the default transfer functions, that call update_mapping on every visit."""
+    return type(f"Interpreted{analysis.__name__}", (analysis,), {
+        "compile_edge": classmethod(AbstractAnalysis.compile_edge.__func__)
+    })
+
+
+def measure(program_graph: ProgramGraph, analysis, repeat: int):
+    """Solves the analysis and returns the result, its number of steps and the best wall time."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aa, steps = worklist(program_graph, analysis, FIFOSolverAlgorithm)
+        best = min(best, time.perf_counter() - start)
+    return aa, steps, best
+
+
+def comparable(mapping):
+    """Returns the mapping in a form that can be compared with ==."""
+    return mapping.to_dict() if hasattr(mapping, "to_dict") else mapping
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=[4, 16],
+                           help="Number of copies of microCCode.txt in the synthetic programs.")
+    argparser.add_argument("--skip-legacy", action="store_true",
+                           help="Skip LiveVariableAnalysis, it is quadratic in the number of nodes.")
+    argparser.add_argument("--repeat", type=int, default=3,
+                           help="Number of runs of each analysis, the best one is reported.")
+    args = argparser.parse_args()
+
+    for copies in args.sizes:
+        program_graph = ProgramGraph(synthetic_program(copies))
+        print(f"{copies} copies, {len(program_graph.nodes)} nodes")
+        for analysis in ANALYSES:
+            if args.skip_legacy and analysis is LiveVariableAnalysis:
+                continue
+            reference, reference_steps, reference_time = measure(
+                program_graph, interpreted(analysis), args.repeat)
+            result, steps, compiled_time = measure(
+                program_graph, analysis, args.repeat)
+            same = steps == reference_steps and all(
+                comparable(result[node]) == comparable(reference[node]) for node in result)
+            print(f"  {analysis.__name__}: update_mapping {reference_time:.3f}s, compiled {compiled_time:.3f}s, "
+                  f"{100 * (1 - compiled_time / reference_time):.0f}% saved{'' if same else ', RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
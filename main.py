@@ -1,15 +1,33 @@
+import os
+
 from Analysis.solvers import FIFOSolverAlgorithm, LIFOSolverAlgorithm, RoundRobinAlgorithm
 from Analysis.reversePostorder import compute_reverse_post_order
 from Analysis.utils import display_assignment
+from Analysis.metrics import Metrics
+from Analysis.cache import AnalysisCache
 from Parser import ProgramGraph
 from Analysis import ReachingDefintionAnalysis, LiveVariableAnalysis, worklist, SignDetectionAnalysis
 
 #program = "int[3] A; int a; int b; int c; int x; {int fst; int snd} R; if (a < 2) {write a;} read a; if (b==2) {write x;} write R.fst; A[a+1]:= 0 + a - c;"
+# Set ANALYSIS_CACHE to a directory to reuse the graph and the assignment of a program already solved.
+cache_directory = os.environ.get("ANALYSIS_CACHE")
+# Set ANALYSIS_METRICS to report the times and counts of the solve, it is ignored with a cache.
+metrics_enabled = bool(os.environ.get("ANALYSIS_METRICS"))
 with open("microCCode.txt", "r") as text:
-    pg = ProgramGraph(text.read())
+    program = text.read()
+    metrics = None
+    if cache_directory:
+        assignment, steps = AnalysisCache(cache_directory).worklist(
+            program, SignDetectionAnalysis, LIFOSolverAlgorithm)
+    else:
+        if metrics_enabled:
+            metrics = Metrics()
+        pg = ProgramGraph(program, metrics=metrics)
 
-    assignment, steps = worklist(
-        pg, SignDetectionAnalysis, LIFOSolverAlgorithm)
+        assignment, steps = worklist(
+            pg, SignDetectionAnalysis, LIFOSolverAlgorithm, metrics)
 
     print(steps)
     display_assignment(assignment)
+    if metrics is not None:
+        print(metrics.report())
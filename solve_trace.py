@@ -0,0 +1,60 @@
+"""Records the events of a worklist run to a JSON lines trace and replays traces to see why a solve takes many steps.
+
+fx: `python solve_trace.py record microCCode.txt --analysis SignDetectionAnalysis --solver FIFOSolverAlgorithm --output trace.jsonl`
+then `python solve_trace.py replay trace.jsonl`
+"""
+import argparse
+import json
+
+from Analysis import worklist
+from Analysis.trace import TraceWriter, read_trace, replay, replay_report
+from batch import ANALYSES, SOLVERS
+from Parser import ProgramGraph
+
+
+def record(program: str, analysis: str, solver: str, output: str) -> int:
+    """Solves the program and writes the trace of the run, returns the number of steps."""
+    with open(program, "r") as text:
+        program_graph = ProgramGraph(text.read())
+    with open(output, "w") as trace:
+        header = {"program": program, "analysis": analysis, "solver": solver,
+                  "nodes": len(program_graph.nodes), "edges": len(program_graph.edges)}
+        _, steps = worklist(program_graph, ANALYSES[analysis], SOLVERS[solver], observer=TraceWriter(trace, header))
+    return steps
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    commands = argparser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Solves a program and writes the trace of the run.")
+    record_parser.add_argument("program")
+    record_parser.add_argument("--analysis", default="SignDetectionAnalysis", choices=sorted(ANALYSES))
+    record_parser.add_argument("--solver", default="FIFOSolverAlgorithm", choices=sorted(SOLVERS))
+    record_parser.add_argument("--output", required=True,
+                               help="JSON lines file to write the trace to.")
+    replay_parser = commands.add_parser("replay", help="Summarizes a trace.")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--buckets", type=int, default=10,
+                               help="Number of parts of the timeline.")
+    replay_parser.add_argument("--top", type=int, default=10,
+                               help="Number of nodes, edges and variables ranked.")
+    replay_parser.add_argument("--json", action="store_true",
+                               help="Print the summary as JSON.")
+    args = argparser.parse_args()
+
+    if args.command == "record":
+        steps = record(args.program, args.analysis, args.solver, args.output)
+        print(f"{steps} steps written to {args.output}")
+        return
+    with open(args.trace, "r") as trace:
+        header, events = read_trace(trace)
+    summary = replay(events, args.buckets, args.top)
+    if args.json:
+        print(json.dumps({"header": header, **summary}))
+    else:
+        print(", ".join(f"{key}: {value}" for key, value in header.items()))
+        print(replay_report(summary))
+
+
+if __name__ == "__main__":
+    main()